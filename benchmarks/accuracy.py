@@ -0,0 +1,363 @@
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import numpy as np
+from .common import ROOT, load, thermo, tables, mixed_cases
+from thermoflow.tableset import get_tables
+from thermoflow.compiled import pchip_slopes
+from thermoflow.interpolation import _hermite
+
+# Golden accuracy harness for the property engine:
+#   python -m benchmarks.accuracy            check, exit 1 on any failure
+#   python -m benchmarks.accuracy --update   rewrite the golden file
+#
+# nodes     -> every table node is returned verbatim
+# midpoints -> held-out midpoints between neighbouring nodes equal the linear
+#              blend of those nodes (along T on an isobar, along P at a shared T)
+# roundtrip -> (P, h) and (P, s) inverse lookups of random single-phase states
+#              give h or s back through Read_Tables(T=..., P=...)
+# historian -> exports with unreadable cells and incomplete rows are ingested:
+#              those rows are skipped and counted, the rest match
+#              Read_Tables_batch
+# cycles    -> states of solved cycles match fresh States with the same inputs
+# holdout   -> with every other node of an isobar removed, error against the
+#              removed nodes (table resolution; reported, not checked), for
+#              linear and PCHIP interpolation
+# golden    -> fixed mixed-branch inputs match results recorded from a trusted
+#              engine, for Read_Tables, Read_Tables_batch and the inverse
+
+GOLDEN = ROOT / "benchmarks" / "golden" / "read_tables.json"
+RTOL, ATOL = 1e-9, 1e-12
+
+T_COL, P_COL = "T (°C)", "P (MPa)"
+
+
+def _close(a, b, rtol=RTOL, atol=ATOL):
+    if a is None or b is None:
+        return a is None and b is None
+    if isinstance(a, str) or isinstance(b, str):
+        return a == b
+    if math.isnan(a) or math.isnan(b):
+        return math.isnan(a) and math.isnan(b)
+    return abs(a - b) <= atol + rtol*abs(b)
+
+
+def _plain(val):
+    if val is None or isinstance(val, str):
+        return val
+    val = float(val)
+    return None if math.isnan(val) else val
+
+
+def _row(**kw):
+    return {k: _plain(v) for k, v in tables._lookup("water", **kw).items()}
+
+
+def check_nodes():
+    fails, count = [], 0
+    for tab, key in ((get_tables().T_tab, T_COL), (get_tables().P_tab, P_COL)):
+        for i in range(len(tab)):
+            ref = tab.row(i)
+            got = _row(**{key[0]: ref[key]})
+            count += 1
+            bad = [c for c in tab.numeric if not _close(got.get(c), _plain(ref[c]))]
+            if bad:
+                fails.append(f"{key}={ref[key]}: {bad}")
+
+    ts = get_tables()
+    sc, idx = ts.SC_tab, ts.SC_index
+    Psat_T = ts.P_tab
+    for i in range(len(sc)):
+        ref = sc.row(i)
+        T, P = ref[T_COL], ref[P_COL]
+        # Rows at the saturation temperature resolve to the saturation table
+        Tsat = tables._interp_row_1d(Psat_T, P_COL, P)[T_COL]
+        if abs(T - Tsat) <= 1e-3 + 1e-5*abs(Tsat):
+            continue
+        k = idx.levellist.index(P)
+        a, b = idx.slice(k)
+        if i > a and sc.keylist[i - 1] == T:
+            continue    # second of two rows at the same T, the first one wins
+        got = _row(T=T, P=P)
+        count += 1
+        bad = [c for c in sc.columns if not _close(got.get(c), _plain(ref[c]))]
+        if bad:
+            fails.append(f"T={T}, P={P}: {bad}")
+    return count, fails
+
+
+def check_midpoints():
+    ts = get_tables()
+    sc, idx = ts.SC_tab, ts.SC_index
+    fails, count = [], 0
+    # Along T on every isobar, between nodes on the same side of the dome
+    for k in range(len(idx)):
+        a, b = idx.slice(k)
+        P = idx.levellist[k]
+        for i in range(a, b - 1):
+            r0, r1 = sc.row(i), sc.row(i + 1)
+            T0, T1 = r0[T_COL], r1[T_COL]
+            if T1 - T0 < 1e-6 or r0.get("Phase") != r1.get("Phase"):
+                continue
+            if not math.isnan(idx.T_sat[k]) and T0 < idx.T_sat[k] < T1:
+                continue
+            Tm = 0.5*(T0 + T1)
+            Tsat = tables._interp_row_1d(ts.P_tab, P_COL, P)[T_COL]
+            if abs(Tm - Tsat) <= 1e-3 + 1e-5*abs(Tsat):
+                continue
+            got = _row(T=Tm, P=P)
+            count += 1
+            bad = [c for c in sc.numeric if c not in (T_COL, P_COL)
+                   and not _close(got[c], 0.5*(r0[c] + r1[c]), rtol=1e-9, atol=1e-9)]
+            if bad:
+                fails.append(f"T={Tm}, P={P}: {bad}")
+    # Along P at temperatures present on both neighbouring isobars
+    for k in range(len(idx) - 1):
+        (a0, b0), (a1, b1) = idx.slice(k), idx.slice(k + 1)
+        T0 = dict((sc.keylist[i], i) for i in range(b0 - 1, a0 - 1, -1))
+        T1 = dict((sc.keylist[i], i) for i in range(b1 - 1, a1 - 1, -1))
+        P0, P1 = idx.levellist[k], idx.levellist[k + 1]
+        Pm = 0.5*(P0 + P1)
+        Tsat = tables._interp_row_1d(ts.P_tab, P_COL, Pm)[T_COL]
+        for T in sorted(set(T0) & set(T1))[::7]:
+            if idx.crossing(k, k + 1, T) or abs(T - Tsat) <= 1e-3 + 1e-5*abs(Tsat):
+                continue
+            r0, r1 = sc.row(T0[T]), sc.row(T1[T])
+            got = _row(T=T, P=Pm)
+            count += 1
+            bad = [c for c in sc.numeric if c not in (T_COL, P_COL)
+                   and not _close(got[c], 0.5*(r0[c] + r1[c]), rtol=1e-9, atol=1e-9)]
+            if bad:
+                fails.append(f"T={T}, P={Pm}: {bad}")
+    return count, fails
+
+
+def check_roundtrip(n=20000, seed=3):
+    ts = get_tables()
+    idx = ts.SC_index
+    rng = np.random.default_rng(seed)
+    P = np.exp(rng.uniform(math.log(idx.levels[0]), math.log(idx.levels[-1]), n))
+    T = rng.uniform(ts.SC_tab.keys.min(), 1000.0, n)
+    # States at the saturation temperature resolve to the saturation table
+    Tsat = tables._interp_cols_1d(ts.P_tab, P_COL, (T_COL,), P)[0]
+    keep = ~(np.abs(T - Tsat) <= 1e-3 + 1e-5*np.abs(Tsat))
+    T, P = T[keep], P[keep]
+    fwd = thermo.Read_Tables_batch("water", T=T, P=P)
+    fails, count = [], 0
+    for prop, col in (("h", "Enthalpy (kJ/kg)"), ("s", "Entropy [kJ/(kg K)]")):
+        inv = thermo.Read_Tables_Inverse_batch("water", P=P, **{prop: fwd[col]})
+        single = np.flatnonzero(np.isnan(inv["x"]))
+        back = thermo.Read_Tables_batch("water", T=inv[T_COL][single], P=P[single])[col]
+        count += len(single)
+        for i, b in zip(single, back):
+            if not _close(b, fwd[col][i], rtol=1e-9, atol=1e-9):
+                fails.append(f"P={P[i]}, {prop}={fwd[col][i]}: T={inv[T_COL][i]} gives {b}")
+    return count, fails
+
+
+def _ingest(cols, inputs):
+    # Output rows of a historian ingest of the given text columns, and its report
+    from thermoflow.historian import ingest_iter
+    import pandas as pd
+    fd, src = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    dst = src[:-4] + "_out.csv"
+    try:
+        pd.DataFrame(cols).to_csv(src, index=False)
+        *_, report = ingest_iter(src, dst, inputs, outputs=("h",))
+        return pd.read_csv(dst), report
+    finally:
+        for path in (src, dst):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def check_historian():
+    # Unreadable cells, and rows that are incomplete (no T or P, or a single
+    # reading) among full ones of different input pairs: those are skipped and
+    # counted, the rest match Read_Tables_batch row by row
+    cases = (
+        ({"T": "TT", "P": "PT"},
+         {"TT": ["150", "n/a", "300.5", "", "25", "#REF!"],
+          "PT": ["0.5", "1.0", "bad", "2.0", "0.1", "3.0"]}),
+        ({"T": "TT", "P": "PT", "h": "HT", "s": "ST"},
+         {"TT": ["300", "", "", "150", "120", "", ""],
+          "PT": ["1.0", "1.0", "", "", "", "", "x"],
+          "HT": ["", "2900", "2900", "", "2000", "", "3000"],
+          "ST": ["", "", "7.0", "", "", "", "7.0"]}),
+    )
+    count, fails = 0, []
+    for inputs, cols in cases:
+        out, report = _ingest(cols, inputs)
+        n = len(next(iter(cols.values())))
+        want, skipped = np.full(n, np.nan), 0
+        for i in range(n):
+            kw = {}
+            for k, c in inputs.items():
+                try:
+                    kw[k] = float(cols[c][i])
+                except ValueError:
+                    pass
+            if len(kw) < 2 or not ("T" in kw or "P" in kw):
+                skipped += 1
+            else:
+                want[i] = thermo.Read_Tables_batch("water", **{k: [v] for k, v in kw.items()})["Enthalpy (kJ/kg)"][0]
+        count += n
+        if report["skipped"] != skipped:
+            fails.append(f"{sorted(inputs)}: skipped {report['skipped']}, expected {skipped}")
+        for i, (row, w) in enumerate(zip(out["h"], want)):
+            if not _close(float(row), float(w)):
+                fails.append(f"{sorted(inputs)} row {i}: h={row}, expected {w}")
+    return count, fails
+
+
+def check_cycles():
+    # Every state of a solved cycle shows the same Data_Frame as a State built
+    # fresh from its inputs, and the energy balances hold on those states
+    from thermoflow.cycles import rankine_cycle, vapor_compression_cycle
+    from thermoflow.state import State
+    runs = [("rankine", rankine_cycle(8.0, 0.01)),
+            ("rankine", rankine_cycle(8.0, 0.01, T_boiler=500, eta_turbine=0.85, eta_pump=0.8)),
+            ("rankine", rankine_cycle(25.0, 0.01, T_boiler=600, eta_turbine=0.9)),
+            ("vapor_compression", vapor_compression_cycle(0.14, 0.8)),
+            ("vapor_compression", vapor_compression_cycle(0.2, 1.2, eta_compressor=0.75))]
+    count, fails = 0, []
+    for name, r in runs:
+        st = r["states"]
+        for i, s in st.items():
+            count += 1
+            fresh = State(s.Material, s.m, T=s.T, P=s.P, x=s.x)
+            if not s.Data_Frame().equals(fresh.Data_Frame()):
+                fails.append(f"{name} state {i}: {s!r} differs from a fresh State with its inputs")
+        if name == "rankine":
+            balances = (("w_turbine", st[3].h - st[4].h), ("q_in", st[3].h - st[2].h),
+                        ("w_pump", st[2].h - st[1].h))
+        else:
+            balances = (("w_in", st[2].h - st[1].h), ("q_L", st[1].h - st[4].h))
+        for key, val in balances:
+            if not _close(r[key], val, rtol=1e-9, atol=1e-9):
+                fails.append(f"{name} {key}: {r[key]} vs {val} from its states")
+    return count, fails
+
+
+def holdout_error(method="linear"):
+    # Interpolation over every other node vs the node left out, per column;
+    # method 'pchip' uses the monotone cubic of the kept nodes (per phase)
+    ts = get_tables()
+    sc, idx = ts.SC_tab, ts.SC_index
+    errs = {c: [] for c in sc.numeric if c not in (T_COL, P_COL)}
+    phase = sc.labels.get("Phase")
+    for k in range(len(idx)):
+        a, b = idx.slice(k)
+        kept = np.arange(a, b, 2)
+        if method == "pchip":
+            breaks = [] if phase is None else np.flatnonzero(phase[kept][1:] != phase[kept][:-1]) + 1
+            S = pchip_slopes(sc.keys[kept], sc.data[:, kept], breaks)
+        for i in range(a + 1, b - 1, 2):
+            r0, r, r1 = sc.row(i - 1), sc.row(i), sc.row(i + 1)
+            if not (r0.get("Phase") == r.get("Phase") == r1.get("Phase")):
+                continue
+            T0, T, T1 = r0[T_COL], r[T_COL], r1[T_COL]
+            if T1 - T0 < 1e-6:
+                continue
+            w = (T - T0)/(T1 - T0)
+            if method == "pchip":
+                j = (i - 1 - a)//2
+                est = dict(zip(sc.numeric, _hermite(sc.data[:, kept], S, sc.keys[kept], j, j + 1, w)))
+            else:
+                est = {c: r0[c] + w*(r1[c] - r0[c]) for c in errs}
+            for c in errs:
+                if r[c] != 0:
+                    errs[c].append(abs(est[c] - r[c])/abs(r[c]))
+    return {c: (float(np.median(e)), float(np.percentile(e, 99)), float(np.max(e))) for c, e in errs.items() if e}
+
+
+def _golden_inputs():
+    inv = []
+    for P, h in ((0.1, 2800.0), (1.0, 3000.0), (1.0, 1500.0), (10.0, 1000.0), (30.0, 3500.0)):
+        inv.append(dict(P=P, h=h))
+    for P, s in ((0.1, 7.5), (1.0, 6.0), (5.0, 3.0), (20.0, 6.5)):
+        inv.append(dict(P=P, s=s))
+    for T, v in ((100.0, 1.0), (250.0, 0.05), (400.0, 0.01), (30.0, 0.001)):
+        inv.append(dict(T=T, v=v))
+    for h, s in ((3000.0, 7.0), (2000.0, 5.0), (500.0, 1.5)):
+        inv.append(dict(h=h, s=s))
+    return {"read_tables": mixed_cases(300, seed=11), "inverse": inv}
+
+
+def _evaluate(inputs):
+    out = {"read_tables": [], "batch": [], "inverse": []}
+    for kw in inputs["read_tables"]:
+        try:
+            out["read_tables"].append(_row(**kw))
+        except ValueError as e:
+            out["read_tables"].append({"error": str(e)})
+    for kw in inputs["read_tables"]:
+        try:
+            res = thermo.Read_Tables_batch("water", **kw)
+            out["batch"].append({c: _plain(v[0]) for c, v in res.items()})
+        except ValueError as e:
+            out["batch"].append({"error": str(e)})
+    for kw in inputs["inverse"]:
+        res = thermo.Read_Tables_Inverse_batch("water", **{k: [v] for k, v in kw.items()})
+        out["inverse"].append({c: _plain(v[0]) for c, v in res.items()})
+    return out
+
+
+def _dump(doc):
+    # One record per line, so a changed result shows up as a one-line diff
+    parts = []
+    for section, groups in doc.items():
+        body = ",\n".join(f'  "{g}": [\n' + ",\n".join("   " + json.dumps(r, ensure_ascii=False) for r in rows) + "\n  ]"
+                          for g, rows in groups.items())
+        parts.append(f'"{section}": {{\n{body}\n}}')
+    return "{\n" + ",\n".join(parts) + "\n}\n"
+
+
+def check_golden(update=False):
+    inputs = _golden_inputs()
+    got = _evaluate(inputs)
+    if update or not GOLDEN.exists():
+        GOLDEN.parent.mkdir(parents=True, exist_ok=True)
+        GOLDEN.write_text(_dump({"inputs": inputs, "outputs": got}), encoding="utf-8")
+        return sum(len(v) for v in got.values()), []
+    ref = json.loads(GOLDEN.read_text(encoding="utf-8"))
+    fails, count = [], 0
+    for group, rows in ref["outputs"].items():
+        for i, (r, g) in enumerate(zip(rows, got[group])):
+            count += 1
+            bad = sorted(c for c in set(r) | set(g) if not _close(g.get(c), r.get(c)))
+            if bad:
+                kw = ref["inputs"]["inverse" if group == "inverse" else "read_tables"][i]
+                fails.append(f"{group} {kw}: {bad}")
+    return count, fails
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Accuracy checks for the thermoflow property engine")
+    ap.add_argument("--update", action="store_true", help="rewrite the golden file from the current engine")
+    ap.add_argument("-v", "--verbose", action="store_true")
+    args = ap.parse_args(argv)
+    load()
+
+    failed = False
+    for name, fn in (("nodes", check_nodes), ("midpoints", check_midpoints), ("roundtrip", check_roundtrip),
+                     ("historian", check_historian), ("cycles", check_cycles), ("golden", lambda: check_golden(args.update))):
+        count, fails = fn()
+        failed |= bool(fails)
+        print(f"{name:10s} {count:6d} checked  {len(fails):4d} failed")
+        for f in fails[:None if args.verbose else 10]:
+            print("   ", f)
+
+    for method in ("linear", "pchip"):
+        print(f"holdout    relative error of {method} interpolation over every other node (median / p99 / max)")
+        for c, (med, p99, mx) in holdout_error(method).items():
+            print(f"    {c:28s} {med:.2e} / {p99:.2e} / {mx:.2e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+import os
+import tempfile
+import numpy as np
+from .common import load
+from thermoflow.historian import ingest
+
+# Historian ingestion, CSV to CSV on one process (rows per second is n / time)
+
+
+class Ingest:
+    params = [[200000]]
+    param_names = ["n"]
+
+    def setup(self, n):
+        load()
+        import pandas as pd
+        rng = np.random.default_rng(0)
+        fd, self.src = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        self.dst = self.src[:-4] + "_out.csv"
+        pd.DataFrame({"TT": rng.uniform(20, 600, n).round(3), "PT": rng.uniform(0.01, 20, n).round(4),
+                      "FT": rng.uniform(1, 5, n).round(2)}).to_csv(self.src, index=False)
+
+    def teardown(self, n):
+        for path in (self.src, self.dst):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def time_csv(self, n):
+        ingest(self.src, self.dst, {"T": "TT", "P": "PT"}, chunksize=50000)
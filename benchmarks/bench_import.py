@@ -0,0 +1,80 @@
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Import cost of thermoflow in a fresh interpreter. Run directly:
+#   python -m benchmarks.bench_import [--runs N] [--record FILE]
+# --record appends one JSON line per run so the numbers can be tracked.
+
+ROOT = Path(__file__).resolve().parents[1]
+
+_PROBE = (
+    "import sys, time; t = time.perf_counter(); import thermoflow; "
+    "print(time.perf_counter() - t); print('pandas' in sys.modules)"
+)
+
+
+def _fresh(code, *flags):
+    return subprocess.run([sys.executable, *flags, "-c", code], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+
+
+def _self_times(stderr):
+    # -X importtime lines: "import time: self [us] | cumulative | name"
+    out = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            _, cum, name = line[len("import time:"):].split("|")
+            out[name.strip()] = int(cum)
+        except ValueError:
+            continue
+    return out
+
+
+def measure(runs=5):
+    walls, pandas = [], False
+    for _ in range(runs):
+        res = _fresh(_PROBE)
+        wall, loaded = res.stdout.split()
+        walls.append(float(wall))
+        pandas = pandas or loaded == "True"
+    cum = _self_times(_fresh("import thermoflow", "-X", "importtime").stderr)
+    return {
+        "import_s_min": min(walls),
+        "import_s_median": sorted(walls)[len(walls) // 2],
+        "thermoflow_cumulative_us": cum.get("thermoflow"),
+        "numpy_cumulative_us": cum.get("numpy"),
+        "pandas_imported": pandas,
+    }
+
+
+def track_import_thermoflow_seconds():
+    return measure(3)["import_s_min"]
+track_import_thermoflow_seconds.unit = "seconds"
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description="Measure the import time of thermoflow")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--record", type=Path, default=None)
+    args = ap.parse_args(argv)
+
+    res = measure(args.runs)
+    for k, v in res.items():
+        print(f"{k:28s} {v}")
+    if args.record:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True).stdout.strip()
+        res.update(time=time.strftime("%Y-%m-%dT%H:%M:%S"), python=sys.version.split()[0], rev=rev)
+        with open(args.record, "a", encoding="utf-8") as f:
+            f.write(json.dumps(res) + "\n")
+    return 1 if res["pandas_imported"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
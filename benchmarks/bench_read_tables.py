@@ -0,0 +1,184 @@
+import numpy as np
+from .common import load, thermo, tables, CASES, batch_cases, BATCH_BRANCHES
+from thermoflow.interpolation import _interp_row_1d, _bilinear_superheated
+from thermoflow.tableset import get_tables
+from thermoflow.inverse import _inverse_lookup
+
+# asv-style benchmarks (time_*, peakmem_*, params); run them with
+#   python -m benchmarks.run
+
+
+class ReadTables:
+    # Single-call latency of every branch
+    params = list(CASES)
+    param_names = ["branch"]
+
+    def setup(self, branch):
+        load()
+        self.kw = CASES[branch]
+
+    def time_read_tables(self, branch):
+        thermo.Read_Tables("water", **self.kw)
+
+    def time_lookup_row(self, branch):
+        # Same lookup without building the one-row DataFrame
+        tables._lookup("water", **self.kw)
+
+    def time_state_properties(self, branch):
+        st = thermo.State("water", 1.0, **self.kw)
+        st.v; st.h; st.s; st.phase
+
+
+class Kernels:
+    def setup(self):
+        load()
+        self.ts = get_tables()
+
+    def time_interp_row_1d(self):
+        _interp_row_1d(self.ts.T_tab, "T (°C)", 151.3)
+
+    def time_bilinear_superheated(self):
+        _bilinear_superheated(self.ts.SC_tab, self.ts.SC_index, 233.3, 1.7)
+
+    def time_bilinear_crossing(self):
+        _bilinear_superheated(self.ts.SC_tab, self.ts.SC_index, 190.0, 1.3)
+
+
+class Batch:
+    # Throughput: states per second is n / time
+    params = (list(BATCH_BRANCHES), [1000, 100000])
+    param_names = ["branch", "n"]
+
+    def setup(self, branch, n):
+        load()
+        self.kw = batch_cases(branch, n)
+
+    def time_read_tables_batch(self, branch, n):
+        thermo.Read_Tables_batch("water", **self.kw)
+
+    def peakmem_read_tables_batch(self, branch, n):
+        thermo.Read_Tables_batch("water", **self.kw)
+
+
+class Inverse:
+    params = [["Ph", "Ps", "Tv", "hs"]]
+    param_names = ["pair"]
+    _KW = {"Ph": dict(P=1.0, h=3000.0), "Ps": dict(P=0.5, s=7.0), "Tv": dict(T=300.0, v=0.1), "hs": dict(h=3000.0, s=7.0)}
+
+    def setup(self, pair):
+        load()
+        self.kw = self._KW[pair]
+
+    def time_read_tables_inverse(self, pair):
+        thermo.Read_Tables_Inverse("water", **self.kw)
+
+    def time_inverse_row(self, pair):
+        # Same lookup without building the one-row DataFrame; compare with
+        # ReadTables.time_lookup_row
+        _inverse_lookup("water", **self.kw)
+
+
+class InverseBatch:
+    params = (["Ph", "Ps", "Tv", "hs"], [1000, 20000])
+    param_names = ["pair", "n"]
+
+    def setup(self, pair, n):
+        load()
+        rng = np.random.default_rng(0)
+        if pair in ("Ph", "Ps"):
+            y = rng.uniform(100.0, 3500.0, n) if pair == "Ph" else rng.uniform(1.0, 8.5, n)
+            self.kw = {"P": 10**rng.uniform(-1.9, 1.3, n), pair[1].lower(): y}
+            return
+        # (T, v) and (h, s) of single-phase states
+        T, P = rng.uniform(20.0, 700.0, n), 10**rng.uniform(-1.9, 1.3, n)
+        fwd = thermo.Read_Tables_batch("water", T=T, P=P)
+        if pair == "Tv":
+            self.kw = {"T": T, "v": fwd["Specific Volume (m^3/kg)"]}
+        else:
+            self.kw = {"h": fwd["Enthalpy (kJ/kg)"], "s": fwd["Entropy [kJ/(kg K)]"]}
+
+    def time_read_tables_inverse_batch(self, pair, n):
+        thermo.Read_Tables_Inverse_batch("water", **self.kw)
+
+
+class Interpolation:
+    # Linear vs PCHIP tables on the same 20000 single-phase states
+    params = [["linear", "pchip"]]
+    param_names = ["interpolation"]
+
+    def setup(self, interpolation):
+        load()
+        self.ts = get_tables().replace(interpolation=interpolation)
+        rng = np.random.default_rng(0)
+        self.T, self.P = rng.uniform(20.0, 700.0, 20000), 10**rng.uniform(-1.9, 1.3, 20000)
+        self.h = thermo.Read_Tables_batch("water", T=self.T, P=self.P, tables=self.ts)["Enthalpy (kJ/kg)"]
+
+    def time_read_tables_batch(self, interpolation):
+        thermo.Read_Tables_batch("water", T=self.T, P=self.P, tables=self.ts)
+
+    def time_state_derivatives(self, interpolation):
+        thermo.state_derivatives("water", self.T, self.P, tables=self.ts)
+
+    def time_inverse_Ph(self, interpolation):
+        thermo.Read_Tables_Inverse_batch("water", P=self.P, h=self.h, tables=self.ts)
+
+
+class Saturation:
+    # Saturation line and phase labels without property rows, vs the full lookup
+    def setup(self):
+        load()
+        rng = np.random.default_rng(0)
+        self.T, self.P = rng.uniform(20.0, 700.0, 20000), 10**rng.uniform(-1.9, 1.6, 20000)
+
+    def time_tsat_scalar(self):
+        thermo.Tsat(1.7)
+
+    def time_tsat_batch(self):
+        thermo.Tsat(self.P)
+
+    def time_classify_phase_TP(self):
+        thermo.classify_phase(T=self.T, P=self.P)
+
+    def time_read_tables_batch_TP(self):
+        thermo.Read_Tables_batch("water", T=self.T, P=self.P)
+
+
+class Generalized:
+    # Lee-Kesler compressibility of a critical-table substance vs the water tables
+    def setup(self):
+        load()
+        rng = np.random.default_rng(0)
+        self.T, self.P = rng.uniform(-100.0, 400.0, 20000), 10**rng.uniform(-2.0, 1.3, 20000)
+        thermo.Read_Tables_batch("methane", T=25.0, P=1.0)
+
+    def time_methane_scalar(self):
+        thermo.Read_Tables("methane", T=25.0, P=5.0)
+
+    def time_methane_batch(self):
+        thermo.Read_Tables_batch("methane", T=self.T, P=self.P)
+
+    def time_water_batch(self):
+        thermo.Read_Tables_batch("water", T=self.T + 200.0, P=self.P)
+
+
+class StateStepping:
+    # One input changed per step, as in transient or iterative solvers: small
+    # steps stay in the superheated cell of the previous lookup
+    params = [0.01, 5.0]
+    param_names = ["dT"]
+
+    def setup(self, dT):
+        load()
+        self.st = thermo.State("water", 1.0, T=300.0, P=1.37)
+        self.st.h
+        self.steps = (300.0 + dT*np.arange(1, 2001)).tolist()
+
+    def time_set_T_2000_steps(self, dT):
+        st = self.st
+        for T in self.steps:
+            st.set_T(T)
+            st.h
+
+    def time_lookup_2000_steps(self, dT):
+        for T in self.steps:
+            tables._lookup("water", T=T, P=1.37)
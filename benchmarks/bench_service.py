@@ -0,0 +1,27 @@
+import asyncio
+import numpy as np
+from .common import load
+from thermoflow.service import PropertyService, Client
+
+# Property service through the in-process client: many concurrent small
+# requests, merged into few Read_Tables_batch calls (states per second is
+# clients*n / time)
+
+
+class Coalescing:
+    params = [[100], [10, 100]]
+    param_names = ["clients", "states"]
+
+    def setup(self, clients, states):
+        load()
+        rng = np.random.default_rng(0)
+        self.reqs = [[{"T": float(T), "P": float(P)} for T, P in zip(rng.uniform(20, 600, states), rng.uniform(0.01, 20, states))]
+                     for _ in range(clients)]
+
+    def time_requests(self, clients, states):
+        async def go():
+            svc = PropertyService()
+            client = Client(svc)
+            await asyncio.gather(*(client.states(q) for q in self.reqs))
+            svc.close()
+        asyncio.run(go())
@@ -0,0 +1,20 @@
+from .common import load, thermo
+from thermoflow.loader import load_tables
+
+# Worker startup: tables from the binary cache (set_tables compiles them and
+# builds the indices) vs attaching to tables published by another process
+
+
+class Startup:
+    def setup(self):
+        load()
+        self.pub = thermo.publish_tables()
+
+    def teardown(self):
+        self.pub.unlink()
+
+    def time_load_tables(self):
+        thermo.TableSet(*load_tables(verify=False)[0])
+
+    def time_attach_tables(self):
+        thermo.attach_tables(self.pub.path, register=False)
@@ -0,0 +1,31 @@
+from .common import load, thermo
+
+# Monte Carlo / Sobol throughput on one process (samples per second is n / time)
+
+
+class MonteCarlo:
+    params = [[100000]]
+    param_names = ["n"]
+
+    def setup(self, n):
+        load()
+        self.inputs = {"T": thermo.tolerance(300.0), "P": thermo.tolerance(2.0)}
+
+    def time_state(self, n):
+        thermo.monte_carlo(self.inputs, "state", n=n, seed=0, processes=1)
+
+    def time_state_sobol(self, n):
+        thermo.monte_carlo(self.inputs, "state", n=n//4, seed=0, sobol=True, processes=1)
+
+
+class CycleBatch:
+    params = [[10000]]
+    param_names = ["n"]
+
+    def setup(self, n):
+        load()
+        self.inputs = {"P_boiler": thermo.tolerance(8.0), "P_cond": thermo.tolerance(0.008),
+                       "T_boiler": thermo.tolerance(500.0), "eta_turbine": 0.85, "eta_pump": 0.85}
+
+    def time_rankine(self, n):
+        thermo.monte_carlo(self.inputs, "rankine", n=n, seed=0, processes=1)
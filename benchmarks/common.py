@@ -0,0 +1,80 @@
+import sys
+from pathlib import Path
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import thermoflow as thermo
+from thermoflow import tables
+
+_loaded = False
+
+def load():
+    # Tables from the binary cache, once per process
+    global _loaded
+    if not _loaded:
+        thermo.Load_Tables()
+        _loaded = True
+
+
+# One representative single-state call per Read_Tables branch
+CASES = {
+    "T_only":       dict(T=151.3),
+    "P_only":       dict(P=1.37),
+    "T_x":          dict(T=151.3, x=0.4),
+    "T_h":          dict(T=151.3, h=1500.0),
+    "T_u":          dict(T=151.3, u=1500.0),
+    "T_v":          dict(T=151.3, v=0.2),
+    "T_s":          dict(T=151.3, s=4.0),
+    "P_x":          dict(P=1.37, x=0.4),
+    "P_h":          dict(P=1.37, h=1500.0),
+    "TP_exact":     dict(T=200.0, P=1.0),
+    "TP_saturated": dict(T=179.88, P=1.0),
+    "TP_bilinear":  dict(T=233.3, P=1.7),
+    "TP_crossing":  dict(T=190.0, P=1.3),
+    "clamp_T_low":  dict(T=-20.0),
+    "clamp_P_high": dict(P=1e3),
+    "clamp_TP":     dict(T=5000.0, P=5e3),
+}
+
+
+def batch_cases(branch, n, seed=0):
+    # Arrays of n states for one branch, spread over the table range
+    rng = np.random.default_rng(seed)
+    T = rng.uniform(1.0, 370.0, n)
+    P = 10**rng.uniform(-2.5, 1.3, n)
+    if branch == "T_only":
+        return dict(T=T)
+    if branch == "P_only":
+        return dict(P=P)
+    if branch == "T_x":
+        return dict(T=T, x=rng.uniform(0, 1, n))
+    if branch == "T_h":
+        return dict(T=T, h=rng.uniform(100, 2700, n))
+    if branch == "P_s":
+        return dict(P=P, s=rng.uniform(0.5, 8.5, n))
+    if branch == "TP":
+        return dict(T=rng.uniform(0, 1200, n), P=10**rng.uniform(-2, 2.5, n))
+    raise KeyError(branch)
+
+BATCH_BRANCHES = ("T_only", "P_only", "T_x", "T_h", "P_s", "TP")
+
+
+def mixed_cases(n, seed=0):
+    # Deterministic mix of every branch, including out-of-range inputs
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n):
+        b = rng.integers(0, 9)
+        if b == 0: out.append(dict(T=float(rng.uniform(-5, 380))))
+        elif b == 1: out.append(dict(P=float(10**rng.uniform(-3.5, 1.5))))
+        elif b == 2: out.append(dict(T=float(rng.uniform(0, 374)), x=float(rng.uniform(-0.1, 1.1))))
+        elif b == 3: out.append({"P": float(10**rng.uniform(-3, 1.3)), str(rng.choice(list("hus"))): float(rng.uniform(0, 3000))})
+        elif b == 4: out.append(dict(T=float(rng.uniform(0, 374)), v=float(rng.uniform(0, 5))))
+        elif b == 5: out.append(dict(T=float(rng.uniform(-10, 2100)), P=float(10**rng.uniform(-2.2, 3.1))))
+        elif b == 6: out.append(dict(T=float(rng.choice([0, 50, 180, 250, 500, 2000])), P=float(rng.choice([0.01, 0.5, 1.0, 10.0, 25.0, 300.0]))))
+        elif b == 7: out.append(dict(P=float(rng.choice([0.5, 1.0, 5.0])), T=float(rng.uniform(100, 300))))
+        else: out.append(dict(T=float(rng.uniform(0, 374)), s=float(rng.uniform(0, 9))))
+    return out
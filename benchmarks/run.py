@@ -0,0 +1,123 @@
+import argparse
+import importlib
+import inspect
+import itertools
+import json
+import pkgutil
+import statistics
+import sys
+import time
+import timeit
+import tracemalloc
+from pathlib import Path
+
+# Minimal runner for the asv-style benchmarks in this package, so they can be
+# run without asv:
+#   python -m benchmarks.run [-k filter] [--repeat N] [--json FILE]
+# time_*    -> median / best seconds per call (and states/s when there is an n)
+# peakmem_* -> peak traced Python allocation of one call (tracemalloc)
+# track_*   -> the returned value
+
+_KINDS = ("time_", "peakmem_", "track_")
+
+
+def _param_sets(obj):
+    params = getattr(obj, "params", None)
+    if params is None:
+        return [()]
+    names = getattr(obj, "param_names", None) or ["param"]
+    if len(names) == 1:
+        params = [params[0]] if params and isinstance(params[0], (list, tuple)) else [params]
+    return list(itertools.product(*params))
+
+
+def _discover():
+    pkg = Path(__file__).resolve().parent
+    for info in pkgutil.iter_modules([str(pkg)]):
+        if not info.name.startswith("bench_"):
+            continue
+        mod = importlib.import_module(f"benchmarks.{info.name}")
+        for name, obj in vars(mod).items():
+            if getattr(obj, "__module__", None) != mod.__name__:
+                continue
+            if inspect.isfunction(obj) and name.startswith(_KINDS):
+                for p in _param_sets(obj):
+                    yield f"{info.name}.{name}", None, obj, p
+            elif inspect.isclass(obj):
+                for meth, fn in vars(obj).items():
+                    if callable(fn) and meth.startswith(_KINDS):
+                        for p in _param_sets(obj):
+                            yield f"{info.name}.{name}.{meth}", obj, meth, p
+
+
+def _measure(kind, call, repeat):
+    if kind == "time_":
+        timer = timeit.Timer(call)
+        number, _ = timer.autorange()
+        runs = [t / number for t in timer.repeat(repeat, number)]
+        return {"median_s": statistics.median(runs), "best_s": min(runs), "calls": number*repeat}
+    if kind == "peakmem_":
+        tracemalloc.start()
+        try:
+            call()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return {"peak_bytes": peak}
+    return {"value": call()}
+
+
+def run(pattern=None, repeat=5):
+    results = []
+    for name, cls, fn, params in _discover():
+        label = name + (f"({', '.join(map(str, params))})" if params else "")
+        if pattern and pattern not in label:
+            continue
+        kind = next(k for k in _KINDS if (fn if cls else fn.__name__).startswith(k))
+        inst = None
+        if cls is None:
+            call = (lambda f=fn, p=params: f(*p))
+        else:
+            inst = cls()
+            if hasattr(inst, "setup"):
+                inst.setup(*params)
+            call = (lambda m=getattr(inst, fn), p=params: m(*p))
+        try:
+            res = {"name": label, **_measure(kind, call, repeat)}
+        finally:
+            if hasattr(inst, "teardown"):
+                inst.teardown(*params)
+        names = getattr(cls, "param_names", []) if cls else []
+        if "n" in names and "median_s" in res:
+            res["states_per_s"] = params[names.index("n")] / res["median_s"]
+        results.append(res)
+        print(_format(res), flush=True)
+    return results
+
+
+def _format(res):
+    if "median_s" in res:
+        line = f"{res['median_s']*1e6:12.2f} us  (best {res['best_s']*1e6:.2f})"
+        if "states_per_s" in res:
+            line += f"  {res['states_per_s']:,.0f} states/s"
+    elif "peak_bytes" in res:
+        line = f"{res['peak_bytes']/2**20:12.2f} MiB peak"
+    else:
+        line = f"{res['value']!r:>12}"
+    return f"{res['name']:70s} {line}"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run the thermoflow benchmarks")
+    ap.add_argument("-k", dest="pattern", default=None, help="only benchmarks whose name contains this")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--json", type=Path, default=None, help="write results to this file")
+    args = ap.parse_args(argv)
+    results = run(args.pattern, args.repeat)
+    if args.json:
+        meta = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0]}
+        args.json.write_text(json.dumps({"meta": meta, "results": results}, indent=1), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,29 +4,118 @@ sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 import streamlit as st 
 import pandas as pd
+import altair as alt
 import thermoflow as thermo
-from thermoflow import tables
-
-def read_any(path):
-    for enc in ("utf-8", "utf-8-sig", "cp1252", "latin1"):
-        try:
-            return pd.read_csv(path, encoding=enc)
-        except UnicodeDecodeError:
-            continue
- 
-    return pd.read_csv(path, encoding="utf-8") 
+from thermoflow import instrument
 
 @st.cache_data
 def Load_Tables(base: str | Path = None):
-    base = Path(base) if base else Path(__file__).resolve().parents[1] / "thermoflow"
-
-    T  = read_any(base / "Tabla_Saturada_por_Temperatura.csv")
-    P  = read_any(base / "Saturated_by_Pressure.csv")
-    SC = read_any(base / "Cleaned_Filled_Compressed_Liquid_and_Superheated_Steam.csv")
-    I  = read_any(base / "Critical_Properties_Table__SI_.csv")
-    thermo.set_tables(T, P, SC, I)
-    return {"loaded_from": str(base)}
-    
+    # Parsing and the binary table cache live in thermoflow.loader
+    return thermo.Load_Tables(base)
+
+def Instrumentation_Panel():
+    # Sidebar view of thermoflow's lookup instrumentation
+    with st.sidebar:
+        st.markdown("Lookup instrumentation")
+        on = st.toggle("Record lookups", value=thermo.instrumentation_enabled(), key="instr_on")
+        if on:
+            thermo.enable_instrumentation()
+        else:
+            thermo.disable_instrumentation()
+        if st.button("Reset counters", key="instr_reset"):
+            thermo.instrumentation_clear()
+
+        info = thermo.instrumentation_info()
+        if not info["branches"]:
+            st.caption("No lookups recorded" + ("" if on else " (recording is off)"))
+            return
+        rows = [{"Path": name, "Calls": b["calls"], "Mean (µs)": b["mean_us"], "p50 (µs)": b["p50_us"], "p99 (µs)": b["p99_us"]}
+                for name, b in info["branches"].items()]
+        st.dataframe(pd.DataFrame(rows).set_index("Path"), use_container_width=True)
+
+        hist = pd.DataFrame({name: b["hist"] for name, b in info["branches"].items()}).fillna(0)
+        hist = hist.reindex([b for b in instrument.HIST_BUCKETS if b in hist.index])
+        st.caption("Latency histogram (calls per bucket)")
+        st.bar_chart(hist.T)
+
+        if info["clamps"]:
+            st.caption("Inputs clamped or extrapolated outside the tables")
+            st.dataframe(pd.DataFrame({"Events": info["clamps"]}), use_container_width=True)
+            last = info["recent_clamps"][-5:]
+            st.dataframe(pd.DataFrame(last, columns=["Event", "Input", "Table bound"]), use_container_width=True)
+
+@st.cache_data
+def Dome(tables_key: str, n: int = 300):
+    # Saturation dome, computed once per table set
+    return pd.DataFrame(thermo.saturation_dome(n))
+
+@st.cache_data
+def Sweep(line: str, fixed: float, start: float, stop: float, n: int, tables_key: str):
+    res = thermo.sweep_states(line, fixed, start, stop, n=n)
+    return pd.DataFrame(res)
+
+SWEEP_INPUTS = {
+    # line -> (fixed label, fixed default, range label, start, stop)
+    "isobar": ("Pressure (MPa)", 1.0, "Temperature (°C)", 20.0, 500.0),
+    "isotherm": ("Temperature (°C)", 200.0, "Pressure (MPa)", 0.01, 20.0),
+    "quality": ("Quality (x)", 0.5, "Temperature (°C)", 0.01, 370.0),
+}
+
+def Sweep_Tab(tables_key):
+    st.markdown("Property sweep")
+    line = st.selectbox("Hold constant", list(SWEEP_INPUTS), index=0, key="sweep_line")
+    fixed_label, fixed_default, range_label, lo, hi = SWEEP_INPUTS[line]
+    col_f, col_a, col_b = st.columns(3)
+    with col_f:
+        fixed = st.number_input(fixed_label, value=fixed_default, key=f"sweep_fixed_{line}")
+    with col_a:
+        start = st.number_input(f"{range_label} from", value=lo, key=f"sweep_start_{line}")
+    with col_b:
+        stop = st.number_input(f"{range_label} to", value=hi, key=f"sweep_stop_{line}")
+    n = st.slider("Points", min_value=100, max_value=5000, value=2000, step=100, key="sweep_n")
+
+    try:
+        df = Sweep(line, fixed, start, stop, n, tables_key)
+    except Exception as e:
+        st.error(f"Error: {e}")
+        return
+    if df.empty:
+        st.warning("No states found in that range")
+        return
+    dome = Dome(tables_key)
+    df = df.assign(phase=df["phase"].astype(str))
+
+    dome_Ts = pd.concat([
+        pd.DataFrame({"s": dome["sf"], "T": dome["T"], "order": range(len(dome))}),
+        pd.DataFrame({"s": dome["sg"][::-1].values, "T": dome["T"][::-1].values, "order": range(len(dome), 2*len(dome))}),
+    ])
+    dome_Pv = pd.concat([
+        pd.DataFrame({"v": dome["vf"], "P": dome["P"], "order": range(len(dome))}),
+        pd.DataFrame({"v": dome["vg"][::-1].values, "P": dome["P"][::-1].values, "order": range(len(dome), 2*len(dome))}),
+    ])
+    df = df.assign(order=range(len(df)))
+
+    col_Ts, col_Pv = st.columns(2)
+    with col_Ts:
+        st.caption("T–s diagram")
+        base = alt.Chart(dome_Ts).mark_line(color="#9e9e9e").encode(
+            x=alt.X("s:Q", title="s (kJ/(kg·K))"), y=alt.Y("T:Q", title="T (°C)"), order="order:Q")
+        path = alt.Chart(df).mark_line().encode(
+            x="s:Q", y="T:Q", order="order:Q", tooltip=["T", "P", "v", "h", "s", "x", "phase"])
+        st.altair_chart(base + path, use_container_width=True)
+    with col_Pv:
+        st.caption("P–v diagram")
+        base = alt.Chart(dome_Pv).mark_line(color="#9e9e9e").encode(
+            x=alt.X("v:Q", title="v (m³/kg)", scale=alt.Scale(type="log")),
+            y=alt.Y("P:Q", title="P (MPa)", scale=alt.Scale(type="log")), order="order:Q")
+        path = alt.Chart(df).mark_line().encode(
+            x="v:Q", y="P:Q", order="order:Q", tooltip=["T", "P", "v", "h", "s", "x", "phase"])
+        st.altair_chart(base + path, use_container_width=True)
+
+    with st.expander(f"Sweep data ({len(df)} states)"):
+        st.dataframe(df.drop(columns="order"), use_container_width=True)
+        st.download_button("Download CSV", df.drop(columns="order").to_csv(index=False), file_name=f"sweep_{line}.csv", mime="text/csv")
+
 def main():
     st.title("ThermoHub.Sim (V1.0)")
    
@@ -36,7 +125,11 @@ def main():
     meta = Load_Tables()
     st.caption(f"Tables loaded from: `{meta['loaded_from']}`")
 
-    with st.container():
+    tab_state, tab_sweep = st.tabs(["State properties", "Sweep & diagrams"])
+    with tab_sweep:
+        Sweep_Tab(meta["cache"] or meta["loaded_from"])
+
+    with tab_state:
         st.markdown("State Properties")
         
         st.session_state["mi_key"] = None
@@ -119,5 +212,7 @@ def main():
             "- Many future versions are planned, however, the next version will include cycles and it's related calculations; such as: work, heat transfer, etc.\n"
         )
 
+    Instrumentation_Panel()
+
 if __name__ == "__main__":
     main()
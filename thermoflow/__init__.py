@@ -1,4 +1,17 @@
-from .state import State
+from .state import State, StateArray
+from .sweep import sweep_states, saturation_dome
+from .saturation import Tsat, Psat, classify_phase
+from .generalized import gas_properties, critical_constants, substances
+from .cycles import rankine_cycle, vapor_compression_cycle, parametric_study
+from .cycles import rankine_cycle_batch, vapor_compression_cycle_batch
+from .uncertainty import monte_carlo, monte_carlo_iter, tolerance
 from .tables import set_tables
-from .tables import Read_Tables
+from .tableset import TableSet, register_tables, unregister_tables, get_tables, use_tables, current_tables, fluids
+from .shared import publish_tables, attach_tables
+from .loader import Load_Tables, load_tables
+from .tables import enable_cache, disable_cache, cache_info, cache_clear
+from .tables import Read_Tables, Read_Tables_batch, state_derivatives
+from .inverse import Read_Tables_Inverse, Read_Tables_Inverse_batch
+from .instrument import enable_instrumentation, disable_instrumentation, instrumentation_enabled
+from .instrument import instrumentation_info, instrumentation_clear
 from .utils import Quality_Equation, _get_if_present
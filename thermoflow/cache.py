@@ -0,0 +1,74 @@
+from collections import OrderedDict, namedtuple
+from threading import Lock
+import math
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "evictions", "invalidations", "maxsize", "currsize"])
+
+
+def _canon(val, digits=None):
+    # Key form of one input: float, -0.0 folded into 0.0, optionally rounded to
+    # `digits` significant figures so nearby queries share an entry
+    if val is None:
+        return None
+    val = float(val) + 0.0
+    if digits is not None and val != 0.0 and math.isfinite(val):
+        val = round(val, digits - 1 - int(math.floor(math.log10(abs(val)))))
+    return val
+
+
+class LookupCache:
+    # LRU cache of single-state lookups, keyed on the canonical inputs.
+    # Values are stored as given and shared between hits.
+    def __init__(self, maxsize=1024, digits=None):
+        if maxsize is None or int(maxsize) < 1:
+            raise ValueError("Cache size must be a positive integer")
+        if digits is not None and int(digits) < 1:
+            raise ValueError("Quantisation needs at least 1 significant digit")
+        self.maxsize = int(maxsize)
+        self.digits = None if digits is None else int(digits)
+        self._store = OrderedDict()
+        self._lock = Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def key(self, Material, T=None, P=None, x=None, v=None, u=None, h=None, s=None):
+        d = self.digits
+        return ((Material or "").strip().lower(),) + tuple(_canon(val, d) for val in (T, P, x, v, u, h, s))
+
+    def get(self, key):
+        with self._lock:
+            val = self._store.get(key)
+            if val is None:
+                self.misses += 1
+                return None
+            self._store.move_to_end(key)
+            self.hits += 1
+            return val
+
+    def put(self, key, val):
+        with self._lock:
+            self._store[key] = val
+            self._store.move_to_end(key)
+            while len(self._store) > self.maxsize:
+                self._store.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        # Tables changed: every entry is stale, counters are kept
+        with self._lock:
+            if self._store:
+                self.invalidations += 1
+            self._store.clear()
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.evictions, self.invalidations, self.maxsize, len(self._store))
+
+    def __len__(self):
+        return len(self._store)
+
+    def __repr__(self):
+        return f"LookupCache(maxsize={self.maxsize}, digits={self.digits}, size={len(self)})"
@@ -0,0 +1,347 @@
+from bisect import bisect_left
+import numpy as np
+from . import instrument as _instrument
+
+
+def _to_float(values):
+    # Same idea as pd.to_numeric(errors="coerce"): anything unparsable becomes NaN
+    arr = np.asarray(values)
+    if arr.dtype.kind in "fiub":
+        return arr.astype(np.float64)
+    out = np.empty(len(arr), dtype=np.float64)
+    for i, val in enumerate(arr):
+        try:
+            out[i] = float(val)
+        except (TypeError, ValueError):
+            out[i] = np.nan
+    return out
+
+
+def _columns_of(table):
+    # Accepts a DataFrame or any mapping of column -> sequence
+    if hasattr(table, "columns") and hasattr(table, "to_numpy"):
+        return {str(col): table[col].to_numpy() for col in table.columns}
+    return {str(col): np.asarray(vals) for col, vals in dict(table).items()}
+
+
+class CompiledTable:
+    # Immutable, pre-sorted copy of one property table.
+    #   data    -> float64 array (n_numeric, n_rows), each column contiguous
+    #   col     -> column name -> row of `data`
+    #   labels  -> non-numeric columns (e.g. 'Phase') as object arrays
+    #   keys    -> the sort key column; keylist is the same as a list for bisect
+    __slots__ = ("key", "numeric", "col", "data", "labels", "keys", "keylist", "columns")
+
+    def __init__(self, key, numeric, data, labels=None):
+        data = np.ascontiguousarray(data, dtype=np.float64)
+        data.flags.writeable = False
+        labels = dict(labels or {})
+        for arr in labels.values():
+            arr.flags.writeable = False
+        numeric = tuple(numeric)
+        col = {name: i for i, name in enumerate(numeric)}
+        if key not in col:
+            raise ValueError(f"Table not found: {key}")
+        keys = data[col[key]]
+        object.__setattr__(self, "key", key)
+        object.__setattr__(self, "numeric", numeric)
+        object.__setattr__(self, "col", col)
+        object.__setattr__(self, "data", data)
+        object.__setattr__(self, "labels", labels)
+        object.__setattr__(self, "keys", keys)
+        object.__setattr__(self, "keylist", keys.tolist())
+        object.__setattr__(self, "columns", numeric + tuple(labels))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledTable is read-only")
+
+    def __len__(self):
+        return self.data.shape[1]
+
+    def __repr__(self):
+        return f"CompiledTable(key={self.key!r}, rows={len(self)}, columns={len(self.columns)})"
+
+    def column(self, name):
+        if name in self.col:
+            return self.data[self.col[name]]
+        return self.labels[name]
+
+    def row(self, i):
+        out = dict(zip(self.numeric, self.data[:, i].tolist()))
+        for name, arr in self.labels.items():
+            out[name] = arr[i]
+        return out
+
+    def to_dict(self):
+        out = {name: self.data[i] for i, name in enumerate(self.numeric)}
+        out.update(self.labels)
+        return out
+
+
+def compile_table(table, key, by=()):
+    # Sorts once by (*by, key), drops rows whose sort keys are missing and
+    # splits numeric columns from label columns
+    if isinstance(table, CompiledTable):
+        return table
+    cols = _columns_of(table)
+    if key not in cols:
+        raise ValueError(f"Table not found: {key}")
+    sort_cols = list(by) + [key]
+    for name in sort_cols:
+        cols[name] = _to_float(cols[name])
+
+    keep = np.ones(len(cols[key]), dtype=bool)
+    for name in sort_cols:
+        keep &= ~np.isnan(cols[name])
+    order = np.lexsort([cols[name][keep] for name in reversed(sort_cols)])
+
+    numeric, data, labels = [], [], {}
+    for name, vals in cols.items():
+        vals = vals[keep][order]
+        if vals.dtype.kind in "fiub":
+            numeric.append(name)
+            data.append(vals.astype(np.float64))
+        else:
+            labels[name] = vals.astype(object)
+    return CompiledTable(key, numeric, np.vstack(data) if data else np.empty((0, 0)), labels)
+
+
+_VAPOR_SIDE = ("saturated vapor", "vapor")
+
+class IsobarIndex:
+    # Built once for the superheated/compressed table (sorted by P, then T).
+    #   levels        -> distinct pressures
+    #   starts, ends  -> row slice of each isobar
+    #   T_min, T_max  -> temperature range covered by each isobar
+    #   T_sat, split  -> saturation temperature of the isobar and first row on
+    #                    its vapor side (NaN / end when the isobar has no dome)
+    __slots__ = ("table", "levels", "levellist", "starts", "ends", "T_min", "T_max", "T_sat", "split")
+
+    def __init__(self, table, pcol="P (MPa)"):
+        P = table.column(pcol)
+        levels, starts = np.unique(P, return_index=True)
+        ends = np.append(starts[1:], len(P))
+        Tk = table.keys
+        phase = table.labels.get("Phase")
+
+        split = ends.copy()
+        for k, (a, b) in enumerate(zip(starts, ends)):
+            if phase is not None:
+                vap = np.flatnonzero(np.isin(phase[a:b], _VAPOR_SIDE))
+                if len(vap) and vap[0] > 0:
+                    split[k] = a + vap[0]
+            else:
+                dup = np.flatnonzero(np.diff(Tk[a:b]) == 0)
+                if len(dup):
+                    split[k] = a + dup[0] + 1
+        T_sat = np.where(split < ends, Tk[np.minimum(split, len(Tk) - 1)], np.nan)
+
+        for arr in (levels, starts, ends, split, T_sat):
+            arr.flags.writeable = False
+        object.__setattr__(self, "table", table)
+        object.__setattr__(self, "levels", levels)
+        object.__setattr__(self, "levellist", levels.tolist())
+        object.__setattr__(self, "starts", starts)
+        object.__setattr__(self, "ends", ends)
+        object.__setattr__(self, "T_min", Tk[starts].copy())
+        object.__setattr__(self, "T_max", Tk[ends - 1].copy())
+        object.__setattr__(self, "T_sat", T_sat)
+        object.__setattr__(self, "split", split)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("IsobarIndex is read-only")
+
+    def __len__(self):
+        return len(self.levels)
+
+    def slice(self, k):
+        return int(self.starts[k]), int(self.ends[k])
+
+    def bracket(self, P):
+        # (k_lo, k_hi, wP) with the clamping rules of the original bilinear lookup
+        Ps = self.levellist
+        if P <= Ps[0]:
+            if _instrument.enabled and P < Ps[0]:
+                _instrument.clamp("P (MPa) below isobars", P, Ps[0])
+            return 0, 0, 0.0
+        if P >= Ps[-1]:
+            if _instrument.enabled and P > Ps[-1]:
+                _instrument.clamp("P (MPa) above isobars", P, Ps[-1])
+            return len(Ps) - 1, len(Ps) - 1, 0.0
+        k = bisect_left(Ps, P)
+        return k - 1, k, (P - Ps[k-1]) / (Ps[k] - Ps[k-1])
+
+    def bracket_many(self, P):
+        Ps = self.levels
+        k = np.searchsorted(Ps, P, side="left")
+        k_lo = np.maximum(k - 1, 0)
+        k_hi = np.minimum(k, len(Ps) - 1)
+        below, above = P <= Ps[0], P >= Ps[-1]
+        if _instrument.enabled:
+            for side, out, bound in (("below", P < Ps[0], Ps[0]), ("above", P > Ps[-1], Ps[-1])):
+                if out.any():
+                    _instrument.clamp(f"P (MPa) {side} isobars", P[out][0], bound, int(out.sum()))
+        k_lo[below] = k_hi[below] = 0
+        k_lo[above] = k_hi[above] = len(Ps) - 1
+        same = k_lo == k_hi
+        wP = np.where(same, 0.0, (P - Ps[k_lo]) / np.where(same, 1.0, Ps[k_hi] - Ps[k_lo]))
+        return k_lo, k_hi, wP
+
+    def side(self, k, T):
+        # -1 liquid side of the dome, +1 vapor side, 0 isobar without a dome
+        Ts = self.T_sat[k]
+        if Ts != Ts:
+            return 0
+        return -1 if T <= Ts else 1
+
+    def side_many(self, k, T):
+        Ts = self.T_sat[k]
+        return np.where(np.isnan(Ts), 0, np.where(T <= Ts, -1, 1))
+
+    def crossing(self, k_lo, k_hi, T):
+        # True when the two isobars sit on opposite sides of the dome at T
+        s_lo, s_hi = self.side(k_lo, T), self.side(k_hi, T)
+        return s_lo != 0 and s_hi != 0 and s_lo != s_hi
+
+    def branch_end(self, k, liquid):
+        # Two rows used to extend one branch of an isobar past its saturation
+        # point: the last two liquid rows, or the first vapor row and the next
+        # one at least 1 K away (the row right after it can be very close)
+        a, b, sp = int(self.starts[k]), int(self.ends[k]), int(self.split[k])
+        if liquid:
+            return max(sp - 2, a), sp - 1
+        keys = self.table.keylist
+        j = min(sp + 1, b - 1)
+        if keys[j] - keys[sp] < 1.0 and j + 1 < b:
+            j += 1
+        return sp, j
+
+    def branch_end_many(self, k, liquid):
+        a, b, sp = self.starts[k], self.ends[k], self.split[k]
+        if liquid:
+            return np.maximum(sp - 2, a), sp - 1
+        keys = self.table.keys
+        j = np.minimum(sp + 1, b - 1)
+        bump = (keys[j] - keys[np.minimum(sp, len(keys) - 1)] < 1.0) & (j + 1 < b)
+        return sp, j + bump
+
+    def exact(self, T, P):
+        # Row matching (T, P) within np.isclose(table, query) tolerances, -1 if none
+        tolP = 1e-12 + 1e-5*abs(P)
+        k = bisect_left(self.levellist, P - tolP)
+        if k == len(self.levellist) or self.levellist[k] > P + tolP:
+            return -1
+        a, b = self.slice(k)
+        tolT = 1e-9 + 1e-5*abs(T)
+        j = bisect_left(self.table.keylist, T - tolT, a, b)
+        if j < b and self.table.keylist[j] <= T + tolT:
+            return j
+        return -1
+
+    def exact_many(self, T, P):
+        Ts, levels = self.table.keys, self.levels
+        hit = np.full(len(T), -1, dtype=np.intp)
+        tolP = 1e-12 + 1e-5*np.abs(P)
+        tolT = 1e-9 + 1e-5*np.abs(T)
+        k = np.searchsorted(levels, P - tolP, side="left")
+        matched = (k < len(levels)) & (levels[np.minimum(k, len(levels) - 1)] <= P + tolP)
+        for lvl in np.unique(k[matched]):
+            sel = np.flatnonzero(matched & (k == lvl))
+            a, b = self.slice(lvl)
+            j = a + np.searchsorted(Ts[a:b], T[sel] - tolT[sel], side="left")
+            ok = (j < b) & (Ts[np.minimum(j, b - 1)] <= T[sel] + tolT[sel])
+            hit[sel[ok]] = j[ok]
+        return hit
+
+
+class InverseIndex:
+    # Per-isobar monotone view of one property of the superheated table, so a
+    # state can be found from (P, prop) with the same bisection as (P, T).
+    #   rows          -> table rows kept, isobar by isobar in T order; rows that
+    #                    would break monotonicity (bad leading rows of the very
+    #                    high pressure isobars) are left out
+    #   keys          -> property value at those rows, non-decreasing per isobar
+    #   starts, ends  -> slice of each isobar inside rows/keys
+    #   split         -> first vapor-side position of each isobar (end if no dome)
+    __slots__ = ("prop", "rows", "keys", "keylist", "starts", "ends", "split")
+
+    def __init__(self, table, index, prop):
+        vals = table.column(prop)
+        rows, starts, ends, split = [], [], [], []
+        for k in range(len(index)):
+            a, b = index.slice(k)
+            seg = vals[a:b]
+            suffix_min = np.minimum.accumulate(seg[::-1])[::-1]
+            keep = a + np.flatnonzero(seg <= suffix_min)
+            starts.append(sum(len(r) for r in rows))
+            split.append(starts[-1] + int(np.searchsorted(keep, index.split[k])))
+            rows.append(keep)
+            ends.append(starts[-1] + len(keep))
+        rows = np.concatenate(rows).astype(np.intp)
+        keys = vals[rows].copy()
+        starts, ends, split = (np.asarray(a, dtype=np.intp) for a in (starts, ends, split))
+        for arr in (rows, keys, starts, ends, split):
+            arr.flags.writeable = False
+        object.__setattr__(self, "prop", prop)
+        object.__setattr__(self, "rows", rows)
+        object.__setattr__(self, "keys", keys)
+        object.__setattr__(self, "keylist", keys.tolist())
+        object.__setattr__(self, "starts", starts)
+        object.__setattr__(self, "ends", ends)
+        object.__setattr__(self, "split", split)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("InverseIndex is read-only")
+
+
+def _pchip_end(h0, h1, d0, d1):
+    # Three-point end slope, kept shape preserving (as scipy's pchip)
+    d = ((2*h0 + h1)*d0 - h0*d1) / (h0 + h1)
+    d = np.where(np.sign(d) != np.sign(d0), 0.0, d)
+    return np.where((np.sign(d0) != np.sign(d1)) & (np.abs(d) > 3*np.abs(d0)), 3*d0, d)
+
+
+def pchip_slopes(x, Y, breaks=()):
+    # Slopes dY/dx at every node of a monotone (Fritsch-Carlson) cubic Hermite
+    # interpolant of each row of Y, computed once per table. Pieces end at
+    # `breaks` (first row of a new piece) and at zero-width steps; a piece of
+    # two rows stays linear, a single row gets slope 0.
+    x = np.asarray(x, dtype=np.float64)
+    Y = np.asarray(Y, dtype=np.float64)
+    n = len(x)
+    S = np.zeros(Y.shape)
+    if n < 2:
+        return S
+    h = np.diff(x)
+    ok = h > 0
+    b = np.asarray(breaks, dtype=np.intp)
+    ok[b[(b > 0) & (b < n)] - 1] = False
+    hs = np.where(ok, h, 1.0)
+    D = np.where(ok, np.diff(Y, axis=1) / hs, 0.0)
+    left = np.r_[False, ok]
+    right = np.r_[ok, False]
+
+    i = np.flatnonzero(left & right)
+    h0, h1, d0, d1 = hs[i - 1], hs[i], D[:, i - 1], D[:, i]
+    w1, w2 = 2*h1 + h0, h1 + 2*h0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        S[:, i] = np.where(d0*d1 > 0, (w1 + w2) / (w1/d0 + w2/d1), 0.0)
+
+        i = np.flatnonzero(right & ~left)
+        j = np.minimum(i + 1, n - 2)
+        three = right[i + 1]
+        S[:, i] = np.where(three, _pchip_end(hs[i], hs[j], D[:, i], D[:, j]), D[:, i])
+
+        i = np.flatnonzero(left & ~right)
+        j = np.maximum(i - 2, 0)
+        three = left[i - 1]
+        S[:, i] = np.where(three, _pchip_end(hs[i - 1], hs[j], D[:, i - 1], D[:, j]), D[:, i - 1])
+    S[~np.isfinite(S)] = 0.0
+    S.flags.writeable = False
+    return S
+
+
+def isobar_slopes(table, index):
+    # pchip_slopes along T on every isobar, liquid and vapor branches apart
+    breaks = np.concatenate([index.starts, index.split[index.split < index.ends]])
+    return pchip_slopes(table.keys, table.data, breaks)
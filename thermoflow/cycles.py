@@ -0,0 +1,311 @@
+import math
+import os
+from itertools import product
+import numpy as np
+from .state import State
+from .tables import Read_Tables_batch
+from .tableset import current_tables, fluids
+from .inverse import _ph_one, Read_Tables_Inverse_batch
+
+# Steady-flow cycles on water, built from State objects: the Rankine power
+# cycle and the vapor-compression refrigeration / heat-pump cycle. Specific
+# quantities are in kJ/kg; multiplied by the mass flow m (kg/s) they are kW.
+
+CYCLES = ('rankine', 'vapor_compression')
+
+
+def _check_eta(name, eta):
+    if not 0.0 < eta <= 1.0:
+        raise ValueError(f"{name} must be in (0, 1]")
+    return float(eta)
+
+
+def _state_from(P, prop, val, m):
+    # State at pressure P with a given h or s. The inverse lookup finds T, or
+    # x inside the dome, and the State resolves from (T, P) or (P, x) like any
+    # other, so it shows the same columns as a direct lookup. Single-phase
+    # states within the saturation tolerance of Tsat resolve to the
+    # saturation table; they are taken as the saturated end of their side.
+    row = _ph_one(current_tables('water'), float(P), float(val), prop)
+    T, x = row.get('T (°C)'), row.get('x')
+    if T is None or math.isnan(T):
+        raise ValueError(f"No state found at P = {P} MPa, {prop} = {val}")
+    if x is None or math.isnan(x):
+        st = State('water', m, T=float(T), P=float(P))
+        if st.h is None:
+            st = State('water', m, P=float(P), x=0.0 if row.get('Phase') == 'liquid' else 1.0)
+    else:
+        st = State('water', m, P=float(P), x=float(x))
+    return st
+
+
+def _saturated(P, x, m):
+    st = State('water', m, P=float(P), x=x)
+    if st.h is None:
+        raise ValueError(f"No saturation data at P = {P} MPa")
+    return st
+
+
+# Turbine inlet phases accepted for a given T_boiler
+_TURBINE_INLET = ('vapor', 'supercritical fluid')
+
+
+def rankine_cycle(P_boiler, P_cond, T_boiler=None, eta_turbine=1.0, eta_pump=1.0, m=1.0):
+    # Simple Rankine cycle, states numbered 1 pump inlet (saturated liquid at
+    # P_cond), 2 pump exit, 3 turbine inlet (saturated vapor at P_boiler, or
+    # superheated to T_boiler), 4 turbine exit. eta_* = 1 is the ideal cycle.
+    P_boiler, P_cond = float(P_boiler), float(P_cond)
+    if not 0.0 < P_cond < P_boiler:
+        raise ValueError("Condenser pressure must be positive and below the boiler pressure")
+    eta_turbine = _check_eta("Turbine efficiency", eta_turbine)
+    eta_pump = _check_eta("Pump efficiency", eta_pump)
+
+    s1 = _saturated(P_cond, 0.0, m)
+    # Incompressible pump work, v dP with P in MPa -> kJ/kg
+    w_pump = s1.v*(P_boiler - P_cond)*1000.0/eta_pump
+    s2 = _state_from(P_boiler, 'h', s1.h + w_pump, m)
+
+    if T_boiler is None or math.isnan(float(T_boiler)):
+        s3 = _saturated(P_boiler, 1.0, m)
+    else:
+        s3 = State('water', m, T=float(T_boiler), P=P_boiler)
+        if s3.phase not in _TURBINE_INLET or s3.h is None:
+            raise ValueError(f"Turbine inlet at {T_boiler} °C and {P_boiler} MPa is not superheated vapor or supercritical fluid")
+
+    h4s = _state_from(P_cond, 's', s3.s, m).h
+    s4 = _state_from(P_cond, 'h', s3.h - eta_turbine*(s3.h - h4s), m)
+
+    w_turbine = s3.h - s4.h
+    q_in = s3.h - s2.h
+    q_out = s4.h - s1.h
+    w_net = w_turbine - w_pump
+    return {
+        'states': {1: s1, 2: s2, 3: s3, 4: s4},
+        'w_turbine': w_turbine,
+        'w_pump': w_pump,
+        'w_net': w_net,
+        'q_in': q_in,
+        'q_out': q_out,
+        'efficiency': w_net/q_in,
+        'back_work_ratio': w_pump/w_turbine,
+        'x_turbine_exit': s4.x,
+        'W_net': m*w_net,
+        'Q_in': m*q_in,
+        'Q_out': m*q_out,
+    }
+
+
+def vapor_compression_cycle(P_evap, P_cond, eta_compressor=1.0, m=1.0):
+    # Vapor-compression cycle, states numbered 1 compressor inlet (saturated
+    # vapor at P_evap), 2 compressor exit, 3 condenser exit (saturated liquid
+    # at P_cond), 4 after the throttle valve (h4 = h3).
+    P_evap, P_cond = float(P_evap), float(P_cond)
+    if not 0.0 < P_evap < P_cond:
+        raise ValueError("Evaporator pressure must be positive and below the condenser pressure")
+    eta_compressor = _check_eta("Compressor efficiency", eta_compressor)
+
+    s1 = _saturated(P_evap, 1.0, m)
+    h2s = _state_from(P_cond, 's', s1.s, m).h
+    s2 = _state_from(P_cond, 'h', s1.h + (h2s - s1.h)/eta_compressor, m)
+    s3 = _saturated(P_cond, 0.0, m)
+    s4 = _state_from(P_evap, 'h', s3.h, m)
+
+    w_in = s2.h - s1.h
+    q_L = s1.h - s4.h
+    q_H = s2.h - s3.h
+    return {
+        'states': {1: s1, 2: s2, 3: s3, 4: s4},
+        'w_in': w_in,
+        'q_L': q_L,
+        'q_H': q_H,
+        'COP_R': q_L/w_in,
+        'COP_HP': q_H/w_in,
+        'x_evaporator_inlet': s4.x,
+        'W_in': m*w_in,
+        'Q_L': m*q_L,
+        'Q_H': m*q_H,
+    }
+
+
+_SOLVERS = {'rankine': rankine_cycle, 'vapor_compression': vapor_compression_cycle}
+
+
+# Vectorized forms: inputs broadcast against each other, results are dicts of
+# arrays with the scalar keys (no states). Cases the scalar solvers reject
+# come out as NaN.
+
+def _eta_many(eta, n):
+    eta = np.broadcast_to(np.asarray(eta, dtype=float), (n,))
+    return np.where((eta > 0.0) & (eta <= 1.0), eta, np.nan)
+
+def _pressures(lo, hi, n):
+    # Rows without 0 < lo < hi are solved at a dummy pair and blanked after,
+    # since the table lookups need a pressure on every row
+    lo = np.broadcast_to(np.asarray(lo, dtype=float), (n,))
+    hi = np.broadcast_to(np.asarray(hi, dtype=float), (n,))
+    ok = (lo > 0.0) & (lo < hi)
+    return np.where(ok, lo, 0.01), np.where(ok, hi, 1.0), ok
+
+def _blank(out, ok):
+    return {k: np.where(ok, v, np.nan) for k, v in out.items()}
+
+
+def rankine_cycle_batch(P_boiler, P_cond, T_boiler=None, eta_turbine=1.0, eta_pump=1.0, m=1.0):
+    args = [P_boiler, P_cond, eta_turbine, eta_pump, m] + ([] if T_boiler is None else [T_boiler])
+    n = np.broadcast(*[np.asarray(a, dtype=float) for a in args]).size
+    Pc, Pb, ok = _pressures(P_cond, P_boiler, n)
+    eta_turbine, eta_pump = _eta_many(eta_turbine, n), _eta_many(eta_pump, n)
+    ok &= ~np.isnan(eta_turbine) & ~np.isnan(eta_pump)
+    m = np.broadcast_to(np.asarray(m, dtype=float), (n,))
+
+    sat1 = Read_Tables_batch('water', P=Pc, x=0.0)
+    h1 = sat1['Enthalpy (kJ/kg)']
+    w_pump = sat1['Specific Volume (m^3/kg)']*(Pb - Pc)*1000.0/eta_pump
+    h2 = h1 + w_pump
+
+    # Saturated vapor at P_boiler, replaced where a T_boiler is given (NaN
+    # rows stay saturated, as in the scalar form)
+    s3 = Read_Tables_batch('water', P=Pb, x=1.0)
+    h3 = np.array(s3['Enthalpy (kJ/kg)'], dtype=float)
+    ent3 = np.array(s3['Entropy [kJ/(kg K)]'], dtype=float)
+    if T_boiler is not None:
+        Tb = np.broadcast_to(np.asarray(T_boiler, dtype=float), (n,))
+        sup = np.flatnonzero(~np.isnan(Tb))
+        if len(sup):
+            s3 = Read_Tables_batch('water', T=Tb[sup], P=Pb[sup])
+            inlet = np.isin(np.asarray(s3['Phase'], dtype=object), _TURBINE_INLET)
+            h3[sup] = np.where(inlet, s3['Enthalpy (kJ/kg)'], np.nan)
+            ent3[sup] = np.where(inlet, s3['Entropy [kJ/(kg K)]'], np.nan)
+
+    h4s = Read_Tables_Inverse_batch('water', P=Pc, s=ent3)['Enthalpy (kJ/kg)']
+    h4 = h3 - eta_turbine*(h3 - h4s)
+    x4 = Read_Tables_Inverse_batch('water', P=Pc, h=h4)['x']
+
+    w_turbine = h3 - h4
+    q_in = h3 - h2
+    q_out = h4 - h1
+    w_net = w_turbine - w_pump
+    return _blank({
+        'w_turbine': w_turbine,
+        'w_pump': w_pump,
+        'w_net': w_net,
+        'q_in': q_in,
+        'q_out': q_out,
+        'efficiency': w_net/q_in,
+        'back_work_ratio': w_pump/w_turbine,
+        'x_turbine_exit': x4,
+        'W_net': m*w_net,
+        'Q_in': m*q_in,
+        'Q_out': m*q_out,
+    }, ok)
+
+
+def vapor_compression_cycle_batch(P_evap, P_cond, eta_compressor=1.0, m=1.0):
+    n = np.broadcast(*[np.asarray(a, dtype=float) for a in (P_evap, P_cond, eta_compressor, m)]).size
+    Pe, Pc, ok = _pressures(P_evap, P_cond, n)
+    eta_compressor = _eta_many(eta_compressor, n)
+    ok &= ~np.isnan(eta_compressor)
+    m = np.broadcast_to(np.asarray(m, dtype=float), (n,))
+
+    sat1 = Read_Tables_batch('water', P=Pe, x=1.0)
+    h1 = sat1['Enthalpy (kJ/kg)']
+    h2s = Read_Tables_Inverse_batch('water', P=Pc, s=sat1['Entropy [kJ/(kg K)]'])['Enthalpy (kJ/kg)']
+    h2 = h1 + (h2s - h1)/eta_compressor
+    h3 = Read_Tables_batch('water', P=Pc, x=0.0)['Enthalpy (kJ/kg)']
+    x4 = Read_Tables_Inverse_batch('water', P=Pe, h=h3)['x']
+
+    w_in = h2 - h1
+    q_L = h1 - h3
+    q_H = h2 - h3
+    return _blank({
+        'w_in': w_in,
+        'q_L': q_L,
+        'q_H': q_H,
+        'COP_R': q_L/w_in,
+        'COP_HP': q_H/w_in,
+        'x_evaporator_inlet': x4,
+        'W_in': m*w_in,
+        'Q_L': m*q_L,
+        'Q_H': m*q_H,
+    }, ok)
+
+
+# Parametric studies: every combination of the grid values is solved, spread
+# over a process pool in chunks, and each case is yielded as soon as its chunk
+# finishes (so not in grid order; 'case' is the grid index). Only scalar
+# results travel back, the State objects stay in the worker.
+
+def _init_worker(base, shared=None):
+    # Forked workers inherit the parent's tables; spawned ones attach to the
+    # published ones (shared=True) or load their own
+    if shared is not None:
+        from .shared import attach_tables
+        attach_tables(shared)
+    elif base is not None or 'water' not in fluids():
+        from .loader import Load_Tables
+        Load_Tables(base)
+
+
+def _publish(base, shared):
+    # Context for a pool's lifetime: the parent's water tables published for
+    # the workers to attach, when asked for and no table directory is given
+    if shared and base is None:
+        from .shared import publish_tables
+        return publish_tables()
+    from contextlib import nullcontext
+    return nullcontext()
+
+
+def _solve_chunk(cycle, cases):
+    solver = _SOLVERS[cycle]
+    out = []
+    for i, kwargs in cases:
+        res = {'case': i, **kwargs}
+        try:
+            r = solver(**kwargs)
+            res.update((k, v) for k, v in r.items() if k != 'states')
+            res['error'] = None
+        except ValueError as e:
+            res['error'] = str(e)
+        out.append(res)
+    return out
+
+
+def parametric_study(cycle='rankine', grid=None, processes=None, chunksize=None, base=None, shared=False, **fixed):
+    # grid: parameter name -> sequence of values, e.g.
+    #   parametric_study('rankine', {'P_boiler': [...], 'P_cond': [...], 'eta_turbine': [...]}, T_boiler=500)
+    # Cases that cannot be solved come back with 'error' set instead of raising.
+    # processes=1 solves in this process; base is the table directory workers
+    # load when they do not inherit the parent's tables; shared=True has them
+    # attach to the parent's tables instead (see shared.py).
+    if cycle not in _SOLVERS:
+        raise ValueError(f"Cycle must be one of {CYCLES}")
+    grid = dict(grid or {})
+    names = list(grid)
+    cases = [(i, {**fixed, **dict(zip(names, vals))})
+             for i, vals in enumerate(product(*(list(grid[k]) for k in names)))]
+    if not cases:
+        return
+
+    processes = (os.cpu_count() or 1) if processes is None else int(processes)
+    if chunksize is None:
+        # A few chunks per worker keeps them busy without a round trip per case
+        chunksize = max(1, min(256, len(cases)//(4*processes) or 1))
+    chunks = [cases[i:i + chunksize] for i in range(0, len(cases), chunksize)]
+
+    if processes <= 1 or len(chunks) == 1:
+        for chunk in chunks:
+            yield from _solve_chunk(cycle, chunk)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    with _publish(base, shared) as pub, \
+            ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                initargs=(base, getattr(pub, 'path', None))) as pool:
+        futures = [pool.submit(_solve_chunk, cycle, chunk) for chunk in chunks]
+        try:
+            for fut in as_completed(futures):
+                yield from fut.result()
+        finally:
+            for fut in futures:
+                fut.cancel()
@@ -0,0 +1,266 @@
+from bisect import bisect_left
+from math import exp, log, nan
+from threading import Lock
+import weakref
+import numpy as np
+from .tableset import current_tables
+
+# Generalized-compressibility properties for the substances of the
+# critical-properties table (Lee-Kesler corresponding states):
+#   Z = Z0(Tr, Pr) + omega/omega_r * (Zr(Tr, Pr) - Z0(Tr, Pr))
+# with Z0 the simple fluid and Zr the n-octane reference fluid of the
+# Lee-Kesler equation. Both are solved once, on a fixed (Tr, ln Pr) grid for
+# the vapor and the liquid root, together with the enthalpy and entropy
+# departures; a lookup is a bracket search plus a bilinear blend of that grid.
+#
+# The table has no acentric factors, so omega is estimated from Zc
+# (Zc = 0.2905 - 0.085 omega, the Lee-Kesler relation) unless given. The
+# phase below Tc follows the Lee-Kesler vapor-pressure correlation.
+# Inputs are °C and MPa like Read_Tables; outside 0.3 <= Tr <= 4, Pr <= 10
+# results are NaN, and below the grid's first Pr, Z goes linearly to 1.
+
+R = 8.314462618          # kJ/(kmol K)
+OMEGA_REF = 0.3978
+
+# b1 b2 b3 b4 c1 c2 c3 c4 d1 d2 beta gamma
+_SIMPLE = (0.1181193, 0.265728, 0.154790, 0.030323, 0.0236744, 0.0186984, 0.0, 0.042724,
+           0.155488e-4, 0.623689e-4, 0.65392, 0.060167)
+_REFERENCE = (0.2026579, 0.331511, 0.027655, 0.203488, 0.0313385, 0.0503618, 0.016901, 0.041577,
+              0.48736e-4, 0.0740336e-4, 1.226, 0.03754)
+
+TR_GRID = np.unique(np.concatenate([np.linspace(0.3, 0.9, 61), np.linspace(0.9, 1.2, 121), np.linspace(1.2, 4.0, 113)]))
+PR_GRID = np.geomspace(1e-3, 10.0, 161)
+
+_SCAN = np.geomspace(1e-2, 1e5, 211)
+_BISECT = 52
+
+
+def _coeffs(c, Tr):
+    b1, b2, b3, b4, c1, c2, c3, c4, d1, d2, beta, gamma = c
+    return (b1 - b2/Tr - b3/Tr**2 - b4/Tr**3, c1 - c2/Tr + c3/Tr**3, d1 + d2/Tr, c4/Tr**3)
+
+def _z(c, Tr, Vr, coef=None):
+    # Lee-Kesler Z(Tr, Vr)
+    B, C, D, E4 = _coeffs(c, Tr) if coef is None else coef
+    beta, gamma = c[10], c[11]
+    g = gamma/Vr**2
+    return 1 + B/Vr + C/Vr**2 + D/Vr**5 + E4/Vr**2*(beta + g)*np.exp(-g)
+
+
+def _eos(c, Tr, Vr):
+    # Z and the departures (H - H_ig)/(R Tc), (S - S_ig)/R at the (T, P) of
+    # the state (Tr, Vr)
+    b1, b2, b3, b4, c1, c2, c3, c4, d1, d2, beta, gamma = c
+    Z = _z(c, Tr, Vr)
+    g = gamma/Vr**2
+    E = c4/(2*Tr**3*gamma)*(beta + 1 - (beta + 1 + g)*np.exp(-g))
+    H = Tr*(Z - 1 - (b2 + 2*b3/Tr + 3*b4/Tr**2)/(Tr*Vr) - (c2 - 3*c3/Tr**2)/(2*Tr*Vr**2) + d2/(5*Tr*Vr**5) + 3*E)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        S = np.log(Z) - (b1 + b3/Tr**2 + 2*b4/Tr**3)/Vr - (c1 - 2*c3/Tr**3)/(2*Vr**2) - d1/(5*Vr**5) + 2*E
+    return Z, H, S
+
+
+def _roots(c, Tr, Pr):
+    # Largest (vapor) and smallest (liquid) Vr with Z(Tr, Vr) = Pr Vr / Tr,
+    # bracketed on a log scan then bisected; NaN where there is no root
+    coef = [a[:, None] for a in _coeffs(c, Tr)]
+    V = _SCAN[None, :]
+    F = _z(c, Tr[:, None], V, coef) - Pr[:, None]*V/Tr[:, None]
+    change = (F[:, :-1] > 0) & (F[:, 1:] <= 0)
+    found = change.any(axis=1)
+    coef = _coeffs(c, Tr)
+    out = []
+    for j in (len(_SCAN) - 2 - change[:, ::-1].argmax(axis=1), change.argmax(axis=1)):
+        lo, hi = _SCAN[j], _SCAN[j + 1]
+        for _ in range(_BISECT):
+            mid = np.sqrt(lo*hi)
+            pos = _z(c, Tr, mid, coef) - Pr*mid/Tr > 0
+            lo, hi = np.where(pos, mid, lo), np.where(pos, hi, mid)
+        out.append(np.where(found, np.sqrt(lo*hi), np.nan))
+    return out
+
+
+def _fill(G):
+    # NaN nodes (no root of that kind, beyond the spinodal) take the nearest
+    # value along Pr, so cells next to the saturation line stay usable
+    for row in G:
+        ok = np.flatnonzero(~np.isnan(row))
+        if len(ok):
+            row[:] = row[ok[np.clip(np.searchsorted(ok, np.arange(len(row))), 0, len(ok) - 1)]]
+    return G
+
+
+def _solve_grid():
+    # (fluid, phase) -> (3, nTr, nPr) array of Z, H departure, S departure
+    Tr, Pr = (a.ravel() for a in np.meshgrid(TR_GRID, PR_GRID, indexing="ij"))
+    grids = {}
+    for fluid, c in (("simple", _SIMPLE), ("reference", _REFERENCE)):
+        vap, liq = _roots(c, Tr, Pr)
+        # One root above Tc: the liquid grid continues the vapor one
+        liq = np.where(Tr >= 1, vap, liq)
+        for phase, Vr in (("vapor", vap), ("liquid", liq)):
+            G = np.stack([_fill(a.reshape(len(TR_GRID), len(PR_GRID))) for a in _eos(c, Tr, Vr)])
+            G.flags.writeable = False
+            grids[fluid, phase] = G
+    return grids
+
+
+_grids = None
+_lock = Lock()
+
+def _get_grids():
+    global _grids
+    if _grids is None:
+        with _lock:
+            if _grids is None:
+                _grids = _solve_grid()
+    return _grids
+
+
+# -- substances
+
+_names = weakref.WeakKeyDictionary()   # TableSet -> {lowercase name or formula: row}
+
+def _critical_of(tables):
+    return (tables if tables is not None else current_tables("water")).critical
+
+def _index(tables):
+    ts = tables if tables is not None else current_tables("water")
+    names = _names.get(ts)
+    if names is None:
+        names = {}
+        for col in ("Formula", "Substance"):
+            for i, v in enumerate(ts.critical.get(col, ())):
+                if v is not None and str(v).strip():
+                    names[str(v).strip().lower()] = i
+        _names[ts] = names
+    return names
+
+def is_substance(Material, tables=None):
+    try:
+        return str(Material or "").strip().lower() in _index(tables)
+    except ValueError:
+        return False
+
+def substances(tables=None):
+    return tuple(v for v in _critical_of(tables).get("Substance", ()) if v is not None)
+
+
+def critical_constants(Material, tables=None, omega=None):
+    # M (kg/kmol), Tc (K), Pc (MPa), Zc and omega of one substance
+    i = _index(tables).get(str(Material or "").strip().lower())
+    if i is None:
+        raise ValueError(f"{Material!r} is not in the critical-properties table")
+    crit = _critical_of(tables)
+    Zc = float(crit["Zc"][i])
+    return {
+        "Substance": crit["Substance"][i], "Formula": crit["Formula"][i],
+        "M": float(crit["M (kg/kmol)"][i]), "Tc": float(crit["Tc (K)"][i]), "Pc": float(crit["Pc (bar)"][i])/10,
+        "Zc": Zc, "omega": (0.2905 - Zc)/0.085 if omega is None else float(omega),
+    }
+
+
+# -- lookups
+
+_LNPR = np.log(PR_GRID)
+
+def _blended(omega):
+    # (2, nTr, nPr, 3): vapor and liquid grids of Z, H and S departures at omega
+    G = _blends.get(omega)
+    if G is None:
+        grids = _get_grids()
+        w = omega/OMEGA_REF
+        G = np.ascontiguousarray(np.stack([grids["simple", ph] + w*(grids["reference", ph] - grids["simple", ph])
+                                           for ph in ("vapor", "liquid")]).transpose(0, 2, 3, 1))
+        G.flags.writeable = False
+        if len(_blends) >= 64:
+            _blends.clear()
+        _blends[omega] = G
+    return G
+
+_blends = {}
+
+
+def _bilinear(G, k, Tr, lnPr):
+    # G[k] at (Tr, ln Pr), k selecting the phase grid of each state
+    i = np.clip(np.searchsorted(TR_GRID, Tr) - 1, 0, len(TR_GRID) - 2)
+    j = np.clip(np.searchsorted(_LNPR, lnPr) - 1, 0, len(_LNPR) - 2)
+    wt = ((Tr - TR_GRID[i])/(TR_GRID[i + 1] - TR_GRID[i]))[:, None]
+    wp = ((lnPr - _LNPR[j])/(_LNPR[j + 1] - _LNPR[j]))[:, None]
+    return ((1 - wt)*((1 - wp)*G[k, i, j] + wp*G[k, i, j + 1])
+            + wt*((1 - wp)*G[k, i + 1, j] + wp*G[k, i + 1, j + 1])).T
+
+
+def _point(G, k, Tr, lnPr):
+    # Scalar _bilinear
+    i = min(max(bisect_left(_TR_LIST, Tr) - 1, 0), len(_TR_LIST) - 2)
+    j = min(max(bisect_left(_LNPR_LIST, lnPr) - 1, 0), len(_LNPR_LIST) - 2)
+    wt = (Tr - _TR_LIST[i])/(_TR_LIST[i + 1] - _TR_LIST[i])
+    wp = (lnPr - _LNPR_LIST[j])/(_LNPR_LIST[j + 1] - _LNPR_LIST[j])
+    g = G[k, i:i + 2, j:j + 2]
+    return ((1 - wt)*((1 - wp)*g[0, 0] + wp*g[0, 1]) + wt*((1 - wp)*g[1, 0] + wp*g[1, 1])).tolist()
+
+_TR_LIST, _LNPR_LIST = TR_GRID.tolist(), _LNPR.tolist()
+
+
+def _ln_psat(Tr, omega, log):
+    return (5.92714 - 6.09648/Tr - 1.28862*log(Tr) + 0.169347*Tr**6
+            + omega*(15.2518 - 15.6875/Tr - 13.4721*log(Tr) + 0.43577*Tr**6))
+
+def reduced_vapor_pressure(Tr, omega):
+    # Lee-Kesler correlation, Psat/Pc at T/Tc (NaN at or above Tc)
+    Tr = np.asarray(Tr, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        return np.where(Tr < 1, np.exp(_ln_psat(Tr, omega, np.log)), np.nan)
+
+
+def _columns(c, T, P, Z, Hd, Sd, phase):
+    Rm = R/c["M"]
+    v = Z*Rm*(T + 273.15)/(P*1e3)
+    return {
+        "T (°C)": T, "P (MPa)": P,
+        "Specific Volume (m^3/kg)": v, "Density (kg/m^3)": 1/v, "Z": Z,
+        "Enthalpy Departure (kJ/kg)": Hd*R*c["Tc"]/c["M"], "Entropy Departure [kJ/(kg K)]": Sd*Rm,
+        "Phase": phase,
+    }
+
+
+def gas_properties(Material, T, P, tables=None, omega=None):
+    # Read_Tables_batch-style columns for T (°C) and P (MPa) arrays: v, rho,
+    # Z, the enthalpy and entropy departures from the ideal gas at the same
+    # T and P, and the phase
+    c = critical_constants(Material, tables, omega)
+    T, P = (np.ravel(a) for a in np.broadcast_arrays(np.asarray(T, dtype=float), np.asarray(P, dtype=float)))
+    Tr, Pr = (T + 273.15)/c["Tc"], P/c["Pc"]
+    ok = (Tr >= TR_GRID[0]) & (Tr <= TR_GRID[-1]) & (Pr > 0) & (Pr <= PR_GRID[-1])
+    Trc = np.where(ok, Tr, 1.0)
+    # Below the grid the departures vanish linearly with Pr (second virial)
+    scale = np.where(Pr < PR_GRID[0], Pr/PR_GRID[0], 1.0)
+    lnPr = np.log(np.where(ok, np.maximum(Pr, PR_GRID[0]), 1.0))
+
+    liquid = (Trc < 1) & (Pr > reduced_vapor_pressure(Trc, c["omega"]))
+    Z, Hd, Sd = _bilinear(_blended(c["omega"]), liquid.view(np.int8), Trc, lnPr)
+    Z = 1 + (Z - 1)*scale
+    Z, Hd, Sd = (np.where(ok, a, np.nan) for a in (Z, Hd*scale, Sd*scale))
+    phase = np.where(liquid, "liquid", np.where((Trc >= 1) & (Pr >= 1), "supercritical fluid", "vapor")).astype(object)
+    phase[~ok] = None
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return _columns(c, T, P, Z, Hd, Sd, phase)
+
+
+def gas_row(Material, T=None, P=None, x=None, v=None, u=None, h=None, s=None, tables=None, omega=None):
+    # One state for Read_Tables / State: T and P only
+    if T is None or P is None or any(a is not None for a in (x, v, u, h, s)):
+        raise ValueError(f"Generalized properties of {Material!r} take T and P only")
+    c = critical_constants(Material, tables, omega)
+    T, P = float(T), float(P)
+    Tr, Pr = (T + 273.15)/c["Tc"], P/c["Pc"]
+    if not (TR_GRID[0] <= Tr <= TR_GRID[-1] and 0 < Pr <= PR_GRID[-1]):
+        return dict(_columns(c, T, 1.0, nan, nan, nan, None), **{"P (MPa)": P})
+    liquid = Tr < 1 and Pr > exp(_ln_psat(Tr, c["omega"], log))
+    Z, Hd, Sd = _point(_blended(c["omega"]), int(liquid), Tr, log(max(Pr, PR_GRID[0])))
+    if Pr < PR_GRID[0]:
+        scale = Pr/PR_GRID[0]
+        Z, Hd, Sd = 1 + (Z - 1)*scale, Hd*scale, Sd*scale
+    phase = "liquid" if liquid else "supercritical fluid" if Tr >= 1 and Pr >= 1 else "vapor"
+    return _columns(c, T, P, Z, Hd, Sd, phase)
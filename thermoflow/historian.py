@@ -0,0 +1,249 @@
+import argparse
+import gzip
+import os
+import sys
+from collections import deque
+from pathlib import Path
+from time import perf_counter
+import numpy as np
+from .tables import Read_Tables_batch
+from .state import _PROPS
+from .cycles import _init_worker, _publish
+
+# Streams a plant historian export (CSV or Parquet) through the batched lookup
+# and writes every row back with state columns appended:
+#   python -m thermoflow.historian plant.csv plant_states.csv --T TT101 --P PT101
+#
+# The file is read, evaluated and written one chunk at a time (with several
+# processes, a few chunks are in flight and written back in order), so memory
+# is bounded by chunksize whatever the file size. Formatting CSV text costs
+# more than the lookups, so it happens next to them, in the workers; the parent
+# only reads chunks and writes text back (about 3% of the time on 200k rows),
+# so workers help only as far as there are idle cores. processes is capped at
+# os.cpu_count(), and on a single core the file is done in-process. Readings
+# are taken in °C and MPa, like Read_Tables. The output is written next to dst
+# and renamed into place when complete. Parquet needs pyarrow.
+
+OUTPUTS = dict(_PROPS[:15], x='x', phase='Phase')
+_INPUTS = ('T', 'P', 'x', 'v', 'u', 'h', 's')
+
+
+def _is_parquet(path):
+    return Path(path).suffix.lower() in (".parquet", ".pq")
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet files need pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+def _reader(path, chunksize, usecols=None):
+    # (iterator of DataFrames, total rows or None)
+    if _is_parquet(path):
+        pa = _pyarrow()
+        pf = pa.parquet.ParquetFile(path)
+        batches = pf.iter_batches(batch_size=chunksize, columns=usecols)
+        return (b.to_pandas() for b in batches), pf.metadata.num_rows
+    import pandas as pd
+    return pd.read_csv(path, chunksize=chunksize, usecols=usecols), None
+
+
+class _Writer:
+    # Takes DataFrames for Parquet, CSV text otherwise (gzip for .gz)
+    def __init__(self, path):
+        self.path = Path(path)
+        self.tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.part")
+        self.parquet = _is_parquet(path)
+        self.f = self.schema = None
+
+    def write(self, chunk):
+        if self.parquet:
+            pa = _pyarrow()
+            if self.f is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                self.schema = table.schema
+                self.f = pa.parquet.ParquetWriter(self.tmp, self.schema)
+            else:
+                # Chunks can infer different dtypes; keep the first chunk's
+                table = pa.Table.from_pandas(chunk, schema=self.schema, preserve_index=False)
+            self.f.write_table(table)
+        else:
+            if self.f is None:
+                opener = gzip.open if self.path.suffix.lower() == ".gz" else open
+                self.f = opener(self.tmp, "wt", encoding="utf-8", newline="")
+            self.f.write(chunk)
+
+    def close(self, ok=True):
+        if self.f is not None:
+            self.f.close()
+        if ok:
+            os.replace(self.tmp, self.path)
+        elif self.tmp.exists():
+            os.remove(self.tmp)
+
+
+def _compute(Material, cols, outputs):
+    # Read_Tables argument -> readings  ->  output -> values; rows without T
+    # or P, or with fewer than two readings, are skipped (NaN / None)
+    n = len(next(iter(cols.values())))
+    nan = np.full(n, np.nan)
+    ok = (sum(~np.isnan(v) for v in cols.values()) >= 2) \
+        & ~(np.isnan(cols.get('T', nan)) & np.isnan(cols.get('P', nan)))
+    res = {}
+    out = Read_Tables_batch(Material, **{k: v[ok] for k, v in cols.items()}) if ok.any() else {}
+    for name in outputs:
+        col = OUTPUTS[name]
+        if name == 'phase':
+            full = np.full(n, None, dtype=object)
+            if col in out:
+                full[ok] = [p if isinstance(p, str) else None for p in out[col]]
+        else:
+            full = np.full(n, np.nan)
+            if col in out:
+                full[ok] = out[col]
+        res[name] = full
+    return res, int(n - ok.sum())
+
+
+def _process(Material, df, inputs, outputs, prefix, header):
+    # One chunk with its state columns appended, as CSV text unless header is
+    # None (Parquet output) -> (chunk, skipped rows). Cells that are not
+    # numbers read as missing.
+    import pandas as pd
+    cols = {k: pd.to_numeric(df[c], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+            for k, c in inputs.items()}
+    res, skipped = _compute(Material, cols, outputs)
+    for name, vals in res.items():
+        df[prefix + name] = vals
+    if header is None:
+        return df, skipped
+    return df.to_csv(None, header=header, index=False), skipped
+
+
+def ingest_iter(src, dst, inputs=None, outputs=('h', 's', 'x', 'phase'), Material='water',
+                chunksize=100_000, processes=1, prefix='', shared=False):
+    # inputs: Read_Tables argument -> source column, default {'T': 'T', 'P': 'P'}.
+    # Every source column is kept; outputs are appended as prefix + name.
+    # Yields after every chunk written:
+    #   rows, chunks, skipped (rows without T or P, or with fewer than two
+    #   readings), total (rows in the file when known), elapsed_s, rows_per_s
+    inputs = dict(inputs or {'T': 'T', 'P': 'P'})
+    outputs = tuple(outputs)
+    bad = [k for k in inputs if k not in _INPUTS]
+    if bad:
+        raise ValueError(f"Inputs must be among {_INPUTS}, got {bad}")
+    if 'T' not in inputs and 'P' not in inputs:
+        raise ValueError("Please provide either Temperature or Pressure.")
+    bad = [k for k in outputs if k not in OUTPUTS]
+    if bad:
+        raise ValueError(f"Outputs must be among {tuple(OUTPUTS)}, got {bad}")
+    chunksize = int(chunksize)
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1")
+
+    chunks, total = _reader(src, chunksize)
+    writer = _Writer(dst)
+    t0 = perf_counter()
+    report = {"rows": 0, "chunks": 0, "skipped": 0, "total": total, "elapsed_s": 0.0, "rows_per_s": None}
+
+    def job(df):
+        missing = [c for c in inputs.values() if c not in df.columns]
+        if missing:
+            raise ValueError(f"Columns not in {src}: {missing}")
+        header = None if writer.parquet else report["chunks"] + len(flight) == 0
+        return (Material, df, inputs, outputs, prefix, header)
+
+    def emit(n, result):
+        chunk, skipped = result
+        writer.write(chunk)
+        report["rows"] += n
+        report["chunks"] += 1
+        report["skipped"] += skipped
+        report["elapsed_s"] = perf_counter() - t0
+        report["rows_per_s"] = report["rows"]/report["elapsed_s"] if report["elapsed_s"] > 0 else None
+        return dict(report)
+
+    ok = False
+    flight = deque()
+    try:
+        # More workers than cores only adds pool overhead (see the note above)
+        cores = os.cpu_count() or 1
+        processes = cores if processes is None else min(int(processes), cores)
+        if processes > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with _publish(None, shared) as pub, \
+                    ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                        initargs=(None, getattr(pub, 'path', None))) as pool:
+                # At most two chunks per worker in flight, written in order
+                for df in chunks:
+                    flight.append((len(df), pool.submit(_process, *job(df))))
+                    if len(flight) >= 2*processes:
+                        n, fut = flight.popleft()
+                        yield emit(n, fut.result())
+                while flight:
+                    n, fut = flight.popleft()
+                    yield emit(n, fut.result())
+        else:
+            for df in chunks:
+                yield emit(len(df), _process(*job(df)))
+        if report["chunks"] == 0:
+            raise ValueError(f"No rows in {src}")
+        ok = True
+    finally:
+        writer.close(ok)
+
+
+def ingest(src, dst, inputs=None, outputs=('h', 's', 'x', 'phase'), Material='water',
+           chunksize=100_000, processes=1, prefix='', shared=False, progress=None):
+    # Final report of ingest_iter; progress(report) is called after every chunk
+    report = None
+    for report in ingest_iter(src, dst, inputs, outputs, Material, chunksize, processes, prefix, shared):
+        if progress is not None:
+            progress(report)
+    return report
+
+
+def _print_progress(report):
+    done = f"{report['rows']:,}" + (f"/{report['total']:,}" if report['total'] else "")
+    rate = f"{report['rows_per_s']:,.0f} rows/s" if report['rows_per_s'] else ""
+    print(f"\r{done} rows, {report['chunks']} chunks, {rate}   ", end="", file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m thermoflow.historian",
+                                 description="Append state columns to a historian export (CSV or Parquet)")
+    ap.add_argument("src")
+    ap.add_argument("dst")
+    for k in _INPUTS:
+        ap.add_argument(f"--{k}", metavar="COLUMN", help=f"source column read as {k}")
+    ap.add_argument("--outputs", default="h,s,x,phase", help=f"comma separated, among {','.join(OUTPUTS)}")
+    ap.add_argument("--prefix", default="")
+    ap.add_argument("--material", default="water")
+    ap.add_argument("--chunksize", type=int, default=100_000)
+    ap.add_argument("--processes", type=int, default=1)
+    ap.add_argument("--shared", action="store_true", help="workers attach to the parent's tables")
+    ap.add_argument("--base", help="table directory (default: the bundled tables)")
+    ap.add_argument("--quiet", action="store_true")
+    args = ap.parse_args(argv)
+
+    from .loader import Load_Tables
+    Load_Tables(args.base)
+    inputs = {k: getattr(args, k) for k in _INPUTS if getattr(args, k)} or None
+    outputs = [o.strip() for o in args.outputs.split(",") if o.strip()]
+    try:
+        report = ingest(args.src, args.dst, inputs, outputs, args.material, args.chunksize,
+                        args.processes, args.prefix, args.shared, None if args.quiet else _print_progress)
+    except (ValueError, ImportError, OSError) as e:
+        print(f"\nerror: {e}", file=sys.stderr)
+        return 1
+    if not args.quiet:
+        print(f"\n{report['rows']:,} rows in {report['elapsed_s']:.2f} s, {report['skipped']:,} skipped -> {args.dst}",
+              file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+from collections import deque
+from threading import Lock
+
+# Lookup instrumentation: per-branch call counts, latency histograms and
+# clamp/extrapolation events. Everything is off by default; the lookups only
+# test `enabled` on their slow or out-of-range paths, so the cost when off is
+# one attribute read.
+
+enabled = False
+
+# Latency buckets in microseconds: [0, 1), [1, 2), [2, 4), ... [2^19, inf)
+_N_BUCKETS = 21
+_RECENT = 50
+
+_lock = Lock()
+_branches = {}
+_clamps = {}
+_recent = deque(maxlen=_RECENT)
+
+
+class Histogram:
+    # Calls, states and a log2 latency histogram; summary() is the per-branch
+    # entry of instrumentation_info(). Public for other timers (the service's
+    # /metrics), which keep their own instances.
+    __slots__ = ("calls", "states", "total", "min", "max", "hist")
+
+    def __init__(self):
+        self.calls = self.states = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.hist = [0]*_N_BUCKETS
+
+    def add(self, seconds, states=1):
+        self.calls += 1
+        self.states += states
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.hist[_bucket(seconds)] += 1
+
+    def summary(self):
+        return {
+            "calls": self.calls,
+            "states": self.states,
+            "total_s": self.total,
+            "mean_us": self.total/self.calls*1e6 if self.calls else None,
+            "min_us": self.min*1e6 if self.calls else None,
+            "max_us": self.max*1e6 if self.calls else None,
+            "p50_us": _percentile(self.hist, 0.50),
+            "p99_us": _percentile(self.hist, 0.99),
+            "hist": {_bucket_label(i): c for i, c in enumerate(self.hist) if c},
+        }
+
+
+def _bucket(seconds):
+    return min(int(seconds*1e6).bit_length(), _N_BUCKETS - 1)
+
+def _bucket_label(i):
+    if i == 0:
+        return "<1us"
+    lo = 1 << (i - 1)
+    return f">={lo}us" if i == _N_BUCKETS - 1 else f"{lo}-{2*lo}us"
+
+
+HIST_BUCKETS = [_bucket_label(i) for i in range(_N_BUCKETS)]
+
+
+def record(branch, seconds, states=1):
+    with _lock:
+        b = _branches.get(branch)
+        if b is None:
+            b = _branches[branch] = Histogram()
+        b.add(seconds, states)
+
+
+def clamp(kind, value, bound, count=1):
+    # An input outside the data was clamped (or extrapolated) to `bound`
+    with _lock:
+        _clamps[kind] = _clamps.get(kind, 0) + count
+        _recent.append((kind, float(value), float(bound)))
+
+
+def _percentile(hist, q):
+    # Upper edge of the bucket holding the q-th fraction of calls
+    n = sum(hist)
+    if n == 0:
+        return None
+    seen = 0
+    for i, c in enumerate(hist):
+        seen += c
+        if seen >= q*n:
+            return float(1 << i) if i < _N_BUCKETS - 1 else float("inf")
+    return None
+
+
+def enable_instrumentation():
+    global enabled
+    enabled = True
+
+def disable_instrumentation():
+    global enabled
+    enabled = False
+
+def instrumentation_enabled():
+    return enabled
+
+def instrumentation_clear():
+    with _lock:
+        _branches.clear()
+        _clamps.clear()
+        _recent.clear()
+
+
+def instrumentation_info():
+    # Plain dict snapshot:
+    #   branches -> name -> calls, states, total_s, mean_us, min_us, max_us,
+    #               p50_us, p99_us (bucket upper edges) and hist (label -> count)
+    #   clamps   -> event kind -> count
+    #   recent_clamps -> last events as (kind, value, bound)
+    with _lock:
+        branches = {name: b.summary() for name, b in sorted(_branches.items())}
+        return {
+            "enabled": enabled,
+            "branches": branches,
+            "clamps": dict(sorted(_clamps.items())),
+            "recent_clamps": list(_recent),
+        }
@@ -1,59 +1,337 @@
+from bisect import bisect_left
 import numpy as np
-import pandas as pd
+from . import instrument as _instrument
 
-def _interp_row_1d(df, xcol, x):
-    if df is None or df.empty:
+# Every helper works on a CompiledTable (see compiled.py): the table is already
+# numeric, sorted and contiguous, so a lookup is a bisection plus one row blend.
+
+def _isclose(a, b, atol=1e-8, rtol=1e-5):
+    # np.isclose for plain floats
+    return abs(a - b) <= atol + rtol*abs(b)
+
+def _isclose_many(a, b, atol=1e-8, rtol=1e-5):
+    # np.isclose without its finite/broadcast bookkeeping, for the array kernels
+    return np.abs(a - b) <= atol + rtol*np.abs(b)
+
+def _hermite(d, S, xs, lo, hi, w):
+    # Cubic Hermite blend of columns lo and hi of d with node slopes S (see
+    # compiled.pchip_slopes); w is the linear weight, xs the node positions
+    dx = xs[hi] - xs[lo]
+    t2 = w*w; t3 = t2*w
+    return (d[:, lo]*(2*t3 - 3*t2 + 1) + d[:, hi]*(3*t2 - 2*t3)
+            + dx*(S[:, lo]*(t3 - 2*t2 + w) + S[:, hi]*(t3 - t2)))
+
+def _hermite_slope(d, S, xs, lo, hi, w):
+    # d/dx of _hermite; NaN where the cell has no width (clamped or flat)
+    dx = xs[hi] - xs[lo]
+    flat = dx == 0
+    dx = np.where(flat, 1.0, dx)
+    t2 = w*w
+    if S is None:
+        dd = (d[:, hi] - d[:, lo])/dx
+    else:
+        dd = ((d[:, hi] - d[:, lo])*(6*w - 6*t2)/dx
+              + S[:, lo]*(3*t2 - 4*w + 1) + S[:, hi]*(3*t2 - 2*w))
+    return np.where(flat, np.nan, dd)
+
+def _blend(table, lo, hi, w, xcol, x, slopes=None):
+    d = table.data
+    if hi is None:
+        vals = d[:, lo]
+    elif slopes is None:
+        vals = d[:, lo] + w*(d[:, hi] - d[:, lo])
+    else:
+        vals = _hermite(d, slopes, table.keys, lo, hi, w)
+    out = dict(zip(table.numeric, vals.tolist()))
+    for name, arr in table.labels.items():
+        out[name] = arr[lo]
+    out[xcol] = float(x)
+    return out
+
+def _clamp_kind(table, xcol, start, stop, side):
+    where = "table" if stop - start == len(table) else "isobar"
+    return f"{xcol} {side} {where}"
+
+def _interp_row_1d(table, xcol, x, start=0, stop=None, slopes=None):
+    if table is None or len(table) == 0:
         raise ValueError(f"Table not found: {xcol}")
-    df2 = df.copy()
-    # Ensure numeric type and order
-    df2[xcol] = pd.to_numeric(df2[xcol], errors="coerce")
-    df2 = df2.dropna(subset=[xcol]).sort_values(xcol).reset_index(drop=True)
+    xs = table.keylist
+    stop = len(xs) if stop is None else stop
+    x = float(x)
 
-    xs = df2[xcol].to_numpy(dtype=float)
+    if stop - start == 1 or _isclose(xs[start], xs[stop-1]):
+        return _blend(table, start, None, 0.0, xcol, x)
+    if x <= xs[start]:
+        if _instrument.enabled and x < xs[start]:
+            _instrument.clamp(_clamp_kind(table, xcol, start, stop, "below"), x, xs[start])
+        return _blend(table, start, None, 0.0, xcol, x)
+    if x >= xs[stop-1]:
+        if _instrument.enabled and x > xs[stop-1]:
+            _instrument.clamp(_clamp_kind(table, xcol, start, stop, "above"), x, xs[stop-1])
+        return _blend(table, stop-1, None, 0.0, xcol, x)
 
-    if len(xs) == 1 or np.isclose(xs[0], xs[-1]):
-        out = df2.iloc[[0]].copy(); out[xcol] = float(x); return out
+    hi = bisect_left(xs, x, start, stop)
+    lo = hi - 1
+    x_lo, x_hi = xs[lo], xs[hi]
+    if _isclose(x_hi - x_lo, 0.0):
+        return _blend(table, lo, None, 0.0, xcol, x)
+
+    w = (x - x_lo) / (x_hi - x_lo)
+    return _blend(table, lo, hi, w, xcol, x, slopes)
+
+
+def _interp_value_1d(table, xcol, col, x, slopes=None):
+    # _interp_row_1d(...)[col] without building the row
+    xs = table.keylist
+    d = table.data[table.col[col]]
+    x = float(x)
+    if len(xs) == 1 or _isclose(xs[0], xs[-1]):
+        return float(d[0])
     if x <= xs[0]:
-        out = df2.iloc[[0]].copy(); out[xcol] = float(x); return out
+        if _instrument.enabled and x < xs[0]:
+            _instrument.clamp(_clamp_kind(table, xcol, 0, len(xs), "below"), x, xs[0])
+        return float(d[0])
     if x >= xs[-1]:
-        out = df2.iloc[[-1]].copy(); out[xcol] = float(x); return out
+        if _instrument.enabled and x > xs[-1]:
+            _instrument.clamp(_clamp_kind(table, xcol, 0, len(xs), "above"), x, xs[-1])
+        return float(d[-1])
+    hi = bisect_left(xs, x)
+    lo = hi - 1
+    if _isclose(xs[hi] - xs[lo], 0.0):
+        return float(d[lo])
+    w = (x - xs[lo]) / (xs[hi] - xs[lo])
+    if slopes is None:
+        return float(d[lo] + w*(d[hi] - d[lo]))
+    i = table.col[col]
+    return float(_hermite(table.data[i:i+1], slopes[i:i+1], table.keys, lo, hi, w)[0])
 
-    pos = np.searchsorted(xs, x, side="left")
-    lo, hi = pos-1, pos
-    x_lo, x_hi = xs[lo], xs[hi]
-    if np.isclose(x_hi - x_lo, 0.0):
-        out = df2.iloc[[lo]].copy(); out[xcol] = float(x); return out
 
-    w = (x - x_lo) / (x_hi - x_lo)
-    num_cols = df2.select_dtypes(include=[np.number]).columns
-    out = df2.iloc[[lo]].copy()
-    out[num_cols] = out[num_cols] + w*(df2.iloc[hi][num_cols].to_numpy() - out[num_cols].to_numpy())
-    out[xcol] = float(x)
+def _bilinear_superheated(table, index, T, P, slopes=None):
+    # slopes: node slopes along T (compiled.isobar_slopes) for cubic rather
+    # than linear interpolation on each isobar; across isobars it stays linear
+    k_lo, k_hi, wP = index.bracket(P)
+    row_loT = _interp_row_1d(table, 'T (°C)', T, *index.slice(k_lo), slopes=slopes)
+
+    if k_lo == k_hi:
+        row_loT['P (MPa)'] = P; row_loT['T (°C)'] = T
+        return row_loT
+
+    row_hiT = None
+    if index.crossing(k_lo, k_hi, T):
+        # The cell straddles the saturation line: the isobar on the wrong side
+        # of the dome is replaced by its own branch on the state's side,
+        # extended linearly to T, so liquid and vapor rows are never blended
+        T_sat = index.T_sat[k_lo] + wP*(index.T_sat[k_hi] - index.T_sat[k_lo])
+        liquid = T <= T_sat
+        r0, r1 = index.branch_end(k_lo if liquid else k_hi, liquid)
+        xs = table.keylist
+        if _instrument.enabled:
+            _instrument.clamp("T (°C) extrapolated across dome", T, xs[r1] if liquid else xs[r0])
+        row = _blend(table, r0, r1, (T - xs[r0]) / (xs[r1] - xs[r0]), 'T (°C)', T)
+        if liquid:
+            row_loT = row
+        else:
+            row_hiT = row
+    if row_hiT is None:
+        row_hiT = _interp_row_1d(table, 'T (°C)', T, *index.slice(k_hi), slopes=slopes)
+
+    out = dict(row_loT)
+    for name in table.numeric:
+        out[name] = row_loT[name] + wP*(row_hiT[name] - row_loT[name])
+    out['P (MPa)'] = P; out['T (°C)'] = T
     return out
 
 
-def _bilinear_superheated(df_sc, T, P):
-    Ps = np.sort(df_sc['P (MPa)'].unique())
-    if P <= Ps[0]: P_lo = P_hi = Ps[0]
-    elif P >= Ps[-1]: P_lo = P_hi = Ps[-1]
-    else:
-        idx = np.searchsorted(Ps, P, side='left')
-        P_lo, P_hi = Ps[idx-1], Ps[idx]
+def _isobar_value(d, xs, T, start, stop):
+    # One column d of _interp_row_1d on rows start..stop-1 (linear)
+    if stop - start == 1 or _isclose(xs[start], xs[stop-1]) or T <= xs[start]:
+        return d[start]
+    if T >= xs[stop-1]:
+        return d[stop-1]
+    hi = bisect_left(xs, T, start, stop)
+    lo = hi - 1
+    if _isclose(xs[hi] - xs[lo], 0.0):
+        return d[lo]
+    w = (T - xs[lo]) / (xs[hi] - xs[lo])
+    return d[lo] + w*(d[hi] - d[lo])
 
-    df_lo = df_sc[df_sc['P (MPa)'] == P_lo]
-    df_hi = df_sc[df_sc['P (MPa)'] == P_hi]
+def _bilinear_value(table, index, col, T, P):
+    # _bilinear_superheated(...)[col] on linear tables without building the
+    # rows; the inverse searches evaluate one column many times per state
+    d, xs = table.data[table.col[col]], table.keylist
+    k_lo, k_hi, wP = index.bracket(P)
+    lo = _isobar_value(d, xs, T, *index.slice(k_lo))
+    if k_lo == k_hi:
+        return lo
+    hi = None
+    if index.crossing(k_lo, k_hi, T):
+        T_sat = index.T_sat[k_lo] + wP*(index.T_sat[k_hi] - index.T_sat[k_lo])
+        liquid = T <= T_sat
+        r0, r1 = index.branch_end(k_lo if liquid else k_hi, liquid)
+        w = (T - xs[r0]) / (xs[r1] - xs[r0])
+        ext = d[r0] + w*(d[r1] - d[r0])
+        if liquid:
+            lo = ext
+        else:
+            hi = ext
+    if hi is None:
+        hi = _isobar_value(d, xs, T, *index.slice(k_hi))
+    return lo + wP*(hi - lo)
 
-    row_loT = _interp_row_1d(df_lo, 'T (°C)', T)
-    row_hiT = _interp_row_1d(df_hi, 'T (°C)', T)
 
-    if P_lo == P_hi:
-        out = row_loT.copy()
-        out['P (MPa)'] = P; out['T (°C)'] = T
-        return out
+def _superheated_cell(table, index, T, P):
+    # (k_lo, k_hi, [a0, a1, b0, b1]) when _bilinear_superheated at (T, P) is a
+    # plain blend of rows a0..a1 on isobar k_lo and b0..b1 on isobar k_hi (no
+    # clamp, single isobar or dome crossing), None otherwise. The same rows
+    # serve every (T, P) strictly inside the cell.
+    Ps, xs = index.levellist, table.keylist
+    if not Ps[0] < P < Ps[-1]:
+        return None
+    k = bisect_left(Ps, P)
+    rows = []
+    for kk in (k - 1, k):
+        a, b = index.slice(kk)
+        if b - a < 2 or _isclose(xs[a], xs[b-1]) or not xs[a] < T < xs[b-1]:
+            return None
+        hi = bisect_left(xs, T, a, b)
+        if _isclose(xs[hi] - xs[hi-1], 0.0):
+            return None
+        rows += [hi - 1, hi]
+    if index.crossing(k - 1, k, T):
+        return None
+    return k - 1, k, rows
 
-    wP = (P - P_lo) / (P_hi - P_lo)
-    num_cols = df_sc.select_dtypes(include=[np.number]).columns
-    out = row_loT.copy()
-    out[num_cols] = out[num_cols] + wP*(row_hiT[num_cols].iloc[0] - out[num_cols].iloc[0])
-    out['P (MPa)'] = P; out['T (°C)'] = T
+
+# Vectorized counterparts: same bracketing and clamping rules as above, applied to
+# an array of query points at once. They return a dict of column -> array.
+
+def _bracket_1d(xs, x):
+    n = len(xs)
+    if n == 1 or _isclose(xs[0], xs[-1]):
+        z = np.zeros(x.shape, dtype=np.intp)
+        return z, z, np.zeros(x.shape)
+    pos = np.searchsorted(xs, x, side="left")
+    lo = np.maximum(pos - 1, 0)
+    hi = np.minimum(pos, n - 1)
+    below = x <= xs[0]
+    above = x >= xs[-1]
+    lo[below] = hi[below] = 0
+    lo[above] = hi[above] = n - 1
+    flat = _isclose_many(xs[hi] - xs[lo], 0.0)
+    hi[flat] = lo[flat]
+    span = np.where(flat, 1.0, xs[hi] - xs[lo])
+    w = np.where(flat, 0.0, (x - xs[lo]) / span)
+    return lo, hi, w
+
+def _clamp_many(table, xcol, x, start, stop):
+    keys = table.keys
+    for side, out, bound in (("below", x < keys[start], keys[start]), ("above", x > keys[stop-1], keys[stop-1])):
+        n = int(np.count_nonzero(out))
+        if n:
+            _instrument.clamp(_clamp_kind(table, xcol, start, stop, side), x[out][0], bound, n)
+
+def _interp_rows_1d(table, xcol, x, start=0, stop=None, slopes=None):
+    if table is None or len(table) == 0:
+        raise ValueError(f"Table not found: {xcol}")
+    stop = len(table) if stop is None else stop
+    x = np.asarray(x, dtype=float)
+    lo, hi, w = _bracket_1d(table.keys[start:stop], x)
+    lo += start; hi += start
+    if _instrument.enabled and len(x):
+        _clamp_many(table, xcol, x, start, stop)
+
+    d = table.data
+    vals = d[:, lo] + w*(d[:, hi] - d[:, lo]) if slopes is None else _hermite(d, slopes, table.keys, lo, hi, w)
+    out = dict(zip(table.numeric, vals))
+    for name, arr in table.labels.items():
+        out[name] = arr[lo]
+    out[xcol] = x.copy()
     return out
+
+def _interp_cols_1d(table, xcol, cols, x, slopes=None):
+    # _interp_rows_1d for a few columns only -> array (len(cols), len(x))
+    x = np.asarray(x, dtype=float)
+    lo, hi, w = _bracket_1d(table.keys, x)
+    if _instrument.enabled and len(x):
+        _clamp_many(table, xcol, x, 0, len(table))
+    rows = [table.col[c] for c in cols]
+    d = table.data[rows]
+    if slopes is None:
+        return d[:, lo] + w*(d[:, hi] - d[:, lo])
+    return _hermite(d, slopes[rows], table.keys, lo, hi, w)
+
+def _bilinear_superheated_batch(table, index, T, P, cols=None, slopes=None, deriv=False):
+    # cols limits the output to those numeric columns (plus T and P). With
+    # deriv=True it returns (out, dT, dP): the partial derivatives of every
+    # numeric column along T at fixed P and along P at fixed T, NaN where the
+    # query is clamped to the table
+    T = np.asarray(T, dtype=float); P = np.asarray(P, dtype=float)
+    k_lo, k_hi, wP = index.bracket_many(P)
+
+    # Cells that straddle the saturation line (see above)
+    s_lo, s_hi = index.side_many(k_lo, T), index.side_many(k_hi, T)
+    cross = (s_lo != 0) & (s_hi != 0) & (s_lo != s_hi)
+    liq = np.zeros(len(T), dtype=bool)
+    if cross.any():
+        T_sat = index.T_sat[k_lo] + wP*(index.T_sat[k_hi] - index.T_sat[k_lo])
+        liq = cross & (T <= T_sat)
+
+    # Interpolate along T on each bracketing isobar (once when both are the
+    # same); queries are grouped by isobar with one sort rather than a mask
+    # per isobar, then gathered from the table in one go
+    n = len(T)
+    same = k_lo == k_hi
+    q = np.concatenate([np.arange(n), np.flatnonzero(~same)])
+    ks = np.concatenate([k_lo, k_hi[~same]])
+    lo = np.zeros(len(q), dtype=np.intp); hi = np.zeros(len(q), dtype=np.intp); w = np.zeros(len(q))
+    if n:
+        order = np.argsort(ks, kind="stable")
+        for grp in np.split(order, np.flatnonzero(np.diff(ks[order])) + 1):
+            a, b = index.slice(ks[grp[0]])
+            x = T[q[grp]]
+            l, h, ww = _bracket_1d(table.keys[a:b], x)
+            lo[grp] = l + a; hi[grp] = h + a; w[grp] = ww
+            if _instrument.enabled:
+                _clamp_many(table, 'T (°C)', x, a, b)
+    names = table.numeric if cols is None else tuple(cols)
+    rows = None if cols is None else [table.col[c] for c in names]
+    d = table.data if cols is None else table.data[rows]
+    S = None if slopes is None else slopes if cols is None else slopes[rows]
+    V = d[:, lo] + w*(d[:, hi] - d[:, lo]) if S is None else _hermite(d, S, table.keys, lo, hi, w)
+    M_lo = V[:, :n]
+    M_hi = M_lo.copy()
+    M_hi[:, ~same] = V[:, n:]
+    if deriv:
+        G = _hermite_slope(d, S, table.keys, lo, hi, w)
+        if S is not None:
+            # Exactly on the first or last node of an isobar: the node slope
+            at_node = (lo == hi) & (T[q] == table.keys[lo])
+            G[:, at_node] = S[:, lo[at_node]]
+        G_lo = G[:, :n]
+        G_hi = G_lo.copy()
+        G_hi[:, ~same] = G[:, n:]
+    labels = {name: arr[lo[:n]] for name, arr in table.labels.items()} if cols is None else {}
+
+    # The extension past the dome stays linear, whatever the interpolation
+    for M, sel, k, liquid in ((M_lo, cross & liq, k_lo, True), (M_hi, cross & ~liq, k_hi, False)):
+        if sel.any():
+            r0, r1 = index.branch_end_many(k[sel], liquid)
+            xs = table.keys
+            if _instrument.enabled:
+                _instrument.clamp("T (°C) extrapolated across dome", T[sel][0], xs[r1[0] if liquid else r0[0]], int(sel.sum()))
+            wx = (T[sel] - xs[r0]) / (xs[r1] - xs[r0])
+            M[:, sel] = d[:, r0] + wx*(d[:, r1] - d[:, r0])
+            if deriv:
+                (G_lo if liquid else G_hi)[:, sel] = (d[:, r1] - d[:, r0]) / (xs[r1] - xs[r0])
+            if liquid:
+                for name in labels:
+                    labels[name][sel] = table.labels[name][r0]
+
+    out = dict(zip(names, M_lo + wP*(M_hi - M_lo)))
+    out.update(labels)
+    out['P (MPa)'] = P.copy(); out['T (°C)'] = T.copy()
+    if not deriv:
+        return out
+    Ps = index.levels
+    dP = np.where(same, np.nan, (M_hi - M_lo) / np.where(same, 1.0, Ps[k_hi] - Ps[k_lo]))
+    return out, dict(zip(names, G_lo + wP*(G_hi - G_lo))), dict(zip(names, dP))
@@ -0,0 +1,922 @@
+import math
+from bisect import bisect_left, bisect_right
+from time import perf_counter
+import numpy as np
+from . import instrument as _instrument
+from . import tables as _tables
+from .tableset import current_tables
+from .interpolation import _isclose, _isclose_many, _interp_row_1d, _interp_rows_1d
+from .interpolation import _bilinear_superheated, _bilinear_superheated_batch, _bilinear_value
+
+# Inverse lookups: resolve a state from (P, h), (P, s), (T, v) or (h, s) directly
+# on the tables instead of iterating Read_Tables over T.
+
+P_COL, T_COL = 'P (MPa)', 'T (°C)'
+V_COL, RHO_COL = 'Specific Volume (m^3/kg)', 'Density (kg/m^3)'
+U_COL, H_COL, S_COL = 'Internal Energy (kJ/kg)', 'Enthalpy (kJ/kg)', 'Entropy [kJ/(kg K)]'
+
+_PROP_COL = {'v': V_COL, 'u': U_COL, 'h': H_COL, 's': S_COL}
+_PAIRS = ({'P', 'h'}, {'P', 's'}, {'T', 'v'}, {'h', 's'})
+
+_CHUNK = 4096
+_REFINE = 60   # cap on the regula falsi steps on P for (h, s)
+_NEWTON = 8    # Newton steps polishing a single-phase state on 'pchip' tables
+
+
+def _bisect_many(keys, x, a, b):
+    # bisect_left of x inside keys[a:b], with a and b given per query
+    lo, hi = np.array(a, dtype=np.intp), np.array(b, dtype=np.intp)
+    while True:
+        act = lo < hi
+        if not act.any():
+            return lo
+        mid = (lo + hi) // 2
+        right = act & (keys[np.where(act, mid, a)] < x)
+        lo = np.where(right, mid + 1, lo)
+        hi = np.where(act & ~right, mid, hi)
+
+def _bisect_fn_many(G, y, a, b):
+    # _bisect_many over positions of non-decreasing functions; G(r, p) gives the
+    # values of queries r at positions p and only runs on unresolved queries
+    lo, hi = np.array(a, dtype=np.intp), np.array(b, dtype=np.intp)
+    while True:
+        act = np.flatnonzero(lo < hi)
+        if not len(act):
+            return lo
+        mid = (lo[act] + hi[act]) // 2
+        right = G(act, mid) < y[act]
+        lo[act[right]] = mid[right] + 1
+        hi[act[~right]] = mid[~right]
+
+def _bracket_segments(keys, x, a, b):
+    # _interp_row_1d bracketing and clamping on per-query slices keys[a:b];
+    # returns positions lo, hi in keys and the weight
+    pos, last = _bisect_many(keys, x, a, b), b - 1
+    edge_lo = (b - a == 1) | _isclose_many(keys[a], keys[last]) | (x <= keys[a])
+    edge_hi = ~edge_lo & (x >= keys[last])
+    lo = np.where(edge_lo, a, np.where(edge_hi, last, pos - 1))
+    hi = np.where(edge_lo | edge_hi, lo, pos)
+    hi = np.where(_isclose_many(keys[hi] - keys[lo], 0.0), lo, hi)
+    same = hi == lo
+    w = np.where(same, 0.0, (x - keys[lo]) / np.where(same, 1.0, keys[hi] - keys[lo]))
+    return lo, hi, w
+
+def _rows(tab, lo, hi, w):
+    d = tab.data
+    return d[:, lo] + w*(d[:, hi] - d[:, lo])
+
+def _sat_matrix(tab, sat, x, P, T, n):
+    # Superheated-table columns for saturated states mixed at quality x
+    E = np.full((len(tab.numeric), n), np.nan)
+    for k, col in _PROP_COL.items():
+        f, g = _tables._LIQ_VAP[k]
+        if col in tab.col and f in sat and g in sat:
+            E[tab.col[col]] = (1 - x)*sat[f] + x*sat[g]
+    if RHO_COL in tab.col and V_COL in tab.col:
+        E[tab.col[RHO_COL]] = 1.0 / E[tab.col[V_COL]]
+    E[tab.col[P_COL]] = P
+    E[tab.col[T_COL]] = T
+    return E
+
+def _finish(tab, M, phase, x):
+    out = {name: M[i] for i, name in enumerate(tab.numeric)}
+    out['Phase'] = phase
+    out['x'] = x
+    return out
+
+
+def _mixture(tab, sat, y, prop, P, T):
+    # States inside the dome for the saturation rows `sat`; NaN x elsewhere
+    f, g = _tables._LIQ_VAP[prop]
+    vf, vg = sat[f], sat[g]
+    inside = (vg > vf) & (y >= vf) & (y <= vg)
+    x = np.where(inside, (y - vf) / np.where(vg > vf, vg - vf, 1.0), np.nan)
+    return inside, x, _sat_matrix(tab, sat, np.where(inside, x, 0.0), P, T, len(y))
+
+
+def _along_isobar(ts, P, y, inv):
+    # Single-phase (P, prop). At fixed P the forward lookup is piecewise linear
+    # in T with breaks at the nodes of the two bracketing isobars and, in a cell
+    # that straddles the dome, a jump at the interpolated saturation
+    # temperature. The bracket from the single-isobar roots is narrowed by
+    # bisection over the nodes of each isobar, then across the dome break, and
+    # the last segment is inverted linearly, so the result round-trips through
+    # Read_Tables(T=..., P=...).
+    tab, idx = ts.SC_tab, ts.SC_index
+    k_lo, k_hi, wP = idx.bracket_many(P)
+    n, r = len(P), np.arange(len(P))
+    Tcol, keys = tab.data[tab.col[T_COL]], tab.keys
+    def F(r, T):
+        return _bilinear_superheated_batch(tab, idx, T, P[r], (inv.prop,))[inv.prop]
+    def F2(T1, T2):
+        return F(np.r_[r, r], np.r_[T1, T2]).reshape(2, n)
+
+    roots = []
+    for k in (k_lo, k_hi):
+        lo, hi, w = _bracket_segments(inv.keys, y, inv.starts[k], inv.ends[k])
+        roots.append(Tcol[inv.rows[lo]] + w*(Tcol[inv.rows[hi]] - Tcol[inv.rows[lo]]))
+    # The roots bound the answer unless a branch is extended across the dome
+    t1, t2 = np.minimum(*roots), np.maximum(*roots)
+    f1, f2 = F2(t1, t2)
+    t1 = np.where(f1 > y, np.minimum(idx.T_min[k_lo], idx.T_min[k_hi]), t1)
+    t2 = np.where(f2 < y, np.maximum(idx.T_max[k_lo], idx.T_max[k_hi]), t2)
+
+    for k in (k_lo, k_hi):
+        a, b = idx.starts[k], idx.ends[k]
+        ja = _bisect_many(keys, np.nextafter(t1, np.inf), a, b)
+        jb = np.maximum(_bisect_many(keys, t2, a, b), ja)
+        j = _bisect_fn_many(lambda r, p: F(r, keys[p]), y, ja, jb)
+        t1 = np.where(j > ja, keys[np.maximum(j - 1, 0)], t1)
+        t2 = np.where(j < jb, keys[np.minimum(j, len(keys) - 1)], t2)
+
+    # y inside the jump at the dome break has no exact preimage (the cell's
+    # interpolated saturation temperature lies off the true one); the state
+    # goes to the nearer side and that side's segment is extended linearly
+    Ts = idx.T_sat[k_lo] + wP*(idx.T_sat[k_hi] - idx.T_sat[k_lo])
+    dome = np.flatnonzero((k_lo != k_hi) & (t1 < Ts) & (Ts < t2))
+    jump = np.zeros(n, dtype=bool)
+    if len(dome):
+        yd, Td = y[dome], Ts[dome]
+        fl, fv = F(np.r_[dome, dome], np.r_[Td, np.nextafter(Td, np.inf)]).reshape(2, -1)
+        jump[dome] = (fl < yd) & (yd < fv)
+        liquid = (fl >= yd) | ((fv > yd) & (yd - fl <= fv - yd))
+        t2[dome[liquid]] = Td[liquid]
+        t1[dome[~liquid]] = np.nextafter(Td[~liquid], np.inf)
+
+    # Right limit at t1: an isobar's own saturation node is a jump too
+    f1, f2 = F2(np.nextafter(t1, np.inf), t2)
+    flat = ~(f2 > f1)
+    w = np.where(flat, 0.0, (y - f1) / np.where(flat, 1.0, f2 - f1))
+    w = np.where(jump, w, np.clip(w, 0.0, 1.0))
+    out = _bilinear_superheated_batch(tab, idx, t1 + w*(t2 - t1), P)
+    M = np.vstack([out[name] for name in tab.numeric])
+    phase = out['Phase'] if 'Phase' in out else np.full(n, None, dtype=object)
+    j = np.flatnonzero(jump)
+    if len(j):
+        R1, R2 = (_bilinear_superheated_batch(tab, idx, t[j], P[j]) for t in (t1, t2))
+        for i, name in enumerate(tab.numeric):
+            M[i, j] = R1[name] + w[j]*(R2[name] - R1[name])
+        if 'Phase' in out:
+            phase[j] = np.where(t2[j] == Ts[j], R2['Phase'], R1['Phase'])
+    M[tab.col[inv.prop]] = y
+    return M, phase
+
+
+def _tv_chunk(ts, T, v):
+    tab, idx = ts.SC_tab, ts.SC_index
+    n, K = len(T), len(idx)
+    sat = _interp_rows_1d(ts.T_tab, T_COL, T, slopes=ts.T_slopes)
+    Psat = sat.get(P_COL, np.full(n, np.nan))
+    inside, x, M = _mixture(tab, sat, v, 'v', Psat, T)
+    phase = np.full(n, 'saturated mixture', dtype=object)
+
+    f, g = _tables._LIQ_VAP['v']
+    subcrit = (T < ts.T_tab.keys[-1]) & (sat[g] > sat[f])
+    vapor = subcrit & (v > sat[g])
+    liquid = subcrit & ~vapor
+    Vcol = tab.data[tab.col[V_COL]]
+    labels = tab.labels['Phase'] if 'Phase' in tab.labels else np.full(len(tab), None, dtype=object)
+    seg = lambda r, k: _bracket_segments(tab.keys, T[r], idx.starts[k], idx.ends[k])
+
+    # Isobars on the vapor side of the dome at T (T_sat rises with P; NaN
+    # above the critical pressure)
+    r = np.arange(n)
+    e = np.where(subcrit, np.searchsorted(np.where(np.isnan(idx.T_sat), np.inf, idx.T_sat), T), K)
+
+    # Each branch ends at the saturation state of T, or, when T falls between
+    # the saturation temperatures of two isobars, where the forward lookup
+    # crosses the dome inside that cell: the isobar on the far side is
+    # extended along the state's branch there, and the sequence follows it
+    end = _sat_matrix(tab, sat, np.where(vapor, 1.0, 0.0), Psat, T, n)
+    end_P = Psat.copy()
+    end_lab = np.where(vapor, 'saturated vapor', 'saturated liquid').astype(object)
+    ka, kb = np.maximum(e - 1, 0), np.minimum(e, K - 1)
+    cell = np.flatnonzero(subcrit & (e > 0) & (e < K) & ~np.isnan(idx.T_sat[ka]) & ~np.isnan(idx.T_sat[kb]))
+    if len(cell):
+        a, b, liq = ka[cell], kb[cell], liquid[cell]
+        wc = (T[cell] - idx.T_sat[a]) / (idx.T_sat[b] - idx.T_sat[a])
+        (l0, l1), (v0, v1) = idx.branch_end_many(a, True), idx.branch_end_many(b, False)
+        r0, r1 = np.where(liq, l0, v0), np.where(liq, l1, v1)
+        xs = tab.keys
+        ext = _rows(tab, r0, r1, (T[cell] - xs[r0]) / (xs[r1] - xs[r0]))
+        lo, hi, w = seg(cell, np.where(liq, b, a))
+        row = _rows(tab, lo, hi, w)
+        E_lo, E_hi = np.where(liq, ext, row), np.where(liq, row, ext)
+        end[:, cell] = E_lo + wc*(E_hi - E_lo)
+        end_P[cell] = idx.levels[a] + wc*(idx.levels[b] - idx.levels[a])
+        end[tab.col[P_COL], cell] = end_P[cell]
+        end[tab.col[T_COL], cell] = T[cell]
+        end_lab[cell] = np.where(liq, labels[r0], labels[lo])
+    Vend = end[tab.col[V_COL]]
+
+    # Sequence in increasing P: the isobars, with the branch end inserted at
+    # position e (no insertion above the critical temperature); -v along it
+    # rises on each side of the dome
+    def G(r, p):
+        k = np.minimum(p - (p > e[r]), K - 1)
+        lo, hi, w = seg(r, k)
+        return np.where(p == e[r], -Vend[r], -(Vcol[lo] + w*(Vcol[hi] - Vcol[lo])))
+    first = np.where(liquid, e, 0)
+    last = np.where(vapor, e, np.where(subcrit, K, K - 1))
+
+    # Liquid v is flat in P to within the table's rounding: bisection takes
+    # the segment nearest the saturation end (lowest P on the liquid side,
+    # highest on the vapor side). Where the first liquid isobar holds more
+    # than the branch end (below the lowest isobar the forward lookup clamps
+    # to it), the search starts at that isobar.
+    y = -v
+    g_first, g_last = G(r, first), G(r, last)
+    down = liquid & (g_first > y) & (G(r, np.minimum(first + 1, last)) <= y)
+    start = first + down
+    j = _bisect_fn_many(G, np.where(vapor, np.nextafter(y, np.inf), y), start, last + 1)
+    found = (j > start) & (j <= last)
+    hit = down & (j == start)
+    near = np.where(np.abs(g_first - y) <= np.abs(g_last - y), first, last)
+    p0 = np.where(found, j - 1, np.where(hit, start, np.where(down, first, near)))
+    p1 = np.where(found, j, np.where(hit, start, np.where(down, first + 1, near)))
+    # v just above vf is both a mixture of negligible quality and a compressed
+    # liquid (the tables' liquid v and vf differ by their rounding); the liquid
+    # state is returned, as it round-trips through the forward lookup
+    inside &= ~(liquid & (down | found))
+
+    def point(p):
+        at = p == e
+        k = np.minimum(p - (p > e), K - 1)
+        lo, hi, w = seg(r, k)
+        R = np.where(at, end, _rows(tab, lo, hi, w))
+        return R, np.where(at, end_lab, labels[lo]), np.where(at, end_P, idx.levels[k])
+
+    (R0, lab0, P0), (R1, _, P1) = point(p0), point(p1)
+    g0, g1 = G(r, p0), G(r, p1)
+    wq = np.where(g1 != g0, (y - g0) / np.where(g1 != g0, g1 - g0, 1.0), 0.0)
+    S = R0 + wq*(R1 - R0)
+    S[tab.col[P_COL]] = P0 + wq*(P1 - P0)
+    S[tab.col[T_COL]] = T
+    S[tab.col[V_COL]] = v
+    if RHO_COL in tab.col:
+        S[tab.col[RHO_COL]] = 1.0 / v
+
+    M = np.where(inside, M, S)
+    phase = np.where(inside, phase, lab0)
+    return _finish(tab, M, phase, np.where(inside, x, np.nan))
+
+
+def _hs_dome(ts, h, s):
+    ttab = ts.T_tab
+    n = len(h)
+    # Dome: along the saturation line, s at fixed h falls as T rises. Rows where
+    # h lies between hf and hg form one interval; the root is searched there.
+    hf, hg = (ttab.column(c) for c in _tables._LIQ_VAP['h'])
+    sf, sg = (ttab.column(c) for c in _tables._LIQ_VAP['s'])
+    ok = hg > hf
+    hf, hg, sf, sg, Tn = hf[ok], hg[ok], sf[ok], sg[ok], ttab.keys[ok]
+    xq = (h[:, None] - hf) / (hg - hf)
+    valid = (xq >= 0) & (xq <= 1)
+    r = np.arange(n)
+    r1 = valid.argmax(axis=1)
+    r2 = len(Tn) - 1 - valid[:, ::-1].argmax(axis=1)
+    col = np.arange(len(Tn))
+    phi = sf + xq*(sg - sf) - s[:, None]
+    phi = np.where(col < r1[:, None], np.inf, np.where(col > r2[:, None], -np.inf, phi))
+    j = np.clip((phi > 0).sum(axis=1), r1 + 1, np.maximum(r2, r1 + 1))
+    j = np.minimum(j, len(Tn) - 1)
+    a, b = phi[r, j - 1], phi[r, j]
+    found = valid.any(axis=1) & (r2 > r1) & (phi[r, r1] >= 0) & (phi[r, r2] <= 0)
+    flat = ~np.isfinite(a - b) | _isclose_many(a, b)
+    wt = np.where(flat, 0.0, a / np.where(flat, 1.0, a - b))
+    Tq = Tn[j - 1] + np.clip(wt, 0.0, 1.0)*(Tn[j] - Tn[j - 1])
+    return found, Tq
+
+
+def _hs_cell(ts, h, s, T, P):
+    # (P, T) solving h and s exactly in the cell of the forward lookup that
+    # holds (T, P): with the node rows fixed, h and s are bilinear in T and P,
+    # which leaves a quadratic in T. In a cell across the dome the isobar on
+    # the far side is its branch extension, as in the forward lookup. P is
+    # NaN where the root leaves the cell or T is clamped on either isobar.
+    tab, idx = ts.SC_tab, ts.SC_index
+    k_lo, k_hi, wP = idx.bracket_many(P)
+    s_lo, s_hi = idx.side_many(k_lo, T), idx.side_many(k_hi, T)
+    cross = (s_lo != 0) & (s_hi != 0) & (s_lo != s_hi)
+    liquid = T <= idx.T_sat[k_lo] + wP*(idx.T_sat[k_hi] - idx.T_sat[k_lo])
+    ok = k_lo != k_hi
+    xs, d = tab.keys, tab.data
+    coef, Tlo, Thi = [], np.full(len(T), -np.inf), np.full(len(T), np.inf)
+    for k, on, liq in ((k_lo, cross & liquid, True), (k_hi, cross & ~liquid, False)):
+        lo, hi, w = _bracket_segments(xs, T, idx.starts[k], idx.ends[k])
+        ok &= (hi > lo) | on
+        Tlo = np.where(on, Tlo, np.maximum(Tlo, xs[lo]))
+        Thi = np.where(on, Thi, np.minimum(Thi, xs[hi]))
+        r0, r1 = idx.branch_end_many(k, liq)
+        lo, hi = np.where(on, r0, lo), np.where(on, r1, hi)
+        span = np.where(hi > lo, xs[hi] - xs[lo], 1.0)
+        w = np.where(on, (T - xs[lo]) / span, w)
+        for col in (S_COL, H_COL):
+            c = d[tab.col[col]]
+            coef.append((c[lo] + w*(c[hi] - c[lo]), (c[hi] - c[lo]) / span))
+    (As, as_), (Ah, ah), (Bs, bs), (Bh, bh) = coef
+    # s = A + wP (B - A) and h likewise, A and B linear in t = T' - T
+    c0 = (h - Ah)*(Bs - As) - (s - As)*(Bh - Ah)
+    c1 = (h - Ah)*(bs - as_) - ah*(Bs - As) - (s - As)*(bh - ah) + as_*(Bh - Ah)
+    c2 = as_*(bh - ah) - ah*(bs - as_)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        q = -0.5*(c1 + np.copysign(np.sqrt(c1*c1 - 4*c2*c0), c1))
+        t = c0 / q
+        A, B = As + as_*t, Bs + bs*t
+        wP = (s - A) / (B - A)
+    ok &= (Tlo <= T + t) & (T + t <= Thi) & (wP >= 0) & (wP <= 1)
+    return np.where(ok, idx.levels[k_lo] + wP*(idx.levels[k_hi] - idx.levels[k_lo]), np.nan), T + t
+
+
+def _hs_refine(ts, inv, h, s, Pa, Pb, fa, fb):
+    # Illinois regula falsi on P between isobar brackets, with (P, s) lookups
+    # until h is met; returns the rows, phases, P and whether the forward
+    # lookup gives h and s back. A step that stays inside the bracket is
+    # taken from the exact solution in the current cell instead (not twice
+    # in a row); that solution is kept outright when the forward lookup gives
+    # h and s back, so most states take one (P, s) lookup.
+    tab, n = ts.SC_tab, len(h)
+    Pa, Pb, fa, fb = Pa.copy(), Pb.copy(), fa.copy(), fb.copy()
+    Pq = np.where(fb != fa, Pa - fa*(Pb - Pa)/np.where(fb != fa, fb - fa, 1.0), 0.5*(Pa + Pb))
+    tol_h, tol_s = 1e-9*np.maximum(1.0, np.abs(h)), 1e-9*np.maximum(1.0, np.abs(s))
+    S, lab = np.empty((len(tab.numeric), n)), np.full(n, None, dtype=object)
+    last = np.zeros(n, dtype=np.int8)   # end moved on the previous step
+    cell = np.zeros(n, dtype=bool)      # previous step came from _hs_cell
+    act = np.arange(n)
+    for it in range(_REFINE + 1):
+        S[:, act], lab[act] = _along_isobar(ts, Pq[act], s[act], inv)
+        f = S[tab.col[H_COL], act] - h[act]
+        go = (np.abs(f) > tol_h[act]) & (Pb[act] - Pa[act] > 1e-9*Pb[act])
+        act, f = act[go], f[go]
+        if not len(act) or it == _REFINE:
+            break
+        left = np.signbit(f) == np.signbit(fa[act])
+        a, b = act[left], act[~left]
+        fb[a[last[a] == 1]] *= 0.5; Pa[a] = Pq[a]; fa[a] = f[left]; last[a] = 1
+        fa[b[last[b] == -1]] *= 0.5; Pb[b] = Pq[b]; fb[b] = f[~left]; last[b] = -1
+        step = fb[act] - fa[act]
+        Pi = np.where(step != 0, Pa[act] - fa[act]*(Pb[act] - Pa[act])/np.where(step != 0, step, 1.0),
+                      0.5*(Pa[act] + Pb[act]))
+        Pc, Tc = _hs_cell(ts, h[act], s[act], S[tab.col[T_COL], act], Pq[act])
+        cell[act] = ~cell[act] & (Pa[act] < Pc) & (Pc < Pb[act])
+        Pq[act] = np.where(cell[act], Pc, Pi)
+        u = np.flatnonzero(cell[act])
+        if len(u):
+            R = _bilinear_superheated_batch(tab, ts.SC_index, Tc[u], Pc[u])
+            good = (np.abs(R[H_COL] - h[act[u]]) <= tol_h[act[u]]) & (np.abs(R[S_COL] - s[act[u]]) <= tol_s[act[u]])
+            g = act[u[good]]
+            S[:, g] = np.vstack([R[name][good] for name in tab.numeric])
+            S[tab.col[S_COL], g] = s[g]
+            if 'Phase' in R:
+                lab[g] = R['Phase'][good]
+            act = np.setdiff1d(act, g)
+    back = _bilinear_superheated_batch(tab, ts.SC_index, S[tab.col[T_COL]], Pq, (H_COL, S_COL))
+    conv = (np.abs(back[H_COL] - h) <= tol_h) & (np.abs(back[S_COL] - s) <= tol_s)
+    return S, lab, Pq, conv
+
+
+def _hs_chunk(ts, h, s):
+    tab, idx = ts.SC_tab, ts.SC_index
+    ttab = ts.T_tab
+    n, K = len(h), len(idx)
+
+    # Single phase: at fixed s, h rises with P. Bracket between isobars first,
+    # then refine P with (P, s) lookups
+    inv = ts.SC_inverse[S_COL]
+    Hcol = tab.data[tab.col[H_COL]]
+    def Hk(r, k):
+        lo, hi, w = _bracket_segments(inv.keys, s[r], inv.starts[k], inv.ends[k])
+        lo, hi = inv.rows[lo], inv.rows[hi]
+        return Hcol[lo] + w*(Hcol[hi] - Hcol[lo])
+    # Liquid isobars at low P lie within table rounding of each other, so h is
+    # not always monotone across them: where bisection finds no bracket, the
+    # first sign change does
+    r = np.arange(n)
+    j = _bisect_fn_many(Hk, h, np.zeros(n, dtype=np.intp), np.full(n, K))
+    inner = (j < K) & ((j > 0) | (Hk(r, np.zeros(n, dtype=np.intp)) == h))
+    p0 = np.maximum(j - 1, 0)
+    ok = inner.copy()
+    miss = np.flatnonzero(~inner)
+    if len(miss):
+        kk = np.broadcast_to(np.arange(K), (len(miss), K))
+        fk = Hk(np.repeat(miss, K), kk.ravel()).reshape(-1, K) - h[miss, None]
+        change = np.signbit(fk[:, :-1]) != np.signbit(fk[:, 1:])
+        ok[miss] = change.any(axis=1)
+        p0[miss] = change.argmax(axis=1)
+    c = np.flatnonzero(ok)
+    S, lab = np.full((len(tab.numeric), n), np.nan), np.full(n, None, dtype=object)
+    Pq, conv = np.full(n, np.nan), np.zeros(n, dtype=bool)
+    # Node values run straight across each isobar's dome jump while the
+    # lookups land on one of its ends, so a root next to a saturation node can
+    # sit one cell off: rows that miss try the cell above, then the one below,
+    # bracketed by lookups at its nodes
+    for shift in (0, 1, -1):
+        t = c[~conv[c] & (p0[c] + shift >= 0) & (p0[c] + shift + 1 < K)]
+        Pa, Pb = idx.levels[p0[t] + shift], idx.levels[p0[t] + shift + 1]
+        if not len(t):
+            continue
+        if shift:
+            fa = _along_isobar(ts, Pa, s[t], inv)[0][tab.col[H_COL]] - h[t]
+            fb = _along_isobar(ts, Pb, s[t], inv)[0][tab.col[H_COL]] - h[t]
+            keep = np.signbit(fa) != np.signbit(fb)
+            t, Pa, Pb, fa, fb = t[keep], Pa[keep], Pb[keep], fa[keep], fb[keep]
+        else:
+            fa, fb = Hk(t, p0[t]) - h[t], Hk(t, p0[t] + 1) - h[t]
+        if len(t):
+            S[:, t], lab[t], Pq[t], conv[t] = _hs_refine(ts, inv, h[t], s[t], Pa, Pb, fa, fb)
+
+    # A single-phase answer counts only where the forward lookup gives h and s
+    # back; otherwise the dome state, and NaN where neither exists (out of
+    # the tables, or the iteration did not converge). On 'pchip' tables the
+    # iterate is only a start and the Newton polish decides.
+    single = conv
+    S[tab.col[H_COL]] = h
+    if ts.SC_slopes is not None:
+        c = np.flatnonzero(ok)
+        trial = _finish(tab, S[:, c], lab[c], np.full(len(c), np.nan))
+        single = np.zeros(n, dtype=bool)
+        single[c] = _pchip_refine(ts, {'h': h[c], 's': s[c]}, trial)
+        S[:, c] = np.vstack([trial[name] for name in tab.numeric])
+        lab[c] = trial['Phase']
+
+    # The dome, for the rest
+    d = np.flatnonzero(~single)
+    inside, x, D = np.zeros(n, dtype=bool), np.full(n, np.nan), np.full((len(tab.numeric), n), np.nan)
+    if len(d):
+        found, Tq = _hs_dome(ts, h[d], s[d])
+        sat = _interp_rows_1d(ttab, T_COL, Tq)
+        inside[d], x[d], D[:, d] = _mixture(tab, sat, h[d], 'h', sat.get(P_COL, np.full(len(d), np.nan)), Tq)
+        inside[d] &= found
+    M = np.where(single, S, np.where(inside, D, np.nan))
+    phase = np.where(single, lab, np.where(inside, 'saturated mixture', None))
+    return _finish(tab, M, phase, np.where(~single & inside, x, np.nan))
+
+
+def _ph_chunk(ts, P, y, prop):
+    tab = ts.SC_tab
+    sat = _interp_rows_1d(ts.P_tab, P_COL, P, slopes=ts.P_slopes)
+    inside, x, M = _mixture(tab, sat, y, prop, P, sat.get(T_COL, np.full(len(P), np.nan)))
+    inside &= P <= ts.P_tab.keys[-1]
+    S, lab = _along_isobar(ts, P, y, ts.SC_inverse[_PROP_COL[prop]])
+    M = np.where(inside, M, S)
+    phase = np.where(inside, 'saturated mixture', lab).astype(object)
+    return _finish(tab, M, phase, np.where(inside, x, np.nan))
+
+
+def _pchip_refine(ts, given, out):
+    # On 'pchip' tables the forward surface is cubic along T, so the chunk
+    # functions (linear in T on single-phase rows) only give a starting point.
+    # Newton steps on the analytic derivatives then move T, P or both until the
+    # given properties round-trip through Read_Tables; a row that does not
+    # converge, or lands on the other side of the dome, keeps its start.
+    # Returns the mask of rows that converged.
+    tab, idx = ts.SC_tab, ts.SC_index
+    good = np.zeros(len(out[T_COL]), dtype=bool)
+    rows = np.flatnonzero(np.isnan(out['x']) & ~np.isnan(out[T_COL]) & ~np.isnan(out[P_COL]))
+    if not len(rows):
+        return good
+    targets = {_PROP_COL[k]: val[rows] for k, val in given.items() if k in _PROP_COL}
+    cols = tuple(targets)
+    free = [c for c in (T_COL, P_COL) if c[0] not in given]
+    X = {c: out[c][rows].copy() for c in free}
+    bounds = {T_COL: (tab.keys.min(), tab.keys.max()), P_COL: (idx.levels[0], idx.levels[-1])}
+    fixed = {c: given[c[0]][rows] for c in (T_COL, P_COL) if c[0] in given}
+
+    done, stuck = np.zeros(len(rows), dtype=bool), np.zeros(len(rows), dtype=bool)
+    for it in range(_NEWTON + 1):
+        act = np.flatnonzero(~done & ~stuck)
+        if not len(act):
+            break
+        TP = {c: (X[c] if c in X else fixed[c])[act] for c in (T_COL, P_COL)}
+        F, dT, dP = _bilinear_superheated_batch(tab, idx, TP[T_COL], TP[P_COL], cols,
+                                                slopes=ts.SC_slopes, deriv=True)
+        r = [F[c] - targets[c][act] for c in cols]
+        conv = np.all([np.abs(ri) <= 1e-10*np.maximum(1.0, np.abs(targets[c][act])) for ri, c in zip(r, cols)], axis=0)
+        done[act[conv]] = True
+        if it == _NEWTON:
+            break
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if len(free) == 1:
+                steps = {free[0]: r[0] / (dT if free[0] == T_COL else dP)[cols[0]]}
+            else:
+                a, b, c, d = dT[cols[0]], dP[cols[0]], dT[cols[1]], dP[cols[1]]
+                det = a*d - b*c
+                steps = {T_COL: (r[0]*d - b*r[1]) / det, P_COL: (a*r[1] - c*r[0]) / det}
+        bad = ~conv & ~np.all([np.isfinite(st) for st in steps.values()], axis=0)
+        stuck[act[bad]] = True
+        go = act[~conv & ~bad]
+        for col, st in steps.items():
+            X[col][go] = np.clip(X[col][go] - st[~conv & ~bad], *bounds[col])
+
+    ok = np.flatnonzero(done)
+    if not len(ok):
+        return good
+    TP = {c: (X[c] if c in X else fixed[c])[ok] for c in (T_COL, P_COL)}
+    new = _bilinear_superheated_batch(tab, idx, TP[T_COL], TP[P_COL], slopes=ts.SC_slopes)
+    if 'Phase' in new:
+        keep = np.asarray(new['Phase'] == out['Phase'][rows[ok]], dtype=bool)
+        ok, new = ok[keep], {col: vals[keep] for col, vals in new.items()}
+    for name in tab.numeric:
+        out[name][rows[ok]] = new[name]
+    for col in cols:
+        out[col][rows[ok]] = targets[col][ok]
+    if V_COL in targets and RHO_COL in out:
+        out[RHO_COL][rows[ok]] = 1.0 / targets[V_COL][ok]
+    good[rows[ok]] = True
+    return good
+
+
+# Single-state paths: the same steps as the chunk functions above on plain
+# floats with bisect, so one inverse lookup costs a few forward lookups.
+
+def _bracket_list(keys, x, a, b):
+    last = b - 1
+    if b - a == 1 or _isclose(keys[a], keys[last]) or x <= keys[a]:
+        return a, a, 0.0
+    if x >= keys[last]:
+        return last, last, 0.0
+    hi = bisect_left(keys, x, a, b)
+    lo = hi - 1
+    if _isclose(keys[hi] - keys[lo], 0.0):
+        return lo, lo, 0.0
+    return lo, hi, (x - keys[lo]) / (keys[hi] - keys[lo])
+
+def _bisect_fn(G, y, a, b):
+    # bisect_left over positions a..b-1 of a non-decreasing function G
+    while a < b:
+        mid = (a + b) // 2
+        if G(mid) < y:
+            a = mid + 1
+        else:
+            b = mid
+    return a
+
+def _mix_one(tab, sat, x, P, T):
+    out = dict.fromkeys(tab.numeric, np.nan)
+    for k, col in _PROP_COL.items():
+        f, g = _tables._LIQ_VAP[k]
+        if col in tab.col and f in sat and g in sat:
+            out[col] = (1 - x)*sat[f] + x*sat[g]
+    if RHO_COL in tab.col and V_COL in tab.col:
+        out[RHO_COL] = 1.0 / out[V_COL]
+    out[P_COL] = P; out[T_COL] = T
+    return out
+
+def _inside_one(tab, sat, y, prop, P, T):
+    f, g = _tables._LIQ_VAP[prop]
+    if f not in sat or g not in sat or not (sat[g] > sat[f] and sat[f] <= y <= sat[g]):
+        return None
+    x = (y - sat[f]) / (sat[g] - sat[f])
+    out = _mix_one(tab, sat, x, P, T)
+    out['Phase'] = 'saturated mixture'; out['x'] = x
+    return out
+
+
+def _along_isobar_one(ts, P, y, inv, col=None):
+    # With col, only T and that column of the state (the (h, s) refinement)
+    tab, idx = ts.SC_tab, ts.SC_index
+    Ts, keys = tab.keylist, inv.keylist
+    k_lo, k_hi, wP = idx.bracket(P)
+    seen = {}
+    def F(T):
+        if T not in seen:
+            seen[T] = _bilinear_value(tab, idx, inv.prop, T, P)
+        return seen[T]
+
+    roots = []
+    for k in (k_lo, k_hi):
+        lo, hi, w = _bracket_list(keys, y, int(inv.starts[k]), int(inv.ends[k]))
+        t0, t1 = Ts[inv.rows[lo]], Ts[inv.rows[hi]]
+        roots.append(t0 + w*(t1 - t0))
+    t1, t2 = min(roots), max(roots)
+    if F(t1) > y:
+        t1 = float(min(idx.T_min[k_lo], idx.T_min[k_hi]))
+    if F(t2) < y:
+        t2 = float(max(idx.T_max[k_lo], idx.T_max[k_hi]))
+
+    for k in (k_lo, k_hi):
+        a, b = idx.slice(k)
+        ja = bisect_right(Ts, t1, a, b)
+        jb = max(bisect_left(Ts, t2, a, b), ja)
+        j = _bisect_fn(lambda p: F(Ts[p]), y, ja, jb)
+        if j > ja:
+            t1 = Ts[j - 1]
+        if j < jb:
+            t2 = Ts[j]
+
+    T_sat, jump = float(idx.T_sat[k_lo] + wP*(idx.T_sat[k_hi] - idx.T_sat[k_lo])), False
+    if k_lo != k_hi and t1 < T_sat < t2:
+        T_vap = float(np.nextafter(T_sat, np.inf))
+        fl, fv = F(T_sat), F(T_vap)
+        jump = fl < y < fv
+        if fl >= y or (fv > y and y - fl <= fv - y):
+            t2 = T_sat
+        else:
+            t1 = T_vap
+
+    f1, f2 = F(float(np.nextafter(t1, np.inf))), F(t2)
+    w = (y - f1) / (f2 - f1) if f2 > f1 else 0.0
+    if col is not None:
+        V = lambda T: _bilinear_value(tab, idx, col, T, P)
+        if jump:
+            v1 = V(t1)
+            return t1 + w*(t2 - t1), v1 + w*(V(t2) - v1)
+        T = t1 + min(max(w, 0.0), 1.0)*(t2 - t1)
+        return T, V(T)
+    if jump:
+        R1, R2 = (_bilinear_superheated(tab, idx, t, P) for t in (t1, t2))
+        out = dict(R2 if t2 == T_sat else R1)
+        for name in tab.numeric:
+            out[name] = R1[name] + w*(R2[name] - R1[name])
+    else:
+        out = _bilinear_superheated(tab, idx, t1 + min(max(w, 0.0), 1.0)*(t2 - t1), P)
+    out[inv.prop] = y
+    out['x'] = np.nan
+    return out
+
+
+def _ph_one(ts, P, y, prop):
+    tab = ts.SC_tab
+    if P <= ts.P_tab.keylist[-1]:
+        sat = _interp_row_1d(ts.P_tab, P_COL, P)
+        out = _inside_one(tab, sat, y, prop, P, sat.get(T_COL, np.nan))
+        if out is not None:
+            return out
+    return _along_isobar_one(ts, P, y, ts.SC_inverse[_PROP_COL[prop]])
+
+
+def _tv_one(ts, T, v):
+    tab, idx = ts.SC_tab, ts.SC_index
+    K, xs = len(idx), tab.keylist
+    sat = _interp_row_1d(ts.T_tab, T_COL, T)
+    Psat = sat.get(P_COL, np.nan)
+    mix = _inside_one(tab, sat, v, 'v', Psat, T)
+
+    f, g = _tables._LIQ_VAP['v']
+    subcrit = T < ts.T_tab.keylist[-1] and sat[g] > sat[f]
+    vapor = subcrit and v > sat[g]
+    liquid = subcrit and not vapor
+    Vcol = tab.data[tab.col[V_COL]]
+    labels = tab.labels.get('Phase')
+    label = lambda i: None if labels is None else labels[i]
+    seg = lambda k: _bracket_list(xs, T, int(idx.starts[k]), int(idx.ends[k]))
+    e = _bisect_fn(lambda k: idx.T_sat[k], T, 0, K) if subcrit else K
+
+    # Same branch end, sequence and segment choice as _tv_chunk
+    end = _sat_matrix(tab, sat, 1.0 if vapor else 0.0, Psat, T, 1)[:, 0]
+    end_P, end_lab = Psat, 'saturated vapor' if vapor else 'saturated liquid'
+    if subcrit and 0 < e < K and not (np.isnan(idx.T_sat[e - 1]) or np.isnan(idx.T_sat[e])):
+        a, b = e - 1, e
+        wc = (T - idx.T_sat[a]) / (idx.T_sat[b] - idx.T_sat[a])
+        r0, r1 = idx.branch_end(a, True) if liquid else idx.branch_end(b, False)
+        ext = _rows(tab, r0, r1, (T - xs[r0]) / (xs[r1] - xs[r0]))
+        lo, hi, w = seg(b if liquid else a)
+        row = _rows(tab, lo, hi, w)
+        E_lo, E_hi = (ext, row) if liquid else (row, ext)
+        end = E_lo + wc*(E_hi - E_lo)
+        end_P = idx.levels[a] + wc*(idx.levels[b] - idx.levels[a])
+        end[tab.col[P_COL]] = end_P
+        end[tab.col[T_COL]] = T
+        end_lab = label(r0 if liquid else lo)
+    Vend = end[tab.col[V_COL]]
+
+    seen = {}
+    def G(p):
+        if p not in seen:
+            if p == e:
+                seen[p] = -Vend
+            else:
+                lo, hi, w = seg(min(p - (p > e), K - 1))
+                seen[p] = -(Vcol[lo] + w*(Vcol[hi] - Vcol[lo]))
+        return seen[p]
+    first = e if liquid else 0
+    last = e if vapor else (K if subcrit else K - 1)
+
+    y = -v
+    if mix is not None and not liquid:
+        return mix
+    down = liquid and G(first) > y and G(min(first + 1, last)) <= y
+    start = first + down
+    j = _bisect_fn(G, float(np.nextafter(y, np.inf)) if vapor else y, start, last + 1)
+    found = start < j <= last
+    if mix is not None and not (down or found):
+        return mix
+    if found:
+        p0, p1 = j - 1, j
+    elif down:
+        p0, p1 = (start, start) if j == start else (first, first + 1)
+    else:
+        p0 = p1 = first if abs(G(first) - y) <= abs(G(last) - y) else last
+
+    def point(p):
+        if p == e:
+            return end, end_lab, end_P
+        k = min(p - (p > e), K - 1)
+        lo, hi, w = seg(k)
+        return _rows(tab, lo, hi, w), label(lo), idx.levels[k]
+
+    (R0, lab0, P0), (R1, _, P1) = point(p0), point(p1)
+    g0, g1 = G(p0), G(p1)
+    wq = (y - g0) / (g1 - g0) if g1 != g0 else 0.0
+    S = R0 + wq*(R1 - R0)
+    S[tab.col[P_COL]] = P0 + wq*(P1 - P0)
+    S[tab.col[T_COL]] = T
+    S[tab.col[V_COL]] = v
+    if RHO_COL in tab.col:
+        S[tab.col[RHO_COL]] = 1.0 / v
+    out = dict(zip(tab.numeric, S.tolist()))
+    out['Phase'] = lab0; out['x'] = np.nan
+    return out
+
+
+def _hs_cell_one(ts, h, s, T, P):
+    tab, idx = ts.SC_tab, ts.SC_index
+    k_lo, k_hi, wP = idx.bracket(P)
+    if k_lo == k_hi:
+        return None
+    ext = None
+    if idx.crossing(k_lo, k_hi, T):
+        liquid = T <= idx.T_sat[k_lo] + wP*(idx.T_sat[k_hi] - idx.T_sat[k_lo])
+        ext = k_lo if liquid else k_hi
+    xs, d = tab.keylist, tab.data
+    coef, Tlo, Thi = [], -math.inf, math.inf
+    for k in (k_lo, k_hi):
+        if k == ext:
+            lo, hi = idx.branch_end(k, k == k_lo)
+            w = (T - xs[lo]) / (xs[hi] - xs[lo])
+        else:
+            lo, hi, w = _bracket_list(xs, T, *idx.slice(k))
+            if hi == lo:
+                return None
+            Tlo, Thi = max(Tlo, xs[lo]), min(Thi, xs[hi])
+        for col in (S_COL, H_COL):
+            c = d[tab.col[col]]
+            coef.append((c[lo] + w*(c[hi] - c[lo]), (c[hi] - c[lo]) / (xs[hi] - xs[lo])))
+    (As, as_), (Ah, ah), (Bs, bs), (Bh, bh) = coef
+    c0 = (h - Ah)*(Bs - As) - (s - As)*(Bh - Ah)
+    c1 = (h - Ah)*(bs - as_) - ah*(Bs - As) - (s - As)*(bh - ah) + as_*(Bh - Ah)
+    c2 = as_*(bh - ah) - ah*(bs - as_)
+    disc = c1*c1 - 4*c2*c0
+    if not disc >= 0:
+        return None
+    q = -0.5*(c1 + math.copysign(math.sqrt(disc), c1))
+    if q == 0:
+        return None
+    t = c0 / q
+    A, B = As + as_*t, Bs + bs*t
+    if A == B:
+        return None
+    wP = (s - A) / (B - A)
+    if not (Tlo <= T + t <= Thi and 0 <= wP <= 1):
+        return None
+    return idx.levels[k_lo] + wP*(idx.levels[k_hi] - idx.levels[k_lo]), T + t
+
+
+def _hs_refine_one(ts, inv, h, s, Pa, Pb, fa, fb):
+    Pq = Pa - fa*(Pb - Pa)/(fb - fa) if fb != fa else 0.5*(Pa + Pb)
+    tol_h, tol_s = 1e-9*max(1.0, abs(h)), 1e-9*max(1.0, abs(s))
+    last, cell = 0, False
+    for it in range(_REFINE + 1):
+        Tq, f = _along_isobar_one(ts, Pq, s, inv, H_COL)
+        f -= h
+        if abs(f) <= tol_h or Pb - Pa <= 1e-9*Pb or it == _REFINE:
+            break
+        if (f < 0) == (fa < 0):
+            if last == 1:
+                fb *= 0.5
+            Pa, fa, last = Pq, f, 1
+        else:
+            if last == -1:
+                fa *= 0.5
+            Pb, fb, last = Pq, f, -1
+        Pc = None if cell else _hs_cell_one(ts, h, s, Tq, Pq)
+        cell = Pc is not None and Pa < Pc[0] < Pb
+        if cell:
+            Pq, Tc = Pc
+            out = _bilinear_superheated(ts.SC_tab, ts.SC_index, Tc, Pq)
+            if abs(out[H_COL] - h) <= tol_h and abs(out[S_COL] - s) <= tol_s:
+                out[H_COL], out[S_COL], out['x'] = h, s, np.nan
+                return out
+        else:
+            Pq = Pa - fa*(Pb - Pa)/(fb - fa) if fb != fa else 0.5*(Pa + Pb)
+    out = _along_isobar_one(ts, Pq, s, inv)
+    back = lambda col: _bilinear_value(ts.SC_tab, ts.SC_index, col, out[T_COL], Pq)
+    if abs(back(H_COL) - h) <= tol_h and abs(back(S_COL) - s) <= tol_s:
+        out[H_COL] = h
+        return out
+    return None
+
+
+def _hs_one(ts, h, s):
+    tab, idx = ts.SC_tab, ts.SC_index
+    inv = ts.SC_inverse[S_COL]
+    Hcol = tab.data[tab.col[H_COL]]
+    seen = {}
+    def Hk(k):
+        if k not in seen:
+            lo, hi, w = _bracket_list(inv.keylist, s, int(inv.starts[k]), int(inv.ends[k]))
+            lo, hi = inv.rows[lo], inv.rows[hi]
+            seen[k] = float(Hcol[lo] + w*(Hcol[hi] - Hcol[lo]))
+        return seen[k]
+
+    K = len(idx)
+    j = _bisect_fn(Hk, h, 0, K)
+    p0 = max(j - 1, 0) if j < K and (j > 0 or Hk(0) == h) else next((k for k in range(K - 1) if (Hk(k) < h) != (Hk(k + 1) < h)), None)
+    if p0 is not None:
+        # Same cell retries as _hs_chunk
+        for shift in (0, 1, -1):
+            q = p0 + shift
+            if q < 0 or q + 1 >= K:
+                continue
+            Pa, Pb = idx.levellist[q], idx.levellist[q + 1]
+            if shift:
+                fa = _along_isobar_one(ts, Pa, s, inv)[H_COL] - h
+                fb = _along_isobar_one(ts, Pb, s, inv)[H_COL] - h
+                if (fa < 0) == (fb < 0):
+                    continue
+            else:
+                fa, fb = Hk(q) - h, Hk(q + 1) - h
+            out = _hs_refine_one(ts, inv, h, s, Pa, Pb, fa, fb)
+            if out is not None:
+                return out
+
+    found, Tq = _hs_dome(ts, np.array([h]), np.array([s]))
+    if found[0]:
+        Tq = float(Tq[0])
+        sat = _interp_row_1d(ts.T_tab, T_COL, Tq)
+        out = _inside_one(tab, sat, h, 'h', sat.get(P_COL, np.nan), Tq)
+        if out is not None:
+            return out
+    out = dict.fromkeys(tab.numeric, np.nan)
+    out['Phase'] = None; out['x'] = np.nan
+    return out
+
+
+def _inverse_many(ts, cols):
+    n = len(next(iter(cols.values())))
+    parts = []
+    for i in range(0, max(n, 1), _CHUNK):
+        c = {k: a[i:i + _CHUNK] for k, a in cols.items()}
+        if 'T' in c:
+            part = _tv_chunk(ts, c['T'], c['v'])
+        elif 'P' in c:
+            prop = 'h' if 'h' in c else 's'
+            part = _ph_chunk(ts, c['P'], c[prop], prop)
+        else:
+            part = _hs_chunk(ts, c['h'], c['s'])    # polished inside
+        if ts.SC_slopes is not None and ('T' in c or 'P' in c):
+            _pchip_refine(ts, c, part)
+        parts.append(part)
+    return {col: np.concatenate([p[col] for p in parts]) for col in parts[0]}
+
+def _one_via_batch(ts, given):
+    # The Newton polish is vectorized only, so single states on 'pchip' tables
+    # take the batch path
+    out = _inverse_many(ts, {k: np.array([float(v)]) for k, v in given.items()})
+    return {col: vals[0].item() if vals.dtype.kind == 'f' else vals[0] for col, vals in out.items()}
+
+
+def Read_Tables_Inverse_batch(Material=None, P=None, T=None, v=None, h=None, s=None, tables=None):
+    # Vectorized inverse lookup; exactly one of the pairs (P, h), (P, s), (T, v)
+    # or (h, s) must be given. Returns a dict of column -> array with the
+    # superheated-table columns plus 'x' (NaN outside the dome).
+    ts = current_tables(Material, tables)
+    given = {k: val for k, val in {'P': P, 'T': T, 'v': v, 'h': h, 's': s}.items() if val is not None}
+    if set(given) not in _PAIRS:
+        raise ValueError("Inverse lookups take one of (P, h), (P, s), (T, v) or (h, s)")
+
+    t0 = perf_counter() if _instrument.enabled else None
+    arrs = np.broadcast_arrays(*[np.asarray(val, dtype=float) for val in given.values()])
+    out = _inverse_many(ts, {k: np.ravel(a) for k, a in zip(given, arrs)})
+    n = len(out[T_COL])
+    if t0 is not None:
+        _instrument.record("inverse_batch_" + "".join(given), perf_counter() - t0, n)
+    return out
+
+
+def Read_Tables_Inverse(Material=None, P=None, T=None, v=None, h=None, s=None, tables=None):
+    # Single-state inverse lookup, same arguments and columns as the batch form
+    import pandas as pd
+    return pd.DataFrame([_inverse_lookup(Material, P, T, v, h, s, tables)])
+
+
+def _inverse_lookup(Material=None, P=None, T=None, v=None, h=None, s=None, tables=None):
+    # One state as a dict of column -> value
+    ts = current_tables(Material, tables)
+    given = {k: float(val) for k, val in {'P': P, 'T': T, 'v': v, 'h': h, 's': s}.items() if val is not None}
+    if set(given) not in _PAIRS:
+        raise ValueError("Inverse lookups take one of (P, h), (P, s), (T, v) or (h, s)")
+
+    t0 = perf_counter() if _instrument.enabled else None
+    if ts.SC_slopes is not None:
+        out = _one_via_batch(ts, given)
+    elif 'T' in given:
+        out = _tv_one(ts, given['T'], given['v'])
+    elif 'P' in given:
+        prop = 'h' if 'h' in given else 's'
+        out = _ph_one(ts, given['P'], given[prop], prop)
+    else:
+        out = _hs_one(ts, given['h'], given['s'])
+    if t0 is not None:
+        _instrument.record("inverse_" + "".join(given), perf_counter() - t0)
+    return {col: out.get(col) for col in list(ts.SC_tab.numeric) + ['Phase', 'x']}
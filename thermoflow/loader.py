@@ -0,0 +1,203 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unicodedata
+from pathlib import Path
+import numpy as np
+
+# Loads the four steam-table CSVs shipped next to this file. The first load
+# parses them and writes a binary cache (one .npy per table plus a manifest);
+# later loads memory-map that cache. The cache directory name is a digest of
+# the CSV bytes, so editing a CSV simply points to a new cache.
+
+TABLE_FILES = {
+    "T": "Tabla_Saturada_por_Temperatura.csv",
+    "P": "Saturated_by_Pressure.csv",
+    "S_C": "Cleaned_Filled_Compressed_Liquid_and_Superheated_Steam.csv",
+    "I": "Critical_Properties_Table__SI_.csv",
+}
+
+_FORMAT = 2
+_ENCODINGS = ("utf-8", "utf-8-sig", "cp1252", "latin1")
+
+# Header fixes applied whatever the source encoding was
+_RENAME = {
+    "nthalpy of Vaporization (kJ/kg)": "Enthalpy of Vaporization (kJ/kg)",
+}
+
+
+def normalise_column(name):
+    name = unicodedata.normalize("NFC", str(name)).strip()
+    name = name.replace("Â°", "°").replace("Â·", "·")
+    return _RENAME.get(name, name)
+
+
+def _decode(raw):
+    for enc in _ENCODINGS:
+        try:
+            return raw.decode(enc)
+        except UnicodeDecodeError:
+            continue
+    return raw.decode("utf-8", errors="replace")
+
+
+def _column(vals):
+    # float64 when every non-empty cell parses as a number (empty -> NaN),
+    # otherwise an object array with None for empty cells
+    try:
+        return np.array([float(v) if v.strip() else np.nan for v in vals], dtype=np.float64)
+    except ValueError:
+        return np.array([v if v.strip() else None for v in vals], dtype=object)
+
+
+def read_columns(path):
+    # CSV -> {column: array} with the csv module alone, trying the encodings
+    # the tables have been saved with
+    rows = list(csv.reader(io.StringIO(_decode(Path(path).read_bytes()))))
+    header, body = rows[0], [r for r in rows[1:] if r]
+    cols = {}
+    for i, name in enumerate(header):
+        cols[normalise_column(name)] = _column([r[i] if i < len(r) else "" for r in body])
+    return cols
+
+
+def read_any(path):
+    # Same as read_columns, as a DataFrame
+    import pandas as pd
+    return pd.DataFrame(read_columns(path))
+
+
+def _default_base():
+    return Path(__file__).resolve().parent
+
+def _default_cache_dir(base):
+    env = os.environ.get("THERMOFLOW_CACHE_DIR")
+    return Path(env) if env else Path(base) / "__tablecache__"
+
+def _source_digest(base):
+    h = hashlib.sha256(f"thermoflow-tables:{_FORMAT}".encode())
+    for role, name in TABLE_FILES.items():
+        h.update(f"\0{role}\0{name}\0".encode())
+        h.update((Path(base) / name).read_bytes())
+    for old, new in sorted(_RENAME.items()):
+        h.update(f"\0{old}\0{new}".encode())
+    return h.hexdigest()
+
+def _file_digest(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def _cache_source(path):
+    # Source directory recorded in a cache's manifest, or None
+    try:
+        return json.loads((path / "manifest.json").read_text(encoding="utf-8")).get("base")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _write_cache(target, tables, digest, base):
+    # Build in a temporary sibling directory and rename it into place, so a
+    # reader never sees a half-written cache. Older caches of the same source
+    # directory are removed after; a shared cache_dir may hold other ones.
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=".build-", dir=target.parent))
+    try:
+        manifest = {"format": _FORMAT, "source": digest, "base": base, "tables": {}}
+        for role, cols in tables.items():
+            numeric = [c for c, v in cols.items() if v.dtype.kind == "f"]
+            entry = {"columns": list(cols), "numeric": numeric, "labels": {}, "files": {}}
+            if numeric:
+                fname = f"{role}.npy"
+                np.save(tmp / fname, np.vstack([cols[c] for c in numeric]))
+                entry["files"][fname] = _file_digest(tmp / fname)
+            for i, c in enumerate(c for c in cols if c not in numeric):
+                vals = cols[c]
+                fname = f"{role}.label{i}.npy"
+                np.save(tmp / fname, np.array(["" if v is None else v for v in vals], dtype=str))
+                entry["files"][fname] = _file_digest(tmp / fname)
+                entry["labels"][c] = {"file": fname, "missing": [int(j) for j in np.flatnonzero([v is None for v in vals])]}
+            manifest["tables"][role] = entry
+        (tmp / "manifest.json").write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+        try:
+            os.replace(tmp, target)
+        except OSError:
+            # Another process got there first; its copy is identical
+            if not (target / "manifest.json").exists():
+                raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    for old in target.parent.glob("tables-*"):
+        if old != target and _cache_source(old) == base:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def _open_cache(target, digest, verify=True):
+    # (T, P, S_C, I) as column mappings backed by memory maps, or None when
+    # the cache is missing, stale or fails its checksums
+    try:
+        manifest = json.loads((target / "manifest.json").read_text(encoding="utf-8"))
+        if manifest.get("format") != _FORMAT or manifest.get("source") != digest:
+            return None
+        out = []
+        for role in TABLE_FILES:
+            entry = manifest["tables"][role]
+            if verify:
+                for fname, sha in entry["files"].items():
+                    if _file_digest(target / fname) != sha:
+                        return None
+            cols = {}
+            if entry["numeric"]:
+                data = np.load(target / f"{role}.npy", mmap_mode="r")
+                numeric = dict(zip(entry["numeric"], data))
+            for c in entry["columns"]:
+                if c in entry["labels"]:
+                    lab = entry["labels"][c]
+                    vals = np.load(target / lab["file"]).astype(object)
+                    vals[lab["missing"]] = None
+                    cols[c] = vals
+                else:
+                    cols[c] = numeric[c]
+            out.append(cols)
+        return tuple(out)
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def load_tables(base=None, cache_dir=None, rebuild=False, verify=True):
+    # Returns ((T, P, S_C, I), meta): each table is a mapping column -> array,
+    # accepted as-is by set_tables. cache_dir=False skips the binary cache.
+    base = Path(base) if base else _default_base()
+    meta = {"loaded_from": str(base), "cache": None, "rebuilt": False}
+    if cache_dir is False:
+        return tuple(read_columns(base / name) for name in TABLE_FILES.values()), meta
+
+    digest = _source_digest(base)
+    target = Path(cache_dir or _default_cache_dir(base)) / f"tables-{digest[:16]}"
+    tables = None if rebuild else _open_cache(target, digest, verify)
+    if tables is None:
+        cols = {role: read_columns(base / name) for role, name in TABLE_FILES.items()}
+        try:
+            if rebuild and target.exists():
+                shutil.rmtree(target, ignore_errors=True)
+            _write_cache(target, cols, digest, str(base.resolve()))
+            meta["rebuilt"] = True
+        except OSError:
+            # Read-only location: still usable, just uncached
+            return tuple(cols.values()), meta
+        tables = _open_cache(target, digest, verify=False) or tuple(cols.values())
+    meta["cache"] = str(target)
+    return tables, meta
+
+
+def Load_Tables(base=None, cache_dir=None, rebuild=False, interpolation="linear"):
+    # load_tables + set_tables; returns the load metadata. interpolation='pchip'
+    # switches lookups to monotone cubics (see TableSet)
+    from .tables import set_tables
+    tables, meta = load_tables(base, cache_dir, rebuild)
+    set_tables(*tables, interpolation=interpolation)
+    return meta
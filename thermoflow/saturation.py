@@ -0,0 +1,102 @@
+import numpy as np
+from .tableset import current_tables
+from .interpolation import _interp_value_1d, _interp_cols_1d, _bilinear_superheated_batch, _isclose_many
+
+# Saturation line and phase of many states without building property rows:
+#   Tsat(P), Psat(T)                 -> °C from MPa, MPa from °C
+#   classify_phase(T=..., P=...)     -> one label per state
+#   classify_phase(P=..., h=...)
+# Scalars give a float / str, arrays an array of the same shape. Values
+# outside the saturation line (below the triple point, above the critical
+# point) are NaN; missing inputs give None labels.
+
+T_COL, P_COL, H_COL = 'T (°C)', 'P (MPa)', 'Enthalpy (kJ/kg)'
+PHASES = ('compressed liquid', 'saturated', 'superheated vapor', 'supercritical fluid')
+_HF, _HG = 'Enthalpy Liquid (kJ/kg)', 'Enthalpy Vapor (kJ/kg)'
+
+
+def _shaped(shape, out):
+    return out.reshape(shape) if shape else out[0].item() if out.dtype.kind == "f" else out[0]
+
+
+def _sat_cols(ts, P, cols):
+    # Saturation-table columns at pressures P, NaN off the saturation line.
+    # The saturation-by-P table starts above the triple point; below its
+    # first pressure the state is found on the saturation-by-T table.
+    ptab, ttab = ts.P_tab, ts.T_tab
+    out = np.full((len(cols), len(P)), np.nan)
+    inP = (P >= ptab.keys[0]) & (P <= ptab.keys[-1])
+    if inP.any():
+        out[:, inP] = _interp_cols_1d(ptab, P_COL, cols, P[inP], ts.P_slopes)
+    Pt = ttab.column(P_COL)
+    low = (P >= Pt[0]) & (P < ptab.keys[0])
+    if low.any():
+        Ts = np.interp(P[low], Pt, ttab.keys)
+        out[:, low] = _interp_cols_1d(ttab, T_COL, cols, Ts, ts.T_slopes)
+        if T_COL in cols:
+            out[cols.index(T_COL), low] = Ts
+    return out
+
+
+def Tsat(P, Material='water', tables=None):
+    ts = current_tables(Material, tables)
+    if np.ndim(P) == 0 and ts.P_tab.keys[0] <= P <= ts.P_tab.keys[-1]:
+        return _interp_value_1d(ts.P_tab, P_COL, T_COL, P, ts.P_slopes)
+    Pa = np.ravel(np.asarray(P, dtype=float))
+    return _shaped(np.shape(P), _sat_cols(ts, Pa, (T_COL,))[0])
+
+
+def Psat(T, Material='water', tables=None):
+    ts = current_tables(Material, tables)
+    keys = ts.T_tab.keys
+    if np.ndim(T) == 0 and keys[0] <= T <= keys[-1]:
+        return _interp_value_1d(ts.T_tab, T_COL, P_COL, T, ts.T_slopes)
+    Ta = np.ravel(np.asarray(T, dtype=float))
+    out = np.full(len(Ta), np.nan)
+    ok = (Ta >= keys[0]) & (Ta <= keys[-1])
+    if ok.any():
+        out[ok] = _interp_cols_1d(ts.T_tab, T_COL, (P_COL,), Ta[ok], ts.T_slopes)[0]
+    return _shaped(np.shape(T), out)
+
+
+def classify_phase(Material='water', T=None, P=None, h=None, tables=None):
+    # One of PHASES per state, from (T, P) or (P, h). 'saturated' is what
+    # Read_Tables resolves to the saturation row: T within 1e-3 K of Tsat(P),
+    # or hf <= h <= hg. Above the critical pressure a state is a compressed
+    # liquid below the critical temperature and supercritical fluid above it.
+    ts = current_tables(Material, tables)
+    if P is None or (T is None) == (h is None):
+        raise ValueError("classify_phase takes (T, P) or (P, h)")
+    y = T if h is None else h
+    Pa, ya = (np.ravel(a) for a in np.broadcast_arrays(np.asarray(P, dtype=float), np.asarray(y, dtype=float)))
+    n = len(Pa)
+    T_c, P_c = ts.T_tab.keys[-1], ts.P_tab.keys[-1]
+    code = np.full(n, -1)
+    sub = (Pa > 0) & (Pa < P_c)
+    sup = Pa >= P_c
+
+    if h is None:
+        Ts = _sat_cols(ts, Pa, (T_COL,))[0]
+        sat = sub & _isclose_many(ya, Ts, atol=1e-3)
+        code[sub & (ya < Ts)] = 0
+        code[sub & (ya > Ts)] = 2
+        code[sat] = 1
+        # Below the triple-point pressure there is no liquid
+        code[sub & np.isnan(Ts) & ~np.isnan(ya)] = 2
+        above = ya >= T_c
+    else:
+        hf, hg = _sat_cols(ts, Pa, (_HF, _HG))
+        code[sub & (ya < hf)] = 0
+        code[sub & (ya > hg)] = 2
+        code[sub & (ya >= hf) & (ya <= hg)] = 1
+        code[sub & np.isnan(hf) & ~np.isnan(ya)] = 2
+        # h of the critical isotherm on each supercritical isobar
+        above = np.zeros(n, dtype=bool)
+        if sup.any():
+            hc = _bilinear_superheated_batch(ts.SC_tab, ts.SC_index, np.full(int(sup.sum()), T_c), Pa[sup],
+                                             (H_COL,), slopes=ts.SC_slopes)[H_COL]
+            above[sup] = ya[sup] >= hc
+    code[sup & ~np.isnan(ya)] = np.where(above[sup & ~np.isnan(ya)], 3, 0)
+
+    labels = np.array(PHASES + (None,), dtype=object)[code]
+    return _shaped(np.broadcast_shapes(np.shape(P), np.shape(y)), labels)
@@ -0,0 +1,358 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from urllib.parse import urlsplit
+import numpy as np
+from .tables import Read_Tables_batch
+from .tableset import fluids
+from .instrument import Histogram
+
+# Local HTTP/JSON property service:
+#   python -m thermoflow.service --port 8765
+#
+#   POST /states   {"Material": "water", "states": [{"T": 300, "P": 1.0}, {"P": 0.1, "x": 0.5}]}
+#                  -> {"n": 2, "states": [{column: value, ...}, ...]}
+#                  "states" may also be columns, {"T": [...], "P": [...]}, and
+#                  then comes back as columns (null where there is no value)
+#   GET  /metrics  request / batch counts and latencies, throughput
+#   GET  /health   status and loaded fluids
+#
+# State keys are the Read_Tables arguments (T, P, x, v, u, h, s). Requests
+# arriving within max_wait of each other are merged, per material, into one
+# Read_Tables_batch call run on a thread pool, so the event loop only parses
+# and routes. Client(service) drives the same routes without sockets.
+
+_INPUTS = ('T', 'P', 'x', 'v', 'u', 'h', 's')
+_MAX_BODY = 64 << 20
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            411: "Length Required", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def _parse(body):
+    # Request body -> (Material, column -> float array, n, records?)
+    if not isinstance(body, dict):
+        raise ValueError("Body must be a JSON object")
+    Material = body.get("Material", "water")
+    states = body.get("states")
+    if isinstance(states, list):
+        for i, st in enumerate(states):
+            if not isinstance(st, dict):
+                raise ValueError(f"State {i} must be an object")
+            bad = set(st) - set(_INPUTS)
+            if bad:
+                raise ValueError(f"State {i}: unknown keys {sorted(bad)}, expected {_INPUTS}")
+        n, records = len(states), True
+        raw = {k: [st.get(k) for st in states] for k in _INPUTS}
+    elif isinstance(states, dict):
+        bad = set(states) - set(_INPUTS)
+        if bad:
+            raise ValueError(f"Unknown columns {sorted(bad)}, expected {_INPUTS}")
+        lens = {len(v) for v in states.values() if isinstance(v, list)}
+        if len(lens) > 1:
+            raise ValueError("Columns must have the same length")
+        n, records = (lens.pop() if lens else 1), False
+        raw = {k: states.get(k) for k in _INPUTS}
+    else:
+        raise ValueError("'states' must be a list of states or an object of columns")
+
+    cols = {}
+    for k, vals in raw.items():
+        try:
+            cols[k] = np.array(np.broadcast_to(np.array(vals, dtype=float), (n,)))
+        except (TypeError, ValueError):
+            raise ValueError(f"Values of {k} must be numbers or null") from None
+        bad = np.flatnonzero(np.isinf(cols[k]))
+        if len(bad):
+            raise ValueError(f"State {int(bad[0])}: {k} must be a finite number")
+    missing = np.flatnonzero(np.isnan(cols['T']) & np.isnan(cols['P']))
+    if len(missing):
+        raise ValueError(f"State {int(missing[0])}: Please provide either Temperature or Pressure.")
+    return Material, cols, n, records
+
+
+def _loads(body):
+    # Strict JSON: NaN and Infinity are not numbers to the clients of this
+    # service (null is the missing value)
+    def constant(name):
+        raise ValueError(f"{name} is not a JSON number, use null")
+    return json.loads(body or b"null", parse_constant=constant)
+
+def _dumps(payload):
+    return json.dumps(payload, allow_nan=False)
+
+
+def _column(arr):
+    if arr.dtype.kind == "f":
+        out = arr.tolist()
+        for i in np.flatnonzero(~np.isfinite(arr)).tolist():
+            out[i] = None
+        return out
+    return [v if isinstance(v, str) else None for v in arr.tolist()]
+
+
+def _summary(hist):
+    # Histogram.summary() for JSON: the open top bucket's edge is inf
+    return {k: None if isinstance(v, float) and not math.isfinite(v) else v for k, v in hist.summary().items()}
+
+
+def _filled(out):
+    # Columns with a value on some row; a request gets the same columns
+    # whether or not it was merged with others
+    keep = {}
+    for c, a in out.items():
+        a = np.asarray(a)
+        if a.dtype.kind == "f":
+            filled = np.isfinite(a).any()
+        else:
+            filled = any(isinstance(v, str) for v in a.tolist())
+        if filled:
+            keep[c] = a
+    return keep
+
+
+def _format(out, n, records):
+    cols = {c: _column(np.asarray(a)) for c, a in out.items()}
+    if not records:
+        return cols
+    rows = [{} for _ in range(n)]
+    for c, vals in cols.items():
+        for row, v in zip(rows, vals):
+            if v is not None:
+                row[c] = v
+    return rows
+
+
+class PropertyService:
+    #   max_batch -> states that trigger an evaluation without waiting
+    #   max_wait  -> seconds a request waits for others to merge with
+    #   workers   -> threads evaluating batches
+    #   tables    -> TableSet used for its fluid (default: the registry)
+    def __init__(self, max_batch=65536, max_wait=0.002, workers=None, tables=None):
+        self.max_batch = int(max_batch)
+        self.max_wait = float(max_wait)
+        self.tables = tables
+        self._workers = workers or min(4, os.cpu_count() or 1)
+        self._executor = None
+        self._pending = {}
+        self._timers = {}
+        self._tasks = set()
+        self._started = perf_counter()
+        self._requests, self._batches = Histogram(), Histogram()
+        self._errors = 0
+
+    # -- coalescing
+
+    async def evaluate(self, Material, cols, n):
+        # Read_Tables_batch result for one request, evaluated with whatever
+        # other requests for the same material are waiting
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        key = str(Material or "").strip().lower()
+        queue = self._pending.setdefault(key, [])
+        queue.append((cols, n, fut))
+        if sum(item[1] for item in queue) >= self.max_batch:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+        return await fut
+
+    def _flush(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        items = self._pending.pop(key, None)
+        if items:
+            task = asyncio.get_running_loop().create_task(self._run(key, items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key, items):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self._workers, thread_name_prefix="thermoflow-service")
+        t0 = perf_counter()
+        results = await asyncio.get_running_loop().run_in_executor(self._executor, self._batch, key, items)
+        self._batches.add(perf_counter() - t0, sum(item[1] for item in items))
+        for (_, _, fut), res in zip(items, results):
+            if fut.done():
+                continue
+            if isinstance(res, Exception):
+                fut.set_exception(res)
+            else:
+                fut.set_result(res)
+
+    def _batch(self, key, items):
+        # Runs on the pool: one merged call, or one call per request when the
+        # merged one fails, so a bad request only fails itself
+        tables = self.tables if self.tables is not None and self.tables.fluid == key else None
+        try:
+            if len(items) == 1:
+                return [_filled(Read_Tables_batch(key, **items[0][0], tables=tables))]
+            out = Read_Tables_batch(key, **{k: np.concatenate([it[0][k] for it in items]) for k in _INPUTS},
+                                    tables=tables)
+        except Exception as e:
+            if len(items) == 1:
+                return [e]
+            return [self._batch(key, [it])[0] for it in items]
+        bounds = np.cumsum([0] + [it[1] for it in items])
+        return [_filled({c: a[lo:hi] for c, a in out.items()}) for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+    # -- routes
+
+    async def handle(self, method, path, body=b""):
+        # (status, JSON-able payload) for one request
+        t0 = perf_counter()
+        routes = {"/states": "POST", "/metrics": "GET", "/health": "GET"}
+        if path not in routes:
+            return 404, {"error": f"No route {path}"}
+        if method != routes[path]:
+            return 405, {"error": f"{path} expects {routes[path]}"}
+        if path == "/health":
+            return 200, {"status": "ok", "fluids": list(fluids())}
+        if path == "/metrics":
+            return 200, self.metrics()
+        n = 0
+        try:
+            Material, cols, n, records = _parse(_loads(body))
+            out = await self.evaluate(Material, cols, n) if n else {}
+            status, payload = 200, {"n": n, "states": _format(out, n, records) if n else []}
+        except ValueError as e:
+            status, payload = 400, {"error": str(e)}
+        except Exception as e:
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+        if status != 200:
+            self._errors += 1
+        self._requests.add(perf_counter() - t0, n if status == 200 else 0)
+        return status, payload
+
+    def metrics(self):
+        uptime = perf_counter() - self._started
+        req, bat = self._requests, self._batches
+        return {
+            "uptime_s": uptime,
+            "requests": req.calls,
+            "errors": self._errors,
+            "states": req.states,
+            "batches": bat.calls,
+            "states_per_batch": bat.states/bat.calls if bat.calls else None,
+            "requests_per_batch": req.calls/bat.calls if bat.calls else None,
+            "states_per_s": req.states/uptime if uptime > 0 else None,
+            "busy_s": bat.total,
+            "eval_states_per_s": bat.states/bat.total if bat.total > 0 else None,
+            "waiting": sum(len(q) for q in self._pending.values()),
+            "request_latency": _summary(req),
+            "batch_latency": _summary(bat),
+        }
+
+    # -- HTTP
+
+    async def _connection(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line.strip():
+                    break
+                parts = line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                keep = len(parts) == 3 and parts[2] == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                length = headers.get("content-length", "0")
+                if len(parts) != 3 or not length.isdigit():
+                    status, payload, keep = 400, {"error": "Malformed request"}, False
+                elif "transfer-encoding" in headers:
+                    status, payload, keep = 411, {"error": "Send a Content-Length body"}, False
+                elif int(length) > _MAX_BODY:
+                    status, payload, keep = 413, {"error": f"Body over {_MAX_BODY} bytes"}, False
+                else:
+                    body = await reader.readexactly(int(length))
+                    status, payload = await self.handle(parts[0], urlsplit(parts[1]).path, body)
+                data = _dumps(payload).encode()
+                writer.write((f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: application/json\r\n"
+                              f"Content-Length: {len(data)}\r\nConnection: {'keep-alive' if keep else 'close'}\r\n\r\n").encode() + data)
+                await writer.drain()
+                if not keep:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            # Server closing with a keep-alive client still connected
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8765):
+        # Listening asyncio.Server (port=0 picks a free one)
+        return await asyncio.start_server(self._connection, host, port)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class Client:
+    # In-process client: same routes, coalescing and JSON round trip as over
+    # HTTP, without sockets
+    def __init__(self, service):
+        self.service = service
+
+    async def get(self, path):
+        status, payload = await self.service.handle("GET", path)
+        return status, json.loads(_dumps(payload))
+
+    async def post(self, path, payload):
+        status, out = await self.service.handle("POST", path, json.dumps(payload).encode())
+        return status, json.loads(_dumps(out))
+
+    async def states(self, states, Material="water"):
+        # Results of POST /states; raises ValueError on an error response
+        status, out = await self.post("/states", {"Material": Material, "states": states})
+        if status != 200:
+            raise ValueError(out["error"])
+        return out["states"]
+
+
+async def serve(host="127.0.0.1", port=8765, **kwargs):
+    service = PropertyService(**kwargs)
+    server = await service.start(host, port)
+    print(f"thermoflow service on http://{host}:{server.sockets[0].getsockname()[1]}", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m thermoflow.service", description="Local HTTP/JSON property service")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--base", help="table directory (default: the bundled tables)")
+    ap.add_argument("--attach", help="tables published with publish_tables() to attach to")
+    ap.add_argument("--max-batch", type=int, default=65536)
+    ap.add_argument("--max-wait-ms", type=float, default=2.0)
+    ap.add_argument("--workers", type=int)
+    args = ap.parse_args(argv)
+    if args.attach:
+        from .shared import attach_tables
+        attach_tables(args.attach)
+    else:
+        from .loader import Load_Tables
+        Load_Tables(args.base)
+    try:
+        asyncio.run(serve(args.host, args.port, max_batch=args.max_batch,
+                          max_wait=args.max_wait_ms/1e3, workers=args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+from types import MappingProxyType
+import numpy as np
+from .compiled import CompiledTable, IsobarIndex, InverseIndex
+from .tableset import TableSet, register_tables, current_tables, _uid
+
+# Compiled tables published once into a memory-mapped file and attached
+# read-only by any number of worker processes: every array (table data,
+# isobar and inverse indices, critical properties) is a view of the same
+# pages, so attaching copies nothing and builds no index. The Python lists the
+# scalar lookups bisect (keylist, levellist) are the one per-process cost,
+# about 1 MB: attached tables build them on first use, so batch-only workers
+# never do.
+#
+# The file lives on /dev/shm when there is one (plain shared memory), in the
+# temp directory otherwise. Layout: magic, header length, JSON header, then
+# the arrays, each 64-byte aligned; label columns are stored as int32 codes
+# into a list of values kept in the header. PCHIP slopes travel with the
+# tables, so workers interpolate the same way as the publisher.
+
+_MAGIC = b"TFTABLE1"
+_ALIGN = 64
+_INDEX_FIELDS = ("levels", "starts", "ends", "T_min", "T_max", "T_sat", "split")
+_INVERSE_FIELDS = ("rows", "keys", "starts", "ends", "split")
+
+
+def _pad(n):
+    return -n % _ALIGN
+
+
+class _Writer:
+    def __init__(self):
+        self.arrays, self.size = [], 0
+
+    def add(self, arr):
+        arr = np.ascontiguousarray(arr)
+        off = self.size
+        self.arrays.append((off, arr))
+        self.size = off + arr.nbytes + _pad(arr.nbytes)
+        return [off, arr.dtype.str, list(arr.shape)]
+
+    def labels(self, vals):
+        # object column -> int32 codes + distinct values (JSON-able)
+        values, codes = {}, np.empty(len(vals), dtype=np.int32)
+        for i, v in enumerate(vals):
+            if v is not None and not isinstance(v, (str, int, float, bool)):
+                v = str(v)
+            codes[i] = values.setdefault(v, len(values))
+        return {"codes": self.add(codes), "values": list(values)}
+
+    def column(self, vals):
+        vals = np.asarray(vals)
+        return self.labels(vals) if vals.dtype.kind in "OUS" else self.add(vals)
+
+    def table(self, tab):
+        return {"key": tab.key, "numeric": list(tab.numeric), "data": self.add(tab.data),
+                "labels": {name: self.labels(arr) for name, arr in tab.labels.items()}}
+
+
+def _encode(ts):
+    w = _Writer()
+    revision = ts.revision
+    if revision is not None and not isinstance(revision, (str, int, float)):
+        revision = str(revision)
+    header = {
+        "fluid": ts.fluid,
+        "revision": revision,
+        "tables": {"T": w.table(ts.T_tab), "P": w.table(ts.P_tab), "SC": w.table(ts.SC_tab)},
+        "index": {name: w.add(getattr(ts.SC_index, name)) for name in _INDEX_FIELDS},
+        "inverse": {prop: {name: w.add(getattr(inv, name)) for name in _INVERSE_FIELDS}
+                    for prop, inv in ts.SC_inverse.items()},
+        "critical": {name: w.column(vals) for name, vals in ts.critical.items()},
+        "interpolation": ts.interpolation,
+        "slopes": {k: w.add(getattr(ts, f"{k}_slopes")) for k in ("T", "P", "SC")
+                   if getattr(ts, f"{k}_slopes") is not None},
+    }
+    return json.dumps(header).encode("utf-8"), w
+
+
+def _restore(cls, **attrs):
+    # Instance of one of the read-only classes from already built parts
+    obj = object.__new__(cls)
+    for name, val in attrs.items():
+        object.__setattr__(obj, name, val)
+    return obj
+
+
+def _lazy_list(cls, name, src):
+    # Property over the `name` slot of cls: array `src` as a list, built on
+    # first use
+    slot = getattr(cls, name)
+    def get(self):
+        try:
+            return slot.__get__(self, cls)
+        except AttributeError:
+            val = getattr(self, src).tolist()
+            slot.__set__(self, val)
+            return val
+    return property(get)
+
+
+# Attached forms of the read-only classes, with the lists made lazy
+class _Table(CompiledTable):
+    __slots__ = ()
+    keylist = _lazy_list(CompiledTable, "keylist", "keys")
+
+class _Index(IsobarIndex):
+    __slots__ = ()
+    levellist = _lazy_list(IsobarIndex, "levellist", "levels")
+
+class _Inverse(InverseIndex):
+    __slots__ = ()
+    keylist = _lazy_list(InverseIndex, "keylist", "keys")
+
+
+def _default_path(ts):
+    shm = Path("/dev/shm")
+    root = shm if shm.is_dir() and os.access(shm, os.W_OK) else Path(tempfile.gettempdir())
+    return root / f"thermoflow-{ts.fluid}-{os.getpid()}-{ts.uid}.tables"
+
+
+class SharedTables:
+    # Handle kept by the publishing process; unlink() removes the file (workers
+    # already attached keep their mapping). Also a context manager.
+    __slots__ = ("path", "size", "tables")
+
+    def __init__(self, path, size, tables):
+        self.path, self.size, self.tables = path, size, tables
+
+    def unlink(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.unlink()
+
+    def __repr__(self):
+        return f"SharedTables({str(self.path)!r}, size={self.size}, tables={self.tables!r})"
+
+
+def publish_tables(tables=None, path=None, Material="water"):
+    # Writes `tables` (default: the current tables of Material) for
+    # attach_tables(path); returns a SharedTables handle
+    ts = current_tables(Material, tables)
+    path = Path(path) if path else _default_path(ts)
+    header, w = _encode(ts)
+    start = 16 + len(header)
+    start += _pad(start)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(_MAGIC)
+            f.write(np.uint64(len(header)).tobytes())
+            f.write(header)
+            for off, arr in w.arrays:
+                f.seek(start + off)
+                f.write(arr.tobytes())
+            f.truncate(start + w.size)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            os.remove(tmp)
+    return SharedTables(str(path), start + w.size, ts)
+
+
+def attach_tables(path, register=True):
+    # TableSet over the arrays in a published file, mapped read-only; with
+    # register=True it also becomes the registry entry of its fluid
+    mm = np.memmap(path, dtype=np.uint8, mode="r")
+    if bytes(mm[:8]) != _MAGIC:
+        raise ValueError(f"Not a published table file: {path}")
+    size = int(mm[8:16].view("<u8")[0])
+    header = json.loads(bytes(mm[16:16 + size]).decode("utf-8"))
+    start = 16 + size
+    start += _pad(start)
+
+    def arr(spec):
+        off, dtype, shape = spec
+        dtype = np.dtype(dtype)
+        n = dtype.itemsize*int(np.prod(shape))
+        return mm[start + off:start + off + n].view(dtype).reshape(shape)
+
+    def labels(spec):
+        values = np.empty(len(spec["values"]), dtype=object)
+        values[:] = spec["values"]
+        return values[arr(spec["codes"])]
+
+    def column(spec):
+        return labels(spec) if isinstance(spec, dict) else arr(spec)
+
+    def table(spec):
+        numeric, data = tuple(spec["numeric"]), arr(spec["data"])
+        col = {name: i for i, name in enumerate(numeric)}
+        labs = {name: labels(s) for name, s in spec["labels"].items()}
+        for vals in labs.values():
+            vals.flags.writeable = False
+        return _restore(_Table, key=spec["key"], numeric=numeric, col=col, data=data, labels=labs,
+                        keys=data[col[spec["key"]]], columns=numeric + tuple(labs))
+
+    T_tab, P_tab, SC_tab = (table(header["tables"][k]) for k in ("T", "P", "SC"))
+    index = {name: arr(spec) for name, spec in header["index"].items()}
+    SC_index = _restore(_Index, table=SC_tab, **index)
+    SC_inverse = {}
+    for prop, specs in header["inverse"].items():
+        parts = {name: arr(spec) for name, spec in specs.items()}
+        SC_inverse[prop] = _restore(_Inverse, prop=prop, **parts)
+    slopes = header.get("slopes", {})
+    critical = {}
+    for name, spec in header["critical"].items():
+        vals = column(spec)
+        vals.flags.writeable = False
+        critical[name] = vals
+
+    ts = _restore(TableSet, fluid=header["fluid"], revision=header["revision"],
+                  T_tab=T_tab, P_tab=P_tab, SC_tab=SC_tab, SC_index=SC_index,
+                  SC_inverse=MappingProxyType(SC_inverse), critical=MappingProxyType(critical),
+                  uid=next(_uid), interpolation=header.get("interpolation", "linear"),
+                  **{f"{k}_slopes": arr(slopes[k]) if k in slopes else None for k in ("T", "P", "SC")})
+    if register:
+        register_tables(ts)
+    return ts
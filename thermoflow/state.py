@@ -1,91 +1,283 @@
-import pandas as pd
-from .tables import Read_Tables
-from .utils import Quality_Equation, _get_if_present
+import math
+import weakref
+from time import perf_counter
+import numpy as np
+from . import instrument as _instrument
+from .tables import _lookup, _tables_or_gas, Read_Tables_batch, state_derivatives
+from .tableset import current_tables
+from .interpolation import _superheated_cell, _interp_value_1d, _isclose
+from .utils import Quality_Equation
+
+# Property name -> table column. Every lookup is resolved once into a tuple of
+# plain floats in this order; NaN and missing columns become None.
+_PROPS = (
+    ('v',   'Specific Volume (m^3/kg)'),
+    ('vf',  'Specific Volume Liquid (m^3/kg)'),
+    ('vg',  'Specific Volume Vapor (m^3/kg)'),
+    ('h',   'Enthalpy (kJ/kg)'),
+    ('hf',  'Enthalpy Liquid (kJ/kg)'),
+    ('hg',  'Enthalpy Vapor (kJ/kg)'),
+    ('hfg', 'Enthalpy of Vaporization (kJ/kg)'),
+    ('u',   'Internal Energy (kJ/kg)'),
+    ('uf',  'Internal Energy Liquid (kJ/kg)'),
+    ('ug',  'Internal Energy Vapor (kJ/kg)'),
+    ('ufg', 'Internal Energy of Vaporization (kJ/kg)'),
+    ('s',   'Entropy [kJ/(kg K)]'),
+    ('sf',  'Entropy Liquid [kJ/(kg K)]'),
+    ('sg',  'Entropy Vapor [kJ/(kg K)]'),
+    ('sfg', 'Entropy of Vaporization [kJ/(kg K)]'),
+    ('phase', 'Phase'),
+    ('P_table', 'P (MPa)'),
+    ('T_table', 'T (°C)'),
+    ('x_table', 'x'),
+)
+_SLOT = {name: i for i, (name, _) in enumerate(_PROPS)}
+
+
+def _clean(val):
+    if val is None or isinstance(val, str):
+        return val
+    try:
+        val = float(val)
+    except (TypeError, ValueError):
+        return val
+    return None if math.isnan(val) else val
+
+def _resolve(row):
+    return tuple(_clean(row.get(col)) for _, col in _PROPS)
+
+def _prop(name):
+    i = _SLOT[name]
+    return property(lambda self: self._resolved()[i])
+
+
+# What a change of each State input makes stale: the lookup inputs everything
+# derived from the tables, the mass only the report (to_dict / Data_Frame)
+_LOOKUP_STALE = ('_vals', '_data', '_dict', '_frame', '_cp')
+_MASS_STALE = ('_dict', '_frame')
+
+def _input(name, stale, cell=False):
+    slot = '_' + name
+    def fset(self, val):
+        old = getattr(self, slot)
+        if old is val or (type(old) is type(val) and isinstance(val, (int, float, str)) and old == val):
+            return
+        setattr(self, slot, val)
+        for attr in stale:
+            setattr(self, attr, None)
+        if cell:
+            self._cell = None
+    return property(lambda self: getattr(self, slot), fset)
+
+
+def _hermite_1(d0, d1, s0, s1, dx, w):
+    t2 = w*w; t3 = t2*w
+    return d0*(2*t3 - 3*t2 + 1) + d1*(3*t2 - 2*t3) + dx*(s0*(t3 - 2*t2 + w) + s1*(t3 - t2))
+
+
+_layouts = weakref.WeakKeyDictionary()   # TableSet -> superheated-table layout for _Cell
+
+def _layout(ts):
+    # (_PROPS slots of the numeric columns, per-row values of those columns,
+    # per-row slopes or None, label slots) of ts.SC_tab, built once
+    lay = _layouts.get(ts)
+    if lay is None:
+        tab = ts.SC_tab
+        num = [(slot, col) for slot, (_, col) in enumerate(_PROPS)
+               if col in tab.col and col not in ('P (MPa)', 'T (°C)')]
+        cols = [tab.col[col] for _, col in num]
+        slopes = None if ts.SC_slopes is None else ts.SC_slopes[cols].T.tolist()
+        labels = [(slot, tab.labels[col]) for slot, (_, col) in enumerate(_PROPS) if col in tab.labels]
+        lay = _layouts[ts] = ([slot for slot, _ in num], tab.data[cols].T.tolist(), slopes, labels)
+    return lay
+
+
+class _Cell:
+    # Superheated-table cell of the last (T, P) lookup: the bracketing isobars
+    # and the two rows around T on each (interpolation._superheated_cell).
+    # While (T, P) stays inside it, a new state is the same blend of the same
+    # rows, resolved straight into the _PROPS tuple; the saturation test
+    # keeps the Tsat of the last P.
+    __slots__ = ('ts', 'P_below', 'P_lo', 'P_hi', 'top', 'T_lo', 'T_hi', 'xs', 'D', 'S', 'slots', 'fixed',
+                 'P_last', 'Tsat', 'hits')
+
+    def __init__(self, ts, k_lo, k_hi, rows):
+        slots, data, slopes, labels = _layout(ts)
+        Ps = ts.SC_index.levellist
+        self.ts = ts
+        self.P_below = Ps[k_lo - 1] if k_lo else -math.inf
+        self.P_lo, self.P_hi, self.top = Ps[k_lo], Ps[k_hi], k_hi == len(Ps) - 1
+        self.xs = xs = [ts.SC_tab.keylist[r] for r in rows]
+        self.T_lo, self.T_hi = max(xs[0], xs[2]), min(xs[1], xs[3])
+        self.slots = slots
+        self.D = list(zip(*[data[r] for r in rows]))
+        self.S = None if slopes is None else list(zip(*[slopes[r] for r in rows]))
+        self.fixed = [None]*len(_PROPS)
+        for slot, arr in labels:
+            self.fixed[slot] = _clean(arr[rows[0]])
+        self.P_last = self.Tsat = None
+        self.hits = 0
+
+    def resolve(self, T, P):
+        # _resolve(_lookup(T=T, P=P)), or None once (T, P) leaves the cell.
+        # P brackets like IsobarIndex.bracket; T keeps clear of the rows by
+        # the tolerance of IsobarIndex.exact, so no table node can match
+        tolT = 1e-9 + 1e-5*abs(T)
+        if not (self.T_lo + tolT < T < self.T_hi - tolT and self.P_lo < P
+                and (P < self.P_hi or (P == self.P_hi and not self.top))
+                and P - (1e-12 + 1e-5*abs(P)) > self.P_below):
+            return None
+        if P != self.P_last:
+            ts = self.ts
+            self.Tsat = _interp_value_1d(ts.P_tab, 'P (MPa)', 'T (°C)', P, ts.P_slopes)
+            self.P_last = P
+        if _isclose(T, self.Tsat, atol=1e-3):
+            return None
+        xs = self.xs
+        wa = (T - xs[0]) / (xs[1] - xs[0])
+        wb = (T - xs[2]) / (xs[3] - xs[2])
+        wP = (P - self.P_lo) / (self.P_hi - self.P_lo)
+        # The arithmetic of _blend / _hermite and _bilinear_superheated, on
+        # plain floats, so results are bit for bit those of a full lookup
+        vals = []
+        if self.S is None:
+            for d0, d1, d2, d3 in self.D:
+                ra = d0 + wa*(d1 - d0)
+                vals.append(ra + wP*(d2 + wb*(d3 - d2) - ra))
+        else:
+            for (d0, d1, d2, d3), (s0, s1, s2, s3) in zip(self.D, self.S):
+                ra = _hermite_1(d0, d1, s0, s1, xs[1] - xs[0], wa)
+                vals.append(ra + wP*(_hermite_1(d2, d3, s2, s3, xs[3] - xs[2], wb) - ra))
+        out = list(self.fixed)
+        for slot, val in zip(self.slots, vals):
+            out[slot] = None if val != val else val
+        out[_SLOT['P_table']], out[_SLOT['T_table']] = P, T
+        self.hits += 1
+        return tuple(out)
 
 
 class State:
-    def __init__(self, Material, m, V = None, P=None, T=None, x=None, v=None, u=None, h=None, s=None, Velocity=None, Height=None):
-        self.Material = Material
-        self._data = None
-        self.m = m
+    __slots__ = ('_Material', '_m', '_V', '_P', '_T', '_x', '_given_v', '_given_u', '_given_h', '_given_s',
+                 'Velocity', 'Height', '_tables', '_vals', '_data', '_dict', '_frame', '_cp',
+                 '_cell', '_wait', '_backoff')
+
+    def __init__(self, Material, m, V = None, P=None, T=None, x=None, v=None, u=None, h=None, s=None, Velocity=None, Height=None, tables=None):
+        # tables: a TableSet to read from; None resolves it at lookup time
+        # (use_tables binding, then the registry)
+        self._Material = Material
+        self._tables = tables
+        self._vals = self._data = self._dict = self._frame = self._cp = self._cell = None
+        self._wait = self._backoff = 1
+        self._m = m
         self._V = V
-        self.P = P
-        self.T = T
-        self.x = x
-        self.given_v = v 
-        self.given_u = u
-        self.given_h = h
-        self.given_s = s
+        self._P = P
+        self._T = T
+        self._x = x
+        self._given_v = v
+        self._given_u = u
+        self._given_h = h
+        self._given_s = s
         self.Velocity = Velocity
-        self.Height = Height           
+        self.Height = Height
         if m is None: raise ValueError('Need value for mass')
-    
+
+    # Inputs: assigning one (or set_T / set_P) drops only what depends on it
+    Material = _input('Material', _LOOKUP_STALE, cell=True)
+    tables = _input('tables', _LOOKUP_STALE, cell=True)
+    T = _input('T', _LOOKUP_STALE); P = _input('P', _LOOKUP_STALE); x = _input('x', _LOOKUP_STALE)
+    given_v = _input('given_v', _LOOKUP_STALE); given_u = _input('given_u', _LOOKUP_STALE)
+    given_h = _input('given_h', _LOOKUP_STALE); given_s = _input('given_s', _LOOKUP_STALE)
+    m = _input('m', _MASS_STALE)
+
+    def _lookup(self):
+        return _lookup(
+            Material=self._Material, T=self._T, P=self._P,
+            x=self._x, v=self._given_v, u=self._given_u, h=self._given_h, s=self._given_s, tables=self._tables
+        )
+
+    def _resolved(self):
+        if self._vals is None:
+            T, P, cell = self._T, self._P, self._cell
+            plain = T is not None and P is not None and self._x is None and self._given_v is None \
+                and self._given_u is None and self._given_h is None and self._given_s is None
+            vals = None
+            if cell is not None and plain:
+                t0 = perf_counter() if _instrument.enabled else None
+                if cell.ts is current_tables(self._Material, self._tables):
+                    vals = cell.resolve(float(T), float(P))
+                if vals is not None and t0 is not None:
+                    _instrument.record("TP_cell", perf_counter() - t0)
+            if vals is None:
+                vals = _resolve(self._lookup())
+                if plain:
+                    self._next_cell(float(T), float(P))
+            self._vals = vals
+        return self._vals
+
+    def _next_cell(self, T, P):
+        # After a full lookup: a cell is built from the second lookup on, for
+        # states whose inputs are being stepped. Each cell that served nothing
+        # doubles the lookups to wait before building the next one, so steps
+        # wider than the cells cost little.
+        cell = self._cell
+        if cell is not None:
+            self._backoff = 1 if cell.hits else min(2*self._backoff, 64)
+            self._wait = 0 if cell.hits else self._backoff
+            self._cell = None
+        if self._wait:
+            self._wait -= 1
+            return
+        ts = _tables_or_gas(self._Material, self._tables)
+        found = None if ts is None else _superheated_cell(ts.SC_tab, ts.SC_index, T, P)
+        if found is not None:
+            self._cell = _Cell(ts, *found)
+
     @property
     def Data(self):
+        # One-row DataFrame of the raw lookup, only built when asked for
         if self._data is None:
-            self._data = Read_Tables(
-                Material=self.Material, T=self.T, P=self.P,
-                x=self.x, v=self.given_v, u=self.given_u, h=self.given_h, s=self.given_s
-            )
+            import pandas as pd
+            self._data = pd.DataFrame([self._lookup()])
         return self._data
-    
+
     def set_T(self, T):
         self.T = T
-        self._data = None
 
     def set_P(self, P):
         self.P = P
-        self._data = None
-       
+
     # Get values of specific intensive properties from table
-  
-    @property
-    def v(self):  return _get_if_present(self.Data, 'Specific Volume (m^3/kg)')
-    @property
-    def vf(self): return _get_if_present(self.Data, 'Specific Volume Liquid (m^3/kg)')
-    @property
-    def vg(self): return _get_if_present(self.Data, 'Specific Volume Vapor (m^3/kg)')
-    @property
-    def h(self):  return _get_if_present(self.Data, 'Enthalpy (kJ/kg)')
-    @property
-    def hf(self): return _get_if_present(self.Data, 'Enthalpy Liquid (kJ/kg)')
-    @property
-    def hg(self): return _get_if_present(self.Data, 'Enthalpy Vapor (kJ/kg)')
-    @property
-    def hfg(self): return _get_if_present(self.Data, 'Enthalpy of Vaporization (kJ/kg)')
-    @property
-    def u(self):  return _get_if_present(self.Data, 'Internal Energy (kJ/kg)')
-    @property
-    def uf(self): return _get_if_present(self.Data, 'Internal Energy Liquid (kJ/kg)')
-    @property
-    def ug(self): return _get_if_present(self.Data, 'Internal Energy Vapor (kJ/kg)')
-    @property
-    def ufg(self): return _get_if_present(self.Data, 'Internal Energy of Vaporization (kJ/kg)')
-    @property
-    def s(self):  return _get_if_present(self.Data, 'Entropy [kJ/(kg K)]')
-    @property
-    def sf(self): return _get_if_present(self.Data, 'Entropy Liquid [kJ/(kg K)]') 
-    @property
-    def sg(self): return _get_if_present(self.Data, 'Entropy Vapor [kJ/(kg K)]')
-    @property
-    def sfg(self): return _get_if_present(self.Data, 'Entropy of Vaporization [kJ/(kg K)]')
-    @property
-    def phase(self): return _get_if_present(self.Data, 'Phase')
+
+    v = _prop('v');   vf = _prop('vf');  vg = _prop('vg')
+    h = _prop('h');   hf = _prop('hf');  hg = _prop('hg');  hfg = _prop('hfg')
+    u = _prop('u');   uf = _prop('uf');  ug = _prop('ug');  ufg = _prop('ufg')
+    s = _prop('s');   sf = _prop('sf');  sg = _prop('sg');  sfg = _prop('sfg')
+    phase = _prop('phase')
+
     @property
-    def P_(self): 
+    def P_(self):
         if self.P is not None:
             return self.P
         else:
-            return self.Data['P (MPa)'].iloc[0]
+            return self._resolved()[_SLOT['P_table']]
     @property
     def T_(self):
         if self.T is not None:
             return self.T
         else:
-            return self.Data['T (°C)'].iloc[0]
-        
+            return self._resolved()[_SLOT['T_table']]
+
+    @property
+    def cp(self):
+        # dh/dT at fixed P of the tables (kJ/(kg K)); None for saturated states
+        if self._cp is None:
+            T, P = self.T_, self.P_
+            self._cp = (None if T is None or P is None else
+                        _clean(state_derivatives(self.Material, T, P, self.tables)['cp'][0]),)
+        return self._cp[0]
+
     # Get absolute values derived from specific ones
-    
+
     @property
     def V(self):
         if self._V is not None:
@@ -102,17 +294,20 @@ class State:
     @property
     def S(self): return None if self.s is None else self.m * self.s
 
-    def Data_Frame(self):
-        v, u, h, s = self.v, self.u, self.h, self.s
-        vf, vg = self.vf, self.vg
-        uf, ug = self.uf, self.ug
-        hf, hg = self.hf, self.hg
-        sf, sg = self.sf, self.sg
-    
+    def to_dict(self):
+        # Kept until an input changes; callers get their own copy
+        if self._dict is None:
+            self._dict = self._report()
+        return dict(self._dict)
+
+    def _report(self):
+        vals = self._resolved()
+        v, vf, vg, h, hf, hg, hfg, u, uf, ug, ufg, s, sf, sg, sfg, phase, _, _, x_table = vals
+
         x_local = self.x
 
-        if x_local is None and 'x' in self.Data.columns and pd.notna(self.Data['x'].iloc[0]):
-            x_local = float(self.Data['x'].iloc[0])
+        if x_local is None and x_table is not None:
+            x_local = x_table
 
         if x_local is None:
             if h is not None and hf is not None and hg is not None:
@@ -135,35 +330,123 @@ class State:
             if u  is None and uf is not None and ug is not None: u  = Quality_Equation(x=self.x, val_f=uf, val_g=ug)
             if h  is None and hf is not None and hg is not None: h  = Quality_Equation(x=self.x, val_f=hf, val_g=hg)
             if s  is None and sf is not None and sg is not None: s  = Quality_Equation(x=self.x, val_f=sf, val_g=sg)
-        
-        _State_data = {
+
+        return {
             "Material": self.Material,
-            "Phase": self.phase,
+            "Phase": phase,
             "m (kg)": self.m,
             "T (°C)": self.T_,
             "P (MPa)": self.P_,
             "x": x_local,
             "v (m³/kg)": v,
-            "vf (m³/kg)": self.vf,
-            "vg (m³/kg)": self.vg,
+            "vf (m³/kg)": vf,
+            "vg (m³/kg)": vg,
             "u (kJ/kg)": u,
-            "uf (kJ/kg)": self.uf,
-            "ug (kJ/kg)": self.ug,
-            "ufg (kJ/kg)": self.ufg,
+            "uf (kJ/kg)": uf,
+            "ug (kJ/kg)": ug,
+            "ufg (kJ/kg)": ufg,
             "h (kJ/kg)": h,
-            "hf (kJ/kg)": self.hf,
-            "hg (kJ/kg)": self.hg,
-            "hfg (kJ/kg)": self.hfg,
+            "hf (kJ/kg)": hf,
+            "hg (kJ/kg)": hg,
+            "hfg (kJ/kg)": hfg,
             "s (kJ/(kg·K))": s,
-            "sf (kJ/(kg·K))": self.sf,
-            "sg (kJ/(kg·K))": self.sg,
-            "sfg (kJ/(kg·K))": self.sfg
+            "sf (kJ/(kg·K))": sf,
+            "sg (kJ/(kg·K))": sg,
+            "sfg (kJ/(kg·K))": sfg
         }
-        return pd.DataFrame([_State_data])
-    
+
+    def Data_Frame(self):
+        # Shared until an input changes, like Data
+        if self._frame is None:
+            import pandas as pd
+            self._frame = pd.DataFrame([self.to_dict()])
+        return self._frame
+
     def __str__(self):
         return self.Data_Frame().to_string(index=False)
 
+    def __repr__(self):
+        return f"State(Material={self.Material!r}, m={self.m!r}, T={self.T!r}, P={self.P!r})"
+
+
 def Print_State_Properties(State):
     df = State.Data_Frame()
     print(df)
+
+
+# Many states at once: one structured array, same property names as State.
+# Missing values are NaN (None in State), 'phase' is a string field.
+
+_ARRAY_FIELDS = ('m', 'T', 'P', 'x') + tuple(name for name, _ in _PROPS[:15])
+_ARRAY_DTYPE = np.dtype([(name, 'f8') for name in _ARRAY_FIELDS] + [('phase', 'U24')])
+
+
+class StateArray:
+    __slots__ = ('Material', 'data', 'tables')
+
+    def __init__(self, Material, m, P=None, T=None, x=None, v=None, u=None, h=None, s=None, tables=None):
+        # Inputs broadcast against each other like Read_Tables_batch; NaN or
+        # None marks a property that is not given
+        out = Read_Tables_batch(Material, T=T, P=P, x=x, v=v, u=u, h=h, s=s, tables=tables)
+        n = len(next(iter(out.values()))) if out else 0
+        data = np.zeros(n, dtype=_ARRAY_DTYPE)
+        data['m'] = np.broadcast_to(np.asarray(m, dtype=float), (n,))
+        for name, col in _PROPS[:15]:
+            data[name] = out[col] if col in out else np.nan
+        for name, col in (('T', 'T (°C)'), ('P', 'P (MPa)'), ('x', 'x')):
+            data[name] = out[col] if col in out else np.nan
+        phase = out.get('Phase')
+        data['phase'] = '' if phase is None else [p if isinstance(p, str) else '' for p in phase]
+        self.Material = Material
+        self.data = data
+        self.tables = tables
+
+    @classmethod
+    def from_records(cls, Material, data, tables=None):
+        obj = cls.__new__(cls)
+        obj.Material = Material
+        obj.data = np.asarray(data, dtype=_ARRAY_DTYPE)
+        obj.tables = tables
+        return obj
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, i):
+        if isinstance(i, (int, np.integer)):
+            rec = self.data[i]
+            # Saturated states by P and x (T and P alone do not fix them)
+            if np.isnan(rec['x']):
+                st = State(self.Material, float(rec['m']), T=float(rec['T']), P=float(rec['P']), tables=self.tables)
+            else:
+                st = State(self.Material, float(rec['m']), P=float(rec['P']), x=float(rec['x']), tables=self.tables)
+            row = {col: rec[name] for name, col in _PROPS[:15]}
+            row.update({'T (°C)': rec['T'], 'P (MPa)': rec['P'], 'x': rec['x'], 'Phase': str(rec['phase']) or None})
+            st._vals = _resolve(row)
+            return st
+        return StateArray.from_records(self.Material, self.data[i], self.tables)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def __getattr__(self, name):
+        # Column access: sa.h, sa.vf, sa.phase, ...
+        if name in _ARRAY_DTYPE.names:
+            return self.data[name]
+        raise AttributeError(name)
+
+    @property
+    def V(self): return self.data['m'] * self.data['v']
+    @property
+    def U(self): return self.data['m'] * self.data['u']
+    @property
+    def H(self): return self.data['m'] * self.data['h']
+    @property
+    def S(self): return self.data['m'] * self.data['s']
+
+    def Data_Frame(self):
+        import pandas as pd
+        return pd.DataFrame(self.data)
+
+    def __repr__(self):
+        return f"StateArray(Material={self.Material!r}, states={len(self)})"
@@ -0,0 +1,108 @@
+import numpy as np
+from .tables import Read_Tables_batch
+from .tableset import current_tables
+from .saturation import Tsat, Psat
+
+# Property sweeps along an isobar, an isotherm or a line of constant quality,
+# evaluated in one Read_Tables_batch call, plus the saturation dome for T-s
+# and P-v diagrams. Results are dicts of equal-length arrays with the short
+# names below ('phase' is an object array).
+
+_COLS = {
+    'T': 'T (°C)', 'P': 'P (MPa)', 'v': 'Specific Volume (m^3/kg)', 'u': 'Internal Energy (kJ/kg)',
+    'h': 'Enthalpy (kJ/kg)', 's': 'Entropy [kJ/(kg K)]', 'x': 'x',
+}
+_SAT = {
+    'vf': 'Specific Volume Liquid (m^3/kg)', 'vg': 'Specific Volume Vapor (m^3/kg)',
+    'hf': 'Enthalpy Liquid (kJ/kg)', 'hg': 'Enthalpy Vapor (kJ/kg)',
+    'sf': 'Entropy Liquid [kJ/(kg K)]', 'sg': 'Entropy Vapor [kJ/(kg K)]',
+}
+LINES = ('isobar', 'isotherm', 'quality')
+
+
+def _short(out, n, phase=None):
+    res = {k: np.asarray(out[c], dtype=float) if c in out else np.full(n, np.nan) for k, c in _COLS.items()}
+    if phase is None:
+        phase = out.get('Phase', np.full(n, None, dtype=object))
+    res['phase'] = np.asarray(phase, dtype=object)
+    return res
+
+
+def _dome_points(ts, key, val, n=2):
+    # Saturated liquid and vapor at T or P = val, as sweep points
+    xs = np.linspace(0.0, 1.0, n)
+    out = Read_Tables_batch(ts.fluid, **{key: np.full(n, val)}, x=xs, tables=ts)
+    phase = np.where(xs == 0, 'saturated liquid', np.where(xs == 1, 'saturated vapor', 'saturated mixture'))
+    return _short(out, n, phase.astype(object))
+
+
+def sweep_states(line, fixed, start, stop, n=2000, log=None, Material='water', tables=None):
+    # line: 'isobar' (fixed P, T from start to stop), 'isotherm' (fixed T, P
+    # from start to stop, log-spaced by default) or 'quality' (fixed x, T from
+    # start to stop). Crossing the dome adds the horizontal segment between the
+    # saturated liquid and vapor states, so diagrams show it.
+    if line not in LINES:
+        raise ValueError(f"Sweep line must be one of {LINES}")
+    ts = current_tables(Material, tables)
+    n = int(n)
+    if n < 2:
+        raise ValueError("A sweep needs at least 2 points")
+    fixed, start, stop = float(fixed), float(start), float(stop)
+    if log is None:
+        log = line == 'isotherm' and start > 0 and stop > 0
+    grid = np.geomspace(start, stop, n) if log else np.linspace(start, stop, n)
+
+    if line == 'quality':
+        T_crit = ts.T_tab.keylist[-1]
+        grid = grid[grid <= T_crit]
+        out = Read_Tables_batch(Material, T=grid, x=np.full(len(grid), fixed), tables=ts)
+        res = _short(out, len(grid), np.full(len(grid), 'saturated mixture', dtype=object))
+        res['x'] = np.full(len(grid), min(max(fixed, 0.0), 1.0))
+        return res
+
+    if line == 'isobar':
+        # Below the lowest isobar every point would be clamped to it while the
+        # dome sits at Tsat(fixed), so the sweep would not be the isobar asked for
+        P_min = ts.SC_index.levels[0]
+        if fixed < P_min:
+            raise ValueError(f"Isobar at {fixed} MPa is below the lowest tabulated pressure {P_min} MPa")
+        out = Read_Tables_batch(Material, T=grid, P=np.full(n, fixed), tables=ts)
+        res = _short(out, n)
+        sat_key, order = 'P', 'T'
+        P_crit = ts.P_tab.keylist[-1]
+        sat = None if fixed >= P_crit else Tsat(fixed, Material, ts)
+    else:
+        out = Read_Tables_batch(Material, T=np.full(n, fixed), P=grid, tables=ts)
+        res = _short(out, n)
+        sat_key, order = 'T', 'P'
+        T_crit = ts.T_tab.keylist[-1]
+        sat = None if fixed >= T_crit else Psat(fixed, Material, ts)
+
+    # Points that landed on the saturation line come back as saturation rows
+    # without a single v/h/s; they are replaced by the explicit dome segment,
+    # liquid then vapor along an isobar, vapor then liquid along an isotherm
+    keep = ~np.isnan(res['v'])
+    res = {k: v[keep] for k, v in res.items()}
+    lo, hi = min(start, stop), max(start, stop)
+    if sat is not None and lo <= sat <= hi:
+        dome = _dome_points(ts, sat_key, fixed, 2)
+        if line == 'isotherm':
+            dome = {k: v[::-1] for k, v in dome.items()}
+        step = 1 if start <= stop else -1
+        res = {k: v[::step] for k, v in res.items()}
+        below = res[order] < sat
+        res = {k: np.concatenate([v[below], dome[k], v[~below]])[::step] for k, v in res.items()}
+    return res
+
+
+def saturation_dome(n=300, Material='water', tables=None):
+    # Saturated liquid and vapor lines from the triple point to the critical
+    # point, from the saturation-by-T table
+    ts = current_tables(Material, tables)
+    tab = ts.T_tab
+    T = np.linspace(tab.keylist[0], tab.keylist[-1], int(n))
+    out = Read_Tables_batch(Material, T=T, tables=ts)
+    res = {'T': T, 'P': np.asarray(out['P (MPa)'], dtype=float)}
+    for k, c in _SAT.items():
+        res[k] = np.asarray(out[c], dtype=float) if c in out else np.full(len(T), np.nan)
+    return res
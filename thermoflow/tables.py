@@ -1,50 +1,153 @@
+from time import perf_counter
 import numpy as np
-import pandas as pd
-from .interpolation import _interp_row_1d, _bilinear_superheated
+from . import instrument as _instrument
+from .cache import LookupCache
+from .tableset import TableSet, register_tables, current_tables
+from .interpolation import _interp_row_1d, _bilinear_superheated, _interp_rows_1d, _bilinear_superheated_batch, _isclose, _isclose_many
+from .interpolation import _interp_value_1d, _interp_cols_1d
 from .utils import Quality_Equation, _get_if_present
+from . import generalized as _generalized
 
-TemperatureTable = None
-PressureTable = None
-Superheated_CompressedTable = None
-IndexTable = None
+# Tables live in immutable TableSets (see tableset.py); set_tables builds one
+# and registers it as the water tables
 
-def set_tables(T, P, S_C, I):
-    # Assigns tables
-    global TemperatureTable, PressureTable, Superheated_CompressedTable, IndexTable
-    TemperatureTable = pd.DataFrame(T).copy()
-    PressureTable = pd.DataFrame(P).copy()
-    Superheated_CompressedTable = pd.DataFrame(S_C).copy()
-    IndexTable = pd.DataFrame(I).copy()
+# Optional LRU cache in front of Read_Tables (see enable_cache)
+_cache = None
 
+def set_tables(T, P, S_C, I, fluid="water", revision=None, interpolation="linear"):
+    # Compiles and registers the tables of one fluid; returns the TableSet
+    ts = register_tables(TableSet(T, P, S_C, I, fluid, revision, interpolation))
+    if _cache is not None:
+        _cache.invalidate()
+    return ts
 
-def Read_Tables(Material=None, T=None, P=None, x=None, v=None, u=None, h=None, s=None):
-    if (Material or "").lower() != "water":
-        raise ValueError("Only water accepted for now (V1.0)")
 
+# Old module globals, now views of the current water tables
+_LEGACY = {
+    "_T_tab": "T_tab", "_P_tab": "P_tab", "_SC_tab": "SC_tab",
+    "_SC_index": "SC_index", "_SC_inverse": "SC_inverse",
+}
+_LEGACY_RAW = {
+    "TemperatureTable": "T_tab", "PressureTable": "P_tab", "Superheated_CompressedTable": "SC_tab",
+}
+
+def __getattr__(name):
+    if name in _LEGACY or name in _LEGACY_RAW or name == "IndexTable":
+        try:
+            ts = current_tables("water")
+        except ValueError:
+            return None
+        if name in _LEGACY:
+            return getattr(ts, _LEGACY[name])
+        if name == "IndexTable":
+            return dict(ts.critical)
+        return getattr(ts, _LEGACY_RAW[name]).to_dict()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def enable_cache(maxsize=1024, digits=None):
+    # Memoize Read_Tables. With `digits`, inputs are rounded to that many
+    # significant figures before lookup, so nearby states share one entry.
+    global _cache
+    _cache = LookupCache(maxsize, digits)
+    return _cache
+
+def disable_cache():
+    global _cache
+    _cache = None
+
+def cache_info():
+    # CacheInfo(hits, misses, evictions, invalidations, maxsize, currsize), or None when off
+    return None if _cache is None else _cache.info()
+
+def cache_clear():
+    if _cache is not None:
+        _cache.invalidate()
+
+
+def Read_Tables(Material=None, T=None, P=None, x=None, v=None, u=None, h=None, s=None, tables=None):
+    import pandas as pd
+    return pd.DataFrame([_lookup(Material, T, P, x, v, u, h, s, tables)])
+
+
+def _tables_or_gas(Material, tables):
+    # TableSet of Material, or None for a substance of the critical-properties
+    # table that has no tables of its own (generalized compressibility)
+    try:
+        return current_tables(Material, tables)
+    except ValueError:
+        if _generalized.is_substance(Material, tables):
+            return None
+        raise
+
+
+def _lookup(Material=None, T=None, P=None, x=None, v=None, u=None, h=None, s=None, tables=None):
+    # One state as a dict of column -> value, through the cache when enabled.
+    # The dict may be shared with the cache: read it, don't modify it.
+    t0 = perf_counter() if _instrument.enabled else None
+    ts = _tables_or_gas(Material, tables)
+    if ts is None:
+        row = _generalized.gas_row(Material, T, P, x, v, u, h, s, tables)
+        if t0 is not None:
+            _instrument.record("generalized", perf_counter() - t0)
+        return row
+    cache, hit = _cache, False
+    if cache is None:
+        row = _read_row(ts, T, P, x, v, u, h, s)
+    else:
+        key = (ts.uid,) + cache.key(Material, T, P, x, v, u, h, s)
+        row = cache.get(key)
+        hit = row is not None
+        if not hit:
+            row = _read_row(ts, T, P, x, v, u, h, s)
+            cache.put(key, row)
+    if t0 is not None:
+        dt = perf_counter() - t0
+        _instrument.record("cache_hit" if hit else _branch_of(ts, T, P, (x, v, u, h, s), row), dt)
+    return row
+
+
+def _branch_of(ts, T, P, props, row):
+    # Name of the Read_Tables path that produced `row` (instrumentation only)
+    quality = "_quality" if any(p is not None for p in props) else ""
+    if P is None:
+        return "T_sat" + quality
+    if T is None:
+        return "P_sat" + quality
+    if 'Specific Volume Liquid (m^3/kg)' in row:
+        return "TP_sat"
+    T, P, idx = float(T), float(P), ts.SC_index
+    if idx.exact(T, P) >= 0:
+        return "TP_exact"
+    k_lo, k_hi, _ = idx.bracket(P)
+    return "TP_crossing" if idx.crossing(k_lo, k_hi, T) else "TP_bilinear"
+
+
+def _read_row(ts, T=None, P=None, x=None, v=None, u=None, h=None, s=None):
     if T is not None and P is None:
-        rowT = _interp_row_1d(TemperatureTable, 'T (°C)', float(T)).iloc[0]
+        rowT = _interp_row_1d(ts.T_tab, 'T (°C)', float(T), slopes=ts.T_slopes)
 
         if not any(arg is not None for arg in [x, v, u, h, s]):
-            return pd.DataFrame([rowT])
+            return rowT
 
         x_used = x
         if x_used is None:
             # --- h
-            if x_used is None and h is not None and {'Enthalpy Liquid (kJ/kg)','Enthalpy Vapor (kJ/kg)'}.issubset(rowT.index):
+            if x_used is None and h is not None and {'Enthalpy Liquid (kJ/kg)','Enthalpy Vapor (kJ/kg)'}.issubset(rowT):
                 hf = float(rowT['Enthalpy Liquid (kJ/kg)']); hg = float(rowT['Enthalpy Vapor (kJ/kg)'])
-                if not np.isclose(hg, hf): x_used = (float(h) - hf) / (hg - hf)
+                if not _isclose(hg, hf): x_used = (float(h) - hf) / (hg - hf)
             # --- u
-            if x_used is None and u is not None and {'Internal Energy Liquid (kJ/kg)','Internal Energy Vapor (kJ/kg)'}.issubset(rowT.index):
+            if x_used is None and u is not None and {'Internal Energy Liquid (kJ/kg)','Internal Energy Vapor (kJ/kg)'}.issubset(rowT):
                 uf = float(rowT['Internal Energy Liquid (kJ/kg)']); ug = float(rowT['Internal Energy Vapor (kJ/kg)'])
-                if not np.isclose(ug, uf): x_used = (float(u) - uf) / (ug - uf)
+                if not _isclose(ug, uf): x_used = (float(u) - uf) / (ug - uf)
             # --- v
-            if x_used is None and v is not None and {'Specific Volume Liquid (m^3/kg)','Specific Volume Vapor (m^3/kg)'}.issubset(rowT.index):
+            if x_used is None and v is not None and {'Specific Volume Liquid (m^3/kg)','Specific Volume Vapor (m^3/kg)'}.issubset(rowT):
                 vf = float(rowT['Specific Volume Liquid (m^3/kg)']); vg = float(rowT['Specific Volume Vapor (m^3/kg)'])
-                if not np.isclose(vg, vf): x_used = (float(v) - vf) / (vg - vf)
+                if not _isclose(vg, vf): x_used = (float(v) - vf) / (vg - vf)
             # --- s
-            if x_used is None and s is not None and {'Entropy Liquid [kJ/(kg K)]','Entropy Vapor [kJ/(kg K)]'}.issubset(rowT.index):
+            if x_used is None and s is not None and {'Entropy Liquid [kJ/(kg K)]','Entropy Vapor [kJ/(kg K)]'}.issubset(rowT):
                 sf = float(rowT['Entropy Liquid [kJ/(kg K)]']); sg = float(rowT['Entropy Vapor [kJ/(kg K)]'])
-                if not np.isclose(sg, sf): x_used = (float(s) - sf) / (sg - sf)
+                if not _isclose(sg, sf): x_used = (float(s) - sf) / (sg - sf)
 
         if x_used is not None:
             x_used = float(np.clip(x_used, 0.0, 1.0))
@@ -54,8 +157,8 @@ def Read_Tables(Material=None, T=None, P=None, x=None, v=None, u=None, h=None, s
             "P (MPa)": float(rowT.get('P (MPa)', np.nan)),
         }
 
-        if 'Enthalpy Liquid (kJ/kg)' in rowT.index:  out['Enthalpy Liquid (kJ/kg)']        = float(rowT['Enthalpy Liquid (kJ/kg)'])
-        if 'Enthalpy Vapor (kJ/kg)' in rowT.index:   out['Enthalpy Vapor (kJ/kg)']  = float(rowT['Enthalpy Vapor (kJ/kg)'])
+        if 'Enthalpy Liquid (kJ/kg)' in rowT:  out['Enthalpy Liquid (kJ/kg)']        = float(rowT['Enthalpy Liquid (kJ/kg)'])
+        if 'Enthalpy Vapor (kJ/kg)' in rowT:   out['Enthalpy Vapor (kJ/kg)']  = float(rowT['Enthalpy Vapor (kJ/kg)'])
         if 'Enthalpy Liquid (kJ/kg)' in out and 'Enthalpy Vapor (kJ/kg)' in out:
             out['Enthalpy of Vaporization (kJ/kg)'] = out['Enthalpy Vapor (kJ/kg)'] - out['Enthalpy Liquid (kJ/kg)']
 
@@ -67,19 +170,19 @@ def Read_Tables(Material=None, T=None, P=None, x=None, v=None, u=None, h=None, s
                 out['Enthalpy (kJ/kg)'] = (1 - x_used)*out['Enthalpy Liquid (kJ/kg)'] + x_used*out['Enthalpy Vapor (kJ/kg)']
 
             # u mix
-            if {'Internal Energy Liquid (kJ/kg)','Internal Energy Vapor (kJ/kg)'}.issubset(rowT.index):
+            if {'Internal Energy Liquid (kJ/kg)','Internal Energy Vapor (kJ/kg)'}.issubset(rowT):
                 uf = float(rowT['Internal Energy Liquid (kJ/kg)']); ug = float(rowT['Internal Energy Vapor (kJ/kg)'])
                 out['Internal Energy Liquid (kJ/kg)'] = uf; out['Internal Energy Vapor (kJ/kg)'] = ug; out['Internal Energy of Vaporization (kJ/kg)'] = ug - uf
                 out['Internal Energy (kJ/kg)'] = (1 - x_used)*uf + x_used*ug
 
             # v mix
-            if {'Specific Volume Liquid (m^3/kg)','Specific Volume Vapor (m^3/kg)'}.issubset(rowT.index):
+            if {'Specific Volume Liquid (m^3/kg)','Specific Volume Vapor (m^3/kg)'}.issubset(rowT):
                 vf = float(rowT['Specific Volume Liquid (m^3/kg)']); vg = float(rowT['Specific Volume Vapor (m^3/kg)'])
                 out['Specific Volume Liquid (m^3/kg)'] = vf; out['Specific Volume Vapor (m^3/kg)'] = vg
                 out['Specific Volume (m^3/kg)'] = (1 - x_used)*vf + x_used*vg
 
             # s mix
-            if {'Entropy Liquid [kJ/(kg K)]','Entropy Vapor [kJ/(kg K)]'}.issubset(rowT.index):
+            if {'Entropy Liquid [kJ/(kg K)]','Entropy Vapor [kJ/(kg K)]'}.issubset(rowT):
                 sf = float(rowT['Entropy Liquid [kJ/(kg K)]']); sg = float(rowT['Entropy Vapor [kJ/(kg K)]'])
                 out['Entropy Liquid [kJ/(kg K)]'] = sf; out['Entropy Vapor [kJ/(kg K)]'] = sg; out['Entropy of Vaporization [kJ/(kg K)]'] = sg - sf
                 out['Entropy [kJ/(kg K)]'] = (1 - x_used)*sf + x_used*sg
@@ -90,35 +193,35 @@ def Read_Tables(Material=None, T=None, P=None, x=None, v=None, u=None, h=None, s
             if v is not None: out['Specific Volume (m^3/kg)'] = float(v)
             if s is not None: out['Entropy (kJ/(kg·K))'] = float(s)
 
-        return pd.DataFrame([out])
+        return out
 
     if P is not None and T is None:
-        rowP = _interp_row_1d(PressureTable, 'P (MPa)', float(P)).iloc[0]
+        rowP = _interp_row_1d(ts.P_tab, 'P (MPa)', float(P), slopes=ts.P_slopes)
 
         if not any(arg is not None for arg in [x, v, u, h, s]):
-            return pd.DataFrame([rowP])
+            return rowP
 
         x_used = x
         if x_used is None:
-            if x_used is None and h is not None and {'Enthalpy Liquid (kJ/kg)','Enthalpy Vapor (kJ/kg)'}.issubset(rowP.index):
+            if x_used is None and h is not None and {'Enthalpy Liquid (kJ/kg)','Enthalpy Vapor (kJ/kg)'}.issubset(rowP):
                 hf, hg = float(rowP['Enthalpy Liquid (kJ/kg)']), float(rowP['Enthalpy Vapor (kJ/kg)'])
-                if not np.isclose(hg, hf): x_used = (float(h)-hf)/(hg-hf)
-            if x_used is None and u is not None and {'Internal Energy Liquid (kJ/kg)','Internal Energy Vapor (kJ/kg)'}.issubset(rowP.index):
+                if not _isclose(hg, hf): x_used = (float(h)-hf)/(hg-hf)
+            if x_used is None and u is not None and {'Internal Energy Liquid (kJ/kg)','Internal Energy Vapor (kJ/kg)'}.issubset(rowP):
                 uf, ug = float(rowP['Internal Energy Liquid (kJ/kg)']), float(rowP['Internal Energy Vapor (kJ/kg)'])
-                if not np.isclose(ug, uf): x_used = (float(u)-uf)/(ug-uf)
-            if x_used is None and v is not None and {'Specific Volume Liquid (m^3/kg)','Specific Volume Vapor (m^3/kg)'}.issubset(rowP.index):
+                if not _isclose(ug, uf): x_used = (float(u)-uf)/(ug-uf)
+            if x_used is None and v is not None and {'Specific Volume Liquid (m^3/kg)','Specific Volume Vapor (m^3/kg)'}.issubset(rowP):
                 vf, vg = float(rowP['Specific Volume Liquid (m^3/kg)']), float(rowP['Specific Volume Vapor (m^3/kg)'])
-                if not np.isclose(vg, vf): x_used = (float(v)-vf)/(vg-vf)
-            if x_used is None and s is not None and {'Entropy Liquid [kJ/(kg K)]','Entropy Vapor [kJ/(kg K)]'}.issubset(rowP.index):
+                if not _isclose(vg, vf): x_used = (float(v)-vf)/(vg-vf)
+            if x_used is None and s is not None and {'Entropy Liquid [kJ/(kg K)]','Entropy Vapor [kJ/(kg K)]'}.issubset(rowP):
                 sf, sg = float(rowP['Entropy Liquid [kJ/(kg K)]']), float(rowP['Entropy Vapor [kJ/(kg K)]'])
-                if not np.isclose(sg, sf): x_used = (float(s)-sf)/(sg-sf)
+                if not _isclose(sg, sf): x_used = (float(s)-sf)/(sg-sf)
 
         if x_used is not None:
             x_used = float(np.clip(x_used, 0.0, 1.0))
 
         out = {"T (°C)": float(rowP.get('T (°C)', np.nan)), "P (MPa)": float(rowP.get('P (MPa)', P))}
-        if 'Enthalpy Liquid (kJ/kg)' in rowP.index: out['Enthalpy Liquid (kJ/kg)'] = float(rowP['Enthalpy Liquid (kJ/kg)'])
-        if 'Enthalpy Vapor (kJ/kg)'  in rowP.index: out['Enthalpy Vapor (kJ/kg)'] = float(rowP['Enthalpy Vapor (kJ/kg)'])
+        if 'Enthalpy Liquid (kJ/kg)' in rowP: out['Enthalpy Liquid (kJ/kg)'] = float(rowP['Enthalpy Liquid (kJ/kg)'])
+        if 'Enthalpy Vapor (kJ/kg)'  in rowP: out['Enthalpy Vapor (kJ/kg)'] = float(rowP['Enthalpy Vapor (kJ/kg)'])
         if 'Enthalpy Liquid (kJ/kg)' in out and 'Enthalpy Vapor (kJ/kg)' in out:
             out['Enthalpy of Vaporization (kJ/kg)'] = out['Enthalpy Vapor (kJ/kg)'] - out['Enthalpy Liquid (kJ/kg)']
 
@@ -126,15 +229,15 @@ def Read_Tables(Material=None, T=None, P=None, x=None, v=None, u=None, h=None, s
             out['x'] = x_used
             if 'Enthalpy Liquid (kJ/kg)' in out and 'Enthalpy Vapor (kJ/kg)' in out:
                 out['Enthalpy (kJ/kg)'] = (1-x_used)*out['Enthalpy Liquid (kJ/kg)'] + x_used*out['Enthalpy Vapor (kJ/kg)']
-            if {'Internal Energy Liquid (kJ/kg)','Internal Energy Vapor (kJ/kg)'}.issubset(rowP.index):
+            if {'Internal Energy Liquid (kJ/kg)','Internal Energy Vapor (kJ/kg)'}.issubset(rowP):
                 uf, ug = float(rowP['Internal Energy Liquid (kJ/kg)']), float(rowP['Internal Energy Vapor (kJ/kg)'])
                 out['Internal Energy Liquid (kJ/kg)'] = uf; out['Internal Energy Vapor (kJ/kg)'] = ug; out['Internal Energy of Vaporization (kJ/kg)'] = ug - uf
                 out['Internal Energy (kJ/kg)'] = (1-x_used)*uf + x_used*ug
-            if {'Specific Volume Liquid (m^3/kg)','Specific Volume Vapor (m^3/kg)'}.issubset(rowP.index):
+            if {'Specific Volume Liquid (m^3/kg)','Specific Volume Vapor (m^3/kg)'}.issubset(rowP):
                 vf, vg = float(rowP['Specific Volume Liquid (m^3/kg)']), float(rowP['Specific Volume Vapor (m^3/kg)'])
                 out['Specific Volume Liquid (m^3/kg)']=vf; out['Specific Volume Vapor (m^3/kg)']=vg
                 out['Specific Volume (m^3/kg)'] = (1-x_used)*vf + x_used*vg
-            if {'Entropy Liquid [kJ/(kg K)]','Entropy Vapor [kJ/(kg K)]'}.issubset(rowP.index):
+            if {'Entropy Liquid [kJ/(kg K)]','Entropy Vapor [kJ/(kg K)]'}.issubset(rowP):
                 sf, sg = float(rowP['Entropy Liquid [kJ/(kg K)]']), float(rowP['Entropy Vapor [kJ/(kg K)]'])
                 out['Entropy Liquid [kJ/(kg K)]']=sf; out['Entropy Vapor [kJ/(kg K)]']=sg; out['Entropy of Vaporization [kJ/(kg K)]']=sg-sf
                 out['Entropy [kJ/(kg K)]'] = (1-x_used)*sf + x_used*sg
@@ -144,26 +247,199 @@ def Read_Tables(Material=None, T=None, P=None, x=None, v=None, u=None, h=None, s
             if v is not None: out['Specific Volume [m^3/kg]'] = float(v)
             if s is not None: out['Entropy [kJ/(kg·K)]'] = float(s)
 
-        return pd.DataFrame([out])
+        return out
         
     if T is None and P is None:
         raise ValueError("Please provide either Temperature or Pressure.")
 
     if T is not None and P is not None:
-        sat_row_at_P = _interp_row_1d(PressureTable, 'P (MPa)', float(P))
-        Tsat = float(sat_row_at_P['T (°C)'].iloc[0])
+        Tsat = _interp_value_1d(ts.P_tab, 'P (MPa)', 'T (°C)', float(P), ts.P_slopes)
 
-        if np.isclose(float(T), Tsat, atol=1e-3):
-            return _interp_row_1d(TemperatureTable, 'T (°C)', float(T))
+        if _isclose(float(T), Tsat, atol=1e-3):
+            return _interp_row_1d(ts.T_tab, 'T (°C)', float(T), slopes=ts.T_slopes)
 
-        mask = (
-            np.isclose(Superheated_CompressedTable['T (°C)'].astype(float), float(T), atol=1e-9) &
-            np.isclose(Superheated_CompressedTable['P (MPa)'].astype(float), float(P), atol=1e-12)
-        )
-        if mask.any():
-            return Superheated_CompressedTable.loc[mask].iloc[[0]].copy()
+        hit = ts.SC_index.exact(float(T), float(P))
+        if hit >= 0:
+            return ts.SC_tab.row(hit)
 
-        return _bilinear_superheated(Superheated_CompressedTable, float(T), float(P))
+        return _bilinear_superheated(ts.SC_tab, ts.SC_index, float(T), float(P), ts.SC_slopes)
 
     raise ValueError("Not enough Data to calculate properties")
-  
+
+
+# ---------------------------------------------------------------------------
+# Batch evaluation
+# ---------------------------------------------------------------------------
+
+_LIQ_VAP = {
+    'h': ('Enthalpy Liquid (kJ/kg)', 'Enthalpy Vapor (kJ/kg)'),
+    'u': ('Internal Energy Liquid (kJ/kg)', 'Internal Energy Vapor (kJ/kg)'),
+    'v': ('Specific Volume Liquid (m^3/kg)', 'Specific Volume Vapor (m^3/kg)'),
+    's': ('Entropy Liquid [kJ/(kg K)]', 'Entropy Vapor [kJ/(kg K)]'),
+}
+
+# Columns used by Read_Tables when the quality cannot be resolved (branch specific)
+_GIVEN_T = {'h': 'Enthalpy (kJ/kg)', 'u': 'Internal Energy (kJ/kg)', 'v': 'Specific Volume (m^3/kg)', 's': 'Entropy (kJ/(kg·K))'}
+_GIVEN_P = {'h': 'Enthalpy [kJ/kg]', 'u': 'Internal Energy [kJ/kg]', 'v': 'Specific Volume [m^3/kg]', 's': 'Entropy [kJ/(kg·K)]'}
+
+
+def _as_column(val, n):
+    if val is None:
+        return np.full(n, np.nan)
+    return np.broadcast_to(np.asarray(val, dtype=float), (n,))
+
+def _scatter(out, n, idx, cols):
+    # Writes the rows of one branch into the full-length result columns
+    if len(idx) == 0:
+        return
+    for col, vals in cols.items():
+        vals = np.asarray(vals)
+        if col not in out:
+            out[col] = np.full(n, np.nan) if vals.dtype.kind in "fiub" else np.full(n, None, dtype=object)
+        if out[col].dtype.kind == "f" and vals.dtype.kind not in "fiub":
+            out[col] = out[col].astype(object)
+        out[col][idx] = vals
+
+def _saturation_batch(table, key, q, props, given_names, slopes=None):
+    rows = _interp_rows_1d(table, key, q, slopes=slopes)
+    n = len(q)
+    x = props['x']
+    has_prop = ~np.isnan(x)
+    for k in 'vuhs':
+        has_prop |= ~np.isnan(props[k])
+
+    res = {}
+    bare = np.flatnonzero(~has_prop)
+    _scatter(res, n, bare, {col: vals[bare] for col, vals in rows.items()})
+
+    # Quality from the first usable property, in the same order as Read_Tables
+    x_used = x.copy()
+    for k in 'huvs':
+        f, g = _LIQ_VAP[k]
+        if f in rows and g in rows:
+            vf, vg = rows[f], rows[g]
+            ok = np.isnan(x_used) & ~np.isnan(props[k]) & ~_isclose_many(vg, vf)
+            x_used[ok] = (props[k][ok] - vf[ok]) / (vg[ok] - vf[ok])
+    x_used = np.clip(x_used, 0.0, 1.0)
+
+    idx = np.flatnonzero(has_prop)
+    mixed = {}
+    mixed['T (°C)'] = rows['T (°C)'][idx] if 'T (°C)' in rows else np.full(len(idx), np.nan)
+    mixed['P (MPa)'] = rows['P (MPa)'][idx] if 'P (MPa)' in rows else np.full(len(idx), np.nan)
+    hf, hg = _LIQ_VAP['h']
+    if hf in rows: mixed[hf] = rows[hf][idx]
+    if hg in rows: mixed[hg] = rows[hg][idx]
+    if hf in mixed and hg in mixed:
+        mixed['Enthalpy of Vaporization (kJ/kg)'] = mixed[hg] - mixed[hf]
+    _scatter(res, n, idx, mixed)
+
+    xi = x_used[idx]
+    known = ~np.isnan(xi)
+    sel, xk = idx[known], xi[known]
+    mix = {'x': xk}
+    if hf in rows and hg in rows:
+        mix['Enthalpy (kJ/kg)'] = (1 - xk)*rows[hf][sel] + xk*rows[hg][sel]
+    for k, fg_name, mix_name in (('u', 'Internal Energy of Vaporization (kJ/kg)', 'Internal Energy (kJ/kg)'),
+                                 ('v', None, 'Specific Volume (m^3/kg)'),
+                                 ('s', 'Entropy of Vaporization [kJ/(kg K)]', 'Entropy [kJ/(kg K)]')):
+        f, g = _LIQ_VAP[k]
+        if f in rows and g in rows:
+            vf, vg = rows[f][sel], rows[g][sel]
+            mix[f] = vf; mix[g] = vg
+            if fg_name: mix[fg_name] = vg - vf
+            mix[mix_name] = (1 - xk)*vf + xk*vg
+    _scatter(res, n, sel, mix)
+
+    unknown = idx[~known]
+    given = {}
+    for k in 'huvs':
+        val = props[k][unknown]
+        if (~np.isnan(val)).any():
+            given[given_names[k]] = val
+    _scatter(res, n, unknown, given)
+    return res
+
+
+def Read_Tables_batch(Material=None, T=None, P=None, x=None, v=None, u=None, h=None, s=None, tables=None):
+    # Columnar version of Read_Tables: every argument may be a scalar or an array,
+    # NaN marks a missing input, and the result is a dict of column -> array with
+    # one entry per state (pd.DataFrame(result) gives the tabular view).
+    ts = _tables_or_gas(Material, tables)
+    t0 = perf_counter() if _instrument.enabled else None
+
+    given = {'T': T, 'P': P, 'x': x, 'v': v, 'u': u, 'h': h, 's': s}
+    n = int(np.broadcast(*[np.asarray(a, dtype=float) for a in given.values() if a is not None]).size) \
+        if any(a is not None for a in given.values()) else 0
+    cols = {k: np.array(_as_column(a, n), dtype=float).ravel() for k, a in given.items()}
+    hasT, hasP = ~np.isnan(cols['T']), ~np.isnan(cols['P'])
+
+    if (~hasT & ~hasP).any():
+        raise ValueError("Please provide either Temperature or Pressure.")
+
+    if ts is None:
+        if any((~np.isnan(cols[k])).any() for k in 'xvuhs'):
+            raise ValueError(f"Generalized properties of {Material!r} take T and P only")
+        out = _generalized.gas_properties(Material, cols['T'], cols['P'], tables)
+        if t0 is not None:
+            _instrument.record("generalized", perf_counter() - t0, n)
+        return out
+
+    out = {}
+    for mask, table, slopes, key, names in ((hasT & ~hasP, ts.T_tab, ts.T_slopes, 'T (°C)', _GIVEN_T),
+                                            (hasP & ~hasT, ts.P_tab, ts.P_slopes, 'P (MPa)', _GIVEN_P)):
+        idx = np.flatnonzero(mask)
+        if len(idx):
+            props = {k: cols[k][idx] for k in 'xvuhs'}
+            _scatter(out, n, idx, _saturation_batch(table, key, cols[key[0]][idx], props, names, slopes))
+
+    idx = np.flatnonzero(hasT & hasP)
+    if len(idx):
+        Tq, Pq = cols['T'][idx], cols['P'][idx]
+        Tsat = _interp_cols_1d(ts.P_tab, 'P (MPa)', ('T (°C)',), Pq, ts.P_slopes)[0]
+        on_sat = _isclose_many(Tq, Tsat, atol=1e-3)
+        if on_sat.any():
+            _scatter(out, n, idx[on_sat], _interp_rows_1d(ts.T_tab, 'T (°C)', Tq[on_sat], slopes=ts.T_slopes))
+
+        # Exact table nodes are returned verbatim, everything else is interpolated
+        rest = np.flatnonzero(~on_sat)
+        hit = ts.SC_index.exact_many(Tq[rest], Pq[rest])
+        found = hit >= 0
+        if found.any():
+            rows = {col: vals[hit[found]] for col, vals in ts.SC_tab.to_dict().items()}
+            _scatter(out, n, idx[rest[found]], rows)
+        interp = rest[~found]
+        if len(interp):
+            _scatter(out, n, idx[interp], _bilinear_superheated_batch(ts.SC_tab, ts.SC_index, Tq[interp], Pq[interp],
+                                                                    slopes=ts.SC_slopes))
+
+    if t0 is not None:
+        _instrument.record("batch", perf_counter() - t0, n)
+    return out
+
+
+
+_DERIV = {'v': 'Specific Volume (m^3/kg)', 'u': 'Internal Energy (kJ/kg)',
+          'h': 'Enthalpy (kJ/kg)', 's': 'Entropy [kJ/(kg K)]'}
+
+def state_derivatives(Material='water', T=None, P=None, tables=None):
+    # Partial derivatives of the interpolated single-phase surface at (T, P):
+    #   cp = dh/dT at fixed P, dv_dT, du_dT, ds_dT  (per K)
+    #   dh_dP, dv_dP, du_dP, ds_dP at fixed T      (per MPa)
+    # Along T they are the exact slopes of the interpolant: the node slopes
+    # blended by the cubic when the tables are 'pchip', the cell secant when
+    # 'linear'. Along P the interpolation is linear, so they are the secant
+    # between the bracketing isobars. NaN on the saturation line (where
+    # Read_Tables returns the saturation row) and outside the tables.
+    ts = current_tables(Material, tables)
+    T, P = (np.ravel(a) for a in np.broadcast_arrays(np.asarray(T, dtype=float), np.asarray(P, dtype=float)))
+    out, dT, dP = _bilinear_superheated_batch(ts.SC_tab, ts.SC_index, T, P, slopes=ts.SC_slopes, deriv=True)
+    Tsat = _interp_cols_1d(ts.P_tab, 'P (MPa)', ('T (°C)',), P, ts.P_slopes)[0]
+    on_sat = _isclose_many(T, Tsat, atol=1e-3)
+    res = {'T': T.copy(), 'P': P.copy(),
+           'phase': np.where(on_sat, 'saturated mixture', out.get('Phase', np.full(len(T), None))).astype(object)}
+    nan = np.full(len(T), np.nan)
+    for k, col in _DERIV.items():
+        res['cp' if k == 'h' else f'd{k}_dT'] = np.where(on_sat, np.nan, dT[col]) if col in dT else nan
+    for k, col in _DERIV.items():
+        res[f'd{k}_dP'] = np.where(on_sat, np.nan, dP[col]) if col in dP else nan
+    return res
@@ -0,0 +1,149 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import count
+from threading import Lock
+from types import MappingProxyType
+from .compiled import compile_table, IsobarIndex, InverseIndex, _columns_of, pchip_slopes, isobar_slopes
+
+# One fluid's tables, compiled once and never modified afterwards, so any
+# number of threads can read a TableSet without locks. Lookups take a TableSet
+# explicitly (tables=...), from the one bound with use_tables(), or from the
+# registry by fluid name, in that order.
+
+_uid = count(1)
+INTERPOLATIONS = ("linear", "pchip")
+
+
+class TableSet:
+    #   fluid       -> registry name ('water')
+    #   revision    -> free-form label of the table version
+    #   T_tab, P_tab, SC_tab -> CompiledTable (saturation by T, by P, single phase)
+    #   SC_index    -> IsobarIndex of SC_tab
+    #   SC_inverse  -> property column -> InverseIndex (read-only mapping)
+    #   critical    -> critical-properties table, column -> read-only array
+    #   uid         -> unique per TableSet, part of the lookup cache key
+    #   interpolation -> 'linear', or 'pchip' for monotone cubics along the
+    #                    key of every table (T on each isobar branch of SC_tab)
+    #   T_slopes, P_slopes, SC_slopes -> node slopes of those cubics, built
+    #                    once here (None when linear)
+    # Weak-referenceable: per-TableSet caches elsewhere key on the TableSet
+    # itself (weakref.WeakKeyDictionary) and go away with it
+    __slots__ = ("fluid", "revision", "T_tab", "P_tab", "SC_tab", "SC_index", "SC_inverse", "critical", "uid",
+                 "interpolation", "T_slopes", "P_slopes", "SC_slopes", "__weakref__")
+
+    def __init__(self, T, P, S_C, I=None, fluid="water", revision=None, interpolation="linear"):
+        # Already compiled tables (e.g. from another TableSet) are shared, not copied
+        if interpolation not in INTERPOLATIONS:
+            raise ValueError(f"Interpolation must be one of {INTERPOLATIONS}, got {interpolation!r}")
+        T_tab = compile_table(T, 'T (°C)')
+        P_tab = compile_table(P, 'P (MPa)')
+        SC_tab = compile_table(S_C, 'T (°C)', by=('P (MPa)',))
+        SC_index = IsobarIndex(SC_tab)
+        SC_inverse = {prop: InverseIndex(SC_tab, SC_index, prop)
+                      for prop in ('Enthalpy (kJ/kg)', 'Entropy [kJ/(kg K)]') if prop in SC_tab.col}
+        critical = {}
+        for name, vals in (_columns_of(I).items() if I is not None else ()):
+            if vals.flags.writeable:
+                vals = vals.copy()
+                vals.flags.writeable = False
+            critical[name] = vals
+        object.__setattr__(self, "fluid", str(fluid).strip().lower())
+        object.__setattr__(self, "revision", revision)
+        object.__setattr__(self, "T_tab", T_tab)
+        object.__setattr__(self, "P_tab", P_tab)
+        object.__setattr__(self, "SC_tab", SC_tab)
+        object.__setattr__(self, "SC_index", SC_index)
+        object.__setattr__(self, "SC_inverse", MappingProxyType(SC_inverse))
+        object.__setattr__(self, "critical", MappingProxyType(critical))
+        object.__setattr__(self, "uid", next(_uid))
+        object.__setattr__(self, "interpolation", interpolation)
+        pchip = interpolation == "pchip"
+        object.__setattr__(self, "T_slopes", pchip_slopes(T_tab.keys, T_tab.data) if pchip else None)
+        object.__setattr__(self, "P_slopes", pchip_slopes(P_tab.keys, P_tab.data) if pchip else None)
+        object.__setattr__(self, "SC_slopes", isobar_slopes(SC_tab, SC_index) if pchip else None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("TableSet is read-only")
+
+    def replace(self, T=None, P=None, S_C=None, I=None, fluid=None, revision=None, interpolation=None):
+        # New TableSet with some tables swapped; the others are shared
+        same_sc = S_C is None
+        ts = TableSet(self.T_tab if T is None else T,
+                      self.P_tab if P is None else P,
+                      self.SC_tab if same_sc else S_C,
+                      self.critical if I is None else I,
+                      self.fluid if fluid is None else fluid,
+                      self.revision if revision is None else revision,
+                      self.interpolation if interpolation is None else interpolation)
+        if same_sc:
+            object.__setattr__(ts, "SC_index", self.SC_index)
+            object.__setattr__(ts, "SC_inverse", self.SC_inverse)
+        return ts
+
+    def __repr__(self):
+        rev = "" if self.revision is None else f", revision={self.revision!r}"
+        interp = "" if self.interpolation == "linear" else f", interpolation={self.interpolation!r}"
+        return (f"TableSet(fluid={self.fluid!r}{rev}{interp}, T={len(self.T_tab)}, P={len(self.P_tab)}, "
+                f"SC={len(self.SC_tab)})")
+
+
+# Registry: fluid name -> TableSet. Writers swap in a new dict under a lock;
+# readers only ever see a complete dict.
+_registry = {}
+_lock = Lock()
+_bound = ContextVar("thermoflow_tables", default=None)
+
+
+def register_tables(tables):
+    global _registry
+    if not isinstance(tables, TableSet):
+        raise TypeError("register_tables expects a TableSet")
+    with _lock:
+        reg = dict(_registry)
+        reg[tables.fluid] = tables
+        _registry = reg
+    return tables
+
+def unregister_tables(fluid):
+    global _registry
+    with _lock:
+        reg = dict(_registry)
+        reg.pop(str(fluid).strip().lower(), None)
+        _registry = reg
+
+def fluids():
+    return tuple(sorted(_registry))
+
+def get_tables(fluid="water"):
+    ts = _registry.get(str(fluid or "").strip().lower())
+    if ts is None:
+        raise ValueError(f"No tables loaded for {fluid!r}")
+    return ts
+
+
+@contextmanager
+def use_tables(tables):
+    # Binds `tables` for lookups of its fluid in this thread / task
+    if not isinstance(tables, TableSet):
+        raise TypeError("use_tables expects a TableSet")
+    token = _bound.set(tables)
+    try:
+        yield tables
+    finally:
+        _bound.reset(token)
+
+
+def current_tables(Material="water", tables=None):
+    # The TableSet a lookup of `Material` resolves to
+    fluid = str(Material or "").strip().lower()
+    if tables is not None:
+        if tables.fluid != fluid:
+            raise ValueError(f"Tables are for {tables.fluid!r}, not {Material!r}")
+        return tables
+    bound = _bound.get()
+    if bound is not None and bound.fluid == fluid:
+        return bound
+    ts = _registry.get(fluid)
+    if ts is None:
+        raise ValueError(f"No tables loaded for {Material!r}")
+    return ts
@@ -0,0 +1,265 @@
+import math
+import os
+import numpy as np
+from .state import _PROPS
+from .tables import Read_Tables_batch
+from .cycles import rankine_cycle_batch, vapor_compression_cycle_batch, _init_worker, _publish
+
+# Monte Carlo propagation of input uncertainty through the vectorized lookups
+# and cycle solvers, with optional Sobol first-order and total indices
+# (Saltelli sampling: matrices A, B and A with column i taken from B).
+#
+# Samples are drawn and evaluated in chunks, each from its own child of one
+# SeedSequence, and reduced to running sums; chunk results are merged in chunk
+# order, so a seed gives the same answer whatever the number of processes.
+#
+# Input specs: a number (held fixed), ('uniform', lo, hi), ('normal', mean, sd)
+# or ('triangular', lo, mode, hi). tolerance() builds the ±x% case.
+
+_CHUNK = 1 << 16
+_DISTS = {'uniform': 2, 'normal': 2, 'triangular': 3}
+
+# model -> (function, default outputs)
+_STATE_COLS = dict(_PROPS[:15])
+
+def _state_model(**inputs):
+    out = Read_Tables_batch('water', **inputs)
+    return {name: out[col] for name, col in _STATE_COLS.items() if col in out}
+
+MODELS = {
+    'state': (_state_model, ('h', 's')),
+    'rankine': (rankine_cycle_batch, ('efficiency', 'w_net')),
+    'vapor_compression': (vapor_compression_cycle_batch, ('COP_R', 'COP_HP')),
+}
+
+
+def tolerance(nominal, rel=0.05, dist='uniform'):
+    # nominal ± rel*nominal; for 'normal' the band is read as ±2 sd
+    half = abs(float(nominal))*rel
+    if dist == 'uniform':
+        return ('uniform', nominal - half, nominal + half)
+    if dist == 'normal':
+        return ('normal', float(nominal), half/2)
+    if dist == 'triangular':
+        return ('triangular', nominal - half, float(nominal), nominal + half)
+    raise ValueError(f"Distribution must be one of {tuple(_DISTS)}")
+
+
+def _check_spec(name, spec):
+    if isinstance(spec, (int, float, np.number)):
+        return
+    if not isinstance(spec, tuple) or not spec or spec[0] not in _DISTS or len(spec) != _DISTS[spec[0]] + 1:
+        raise ValueError(f"Bad distribution for {name}: {spec!r}")
+
+
+def _sample(spec, rng, n):
+    kind, *p = spec
+    if kind == 'uniform':
+        return rng.uniform(p[0], p[1], n)
+    if kind == 'normal':
+        return rng.normal(p[0], p[1], n)
+    return rng.triangular(p[0], p[1], p[2], n)
+
+
+class _Moments:
+    # Running count, mean, sum of squared deviations, min and max of the finite
+    # values; merged with the parallel update of Chan et al.
+    __slots__ = ("n", "nan", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.n = self.nan = 0
+        self.mean = self.m2 = 0.0
+        self.min, self.max = math.inf, -math.inf
+
+    def add(self, vals):
+        ok = np.isfinite(vals)
+        v = vals[ok]
+        other = _Moments()
+        other.nan = int(len(vals) - len(v))
+        if len(v):
+            other.n = len(v)
+            other.mean = float(v.mean())
+            other.m2 = float(((v - other.mean)**2).sum())
+            other.min, other.max = float(v.min()), float(v.max())
+        self.merge(other)
+
+    def merge(self, o):
+        n = self.n + o.n
+        if o.n:
+            d = o.mean - self.mean
+            self.m2 += o.m2 + d*d*self.n*o.n/n
+            self.mean += d*o.n/n
+            self.min, self.max = min(self.min, o.min), max(self.max, o.max)
+        self.n = n
+        self.nan += o.nan
+
+    def summary(self):
+        var = self.m2/(self.n - 1) if self.n > 1 else math.nan
+        return {
+            "n": self.n,
+            "failed": self.nan,
+            "mean": self.mean if self.n else math.nan,
+            "std": math.sqrt(var),
+            "sem": math.sqrt(var/self.n) if self.n > 1 else math.nan,
+            "min": self.min if self.n else math.nan,
+            "max": self.max if self.n else math.nan,
+        }
+
+
+class _Indices:
+    # Running sums for the Sobol estimators over the rows where A, B and
+    # every AB_i evaluated; f(B) is centred on the chunk mean
+    __slots__ = ("moments", "first", "total")
+
+    def __init__(self, d):
+        self.moments = _Moments()
+        self.first = np.zeros(d)
+        self.total = np.zeros(d)
+
+    def add(self, fA, fB, fAB):
+        ok = np.isfinite(fA) & np.isfinite(fB) & np.isfinite(fAB).all(axis=0)
+        fA, fB, fAB = fA[ok], fB[ok], fAB[:, ok]
+        self.moments.add(np.concatenate([fA, fB]))
+        if len(fA):
+            c = 0.5*(fA.mean() + fB.mean())
+            self.first += ((fB - c)*(fAB - fA)).sum(axis=1)
+            self.total += ((fA - fAB)**2).sum(axis=1)
+
+    def merge(self, o):
+        self.moments.merge(o.moments)
+        self.first += o.first
+        self.total += o.total
+
+    def summary(self, names):
+        n = self.moments.n//2
+        var = self.moments.m2/(self.moments.n - 1) if self.moments.n > 1 else math.nan
+        if n == 0 or not var > 0:
+            nan = {k: math.nan for k in names}
+            return {"S1": nan, "ST": dict(nan), "n": n}
+        return {
+            "S1": dict(zip(names, (self.first/n/var).tolist())),
+            "ST": dict(zip(names, (self.total/(2*n)/var).tolist())),
+            "n": n,
+        }
+
+
+def _model(model):
+    if callable(model):
+        return model, None
+    if model not in MODELS:
+        raise ValueError(f"Model must be a function or one of {tuple(MODELS)}")
+    return MODELS[model]
+
+
+def _run_chunk(seed, m, inputs, model, outputs, sobol):
+    # One chunk of m base samples -> (moments per output, indices per output)
+    fn, _ = _model(model)
+    rng = np.random.default_rng(seed)
+    varied = [k for k, spec in inputs.items() if isinstance(spec, tuple)]
+    fixed = {k: spec for k, spec in inputs.items() if not isinstance(spec, tuple)}
+    A = {k: _sample(inputs[k], rng, m) for k in varied}
+    if not sobol:
+        res = fn(**fixed, **A)
+        moments = {}
+        for name in outputs:
+            moments[name] = _Moments()
+            moments[name].add(np.asarray(res[name], dtype=float))
+        return moments, None
+
+    B = {k: _sample(inputs[k], rng, m) for k in varied}
+    # One model call on [A; B; AB_1; ...; AB_d]
+    stacked = {k: np.concatenate([A[k], B[k]] + [B[k] if j == k else A[k] for j in varied]) for k in varied}
+    res = fn(**fixed, **stacked)
+    indices = {}
+    for name in outputs:
+        f = np.asarray(res[name], dtype=float).reshape(len(varied) + 2, m)
+        indices[name] = _Indices(len(varied))
+        indices[name].add(f[0], f[1], f[2:])
+    return None, indices
+
+
+def _report(done, n, varied, moments, indices, entropy):
+    out = {"samples": done, "requested": n, "seed": entropy}
+    if indices is None:
+        out["stats"] = {name: acc.summary() for name, acc in moments.items()}
+    else:
+        out["stats"] = {name: acc.moments.summary() for name, acc in indices.items()}
+        out["sobol"] = {name: acc.summary(varied) for name, acc in indices.items()}
+    return out
+
+
+def monte_carlo_iter(inputs, model='state', outputs=None, n=100_000, seed=None, sobol=False,
+                     processes=None, chunk=_CHUNK, base=None, shared=False):
+    # Yields the running summary after every chunk (merged in chunk order):
+    #   samples, requested, seed (the SeedSequence entropy, to repeat the run)
+    #   stats -> output -> n, failed, mean, std, sem, min, max
+    #   sobol -> output -> S1, ST (input -> index), n      (when sobol=True)
+    # With sobol=True, n is the number of base samples; the model runs on
+    # n*(d + 2) rows for d varied inputs and the stats cover the 2n rows of
+    # A and B. chunk bounds the rows evaluated at once.
+    fn, default = _model(model)
+    outputs = tuple(outputs or default or ())
+    if not outputs:
+        raise ValueError("Name the outputs of a custom model")
+    inputs = dict(inputs)
+    for name, spec in inputs.items():
+        _check_spec(name, spec)
+    varied = [k for k, spec in inputs.items() if isinstance(spec, tuple)]
+    if sobol and not varied:
+        raise ValueError("Sobol indices need at least one varied input")
+    n = int(n)
+    if n < 2:
+        raise ValueError("Need at least 2 samples")
+
+    per = max(1, int(chunk)//(len(varied) + 2)) if sobol else max(1, int(chunk))
+    sizes = [min(per, n - i) for i in range(0, n, per)]
+    ss = np.random.SeedSequence(seed)
+    seeds = ss.spawn(len(sizes))
+
+    moments = None if sobol else {name: _Moments() for name in outputs}
+    indices = {name: _Indices(len(varied)) for name in outputs} if sobol else None
+    done = 0
+
+    def merge(part):
+        m, ix = part
+        for name in outputs:
+            if sobol:
+                indices[name].merge(ix[name])
+            else:
+                moments[name].merge(m[name])
+
+    processes = (os.cpu_count() or 1) if processes is None else int(processes)
+    if processes <= 1 or len(sizes) == 1:
+        for s, m in zip(seeds, sizes):
+            merge(_run_chunk(s, m, inputs, model, outputs, sobol))
+            done += m
+            yield _report(done, n, varied, moments, indices, ss.entropy)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    with _publish(base, shared) as pub, \
+            ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                initargs=(base, getattr(pub, 'path', None))) as pool:
+        futures = {pool.submit(_run_chunk, s, m, inputs, model, outputs, sobol): i
+                   for i, (s, m) in enumerate(zip(seeds, sizes))}
+        pending, nxt = {}, 0
+        try:
+            for fut in as_completed(futures):
+                pending[futures[fut]] = fut.result()
+                while nxt in pending:
+                    merge(pending.pop(nxt))
+                    done += sizes[nxt]
+                    nxt += 1
+                    yield _report(done, n, varied, moments, indices, ss.entropy)
+        finally:
+            for fut in futures:
+                fut.cancel()
+
+
+def monte_carlo(inputs, model='state', outputs=None, n=100_000, seed=None, sobol=False,
+                processes=None, chunk=_CHUNK, base=None, shared=False):
+    # Final summary of monte_carlo_iter
+    out = None
+    for out in monte_carlo_iter(inputs, model, outputs, n, seed, sobol, processes, chunk, base, shared):
+        pass
+    return out
@@ -1,5 +1,3 @@
-import numpy as np
-import pandas as pd
 
 def Quality_Equation(x=None, val_f=None, val_g=None, val=None):
     if val_f is None or val_g is None:
@@ -11,11 +9,12 @@ def Quality_Equation(x=None, val_f=None, val_g=None, val=None):
         if denom == 0:
             raise ValueError('Cannot compute quality: fg difference is zero')
         x_calc = (val - val_f)/denom
-        return float(np.clip(x_calc, 0.0, 1.0))
+        return float(min(max(x_calc, 0.0), 1.0))
     return ((1 - x)*val_f) + (x*val_g)
 
 def _get_if_present(df, col):
     if df is None or df.empty or col not in df.columns:
         return None
+    import pandas as pd
     val = df[col].iloc[0]
     return val if pd.notna(val) else None